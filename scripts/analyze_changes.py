@@ -28,22 +28,47 @@
 from __future__ import annotations
 
 import argparse
+import atexit
 import json
+import os
+import queue
 import subprocess
 import sys
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 # 引入多语言模式库
 sys.path.insert(0, str(Path(__file__).parent))
 from api_patterns import (  # noqa: E402
+    DEFAULT_SCAN_LIMITS,
     Endpoint,
+    GlobIndex,
+    ScanLimits,
+    SkippedFile,
+    add_scan_limit_arguments,
     extract_endpoints_from_content,
+    guarded_scan,
     parse_openapi_file,
-    file_matches,
+    parse_openapi_text,
+    patterns_for_file,
+    scan_limits_from_args,
 )
+from endpoint_scan import (  # noqa: E402
+    PARALLEL_MIN_FILES,
+    EndpointDoc,
+    cache_version,
+    decode_source,
+    doc_to_row,
+    row_to_doc,
+    scan_cache_key,
+    scan_content,
+)
+from scan_cache import CACHE_DIR, ScanCache, blob_sha  # noqa: E402
 
 
 # ==================== 配置 ====================
@@ -69,6 +94,10 @@ SKIP_GLOBS: Tuple[str, ...] = (
     "docs/**", ".github/**",
 )
 
+# 预编译的分派索引（与 file_matches 判定一致，避免每个文件反复 Path.match）
+SKIP_INDEX = GlobIndex((glob, True) for glob in SKIP_GLOBS)
+FEATURE_INDEX = GlobIndex((glob, True) for glob in FEATURE_GLOBS)
+
 
 # ==================== 数据结构 ====================
 
@@ -77,6 +106,7 @@ class FileChange:
     """单个文件的变更记录"""
     status: str  # "A" / "M" / "D" / "R" 单字符
     file: str
+    old_file: str = ""  # 重命名前的路径（仅 status 为 "R" 时非空）
 
     @property
     def status_name(self) -> str:
@@ -94,6 +124,7 @@ class ApiChangeReport:
     added: List[Endpoint] = field(default_factory=list)
     removed: List[Endpoint] = field(default_factory=list)
     modified: List[Endpoint] = field(default_factory=list)  # 同 signature 但 file/line 不同
+    skipped: List[SkippedFile] = field(default_factory=list)  # 因输入防护未扫描的文件
 
     def is_empty(self) -> bool:
         return not (self.added or self.removed or self.modified)
@@ -121,58 +152,256 @@ def run_git(args: List[str], cwd: Optional[str] = None) -> str:
 
 
 def get_changed_files(since: Optional[str]) -> List[FileChange]:
-    """获取变更文件列表。"""
-    raw_lines: List[str] = []
+    """获取变更文件列表（路径相对仓库根目录）。
+
+    指定 since 时用一次 `git diff --name-status -z -M <since> HEAD`；
+    否则用一次 `git status --porcelain=v2 -z`，同时覆盖暂存区、工作区与未跟踪文件
+    （同一文件以暂存区状态为准）。-z 输出不做引号转义，任意文件名都能正确解析；
+    重命名同时保留新旧路径，端点比对可以跟随移动的文件。
+    """
     if since:
-        out = run_git(["diff", "--name-status", since, "HEAD"])
-        raw_lines.extend(out.splitlines())
-    else:
-        raw_lines.extend(run_git(["diff", "--name-status", "--cached"]).splitlines())
-        raw_lines.extend(run_git(["diff", "--name-status"]).splitlines())
-        # 也包括未跟踪文件（用 ls-files）
-        untracked = run_git(["ls-files", "--others", "--exclude-standard"]).splitlines()
-        for f in untracked:
-            if f.strip():
-                raw_lines.append(f"A\t{f.strip()}")
+        return _parse_name_status_z(run_git(["diff", "--name-status", "-z", "-M", since, "HEAD"]))
+    return _parse_porcelain_v2_z(run_git(["status", "--porcelain=v2", "-z", "--untracked-files=all"]))
+
 
+def _parse_name_status_z(out: str) -> List[FileChange]:
+    """解析 `git diff --name-status -z`：状态与路径以 NUL 分隔，重命名/复制带两个路径"""
+    tokens = out.split("\0")
+    changes: List[FileChange] = []
     seen: Set[str] = set()
+    i = 0
+    while i < len(tokens) and tokens[i]:
+        status = tokens[i][0].upper()
+        if status in ("R", "C"):
+            old_file, file_path = tokens[i + 1], tokens[i + 2]
+            i += 3
+        else:
+            old_file, file_path = "", tokens[i + 1]
+            i += 2
+        if status == "C":
+            # 复制：源文件不变，按新增处理
+            status, old_file = "A", ""
+        if file_path in seen:
+            continue
+        seen.add(file_path)
+        changes.append(FileChange(status=status, file=file_path, old_file=old_file))
+    return changes
+
+
+def _parse_porcelain_v2_z(out: str) -> List[FileChange]:
+    """解析 `git status --porcelain=v2 -z`。
+
+    条目格式：
+        1 XY sub mH mI mW hH hI <path>                 普通变更
+        2 XY sub mH mI mW hH hI <Xscore> <path>\0<orig>  重命名/复制
+        u XY sub m1 m2 m3 mW h1 h2 h3 <path>           未解决冲突
+        ? <path>                                       未跟踪
+    XY 分别为暂存区与工作区状态（"." 表示未变），取暂存区状态优先。
+    """
+    tokens = out.split("\0")
     changes: List[FileChange] = []
-    for line in raw_lines:
-        line = line.rstrip()
-        if not line:
+    i = 0
+    while i < len(tokens):
+        entry = tokens[i]
+        i += 1
+        if not entry:
             continue
-        parts = line.split("\t")
-        if len(parts) < 2:
+        kind = entry[0]
+        if kind == "?":
+            changes.append(FileChange(status="A", file=entry[2:]))
             continue
-        status = parts[0][0].upper()
-        file_path = parts[-1]  # 重命名时取新名
-        if file_path in seen:
+        if kind == "1":
+            fields = entry.split(" ", 8)
+            xy, file_path, old_file = fields[1], fields[8], ""
+        elif kind == "2":
+            fields = entry.split(" ", 9)
+            xy, file_path, old_file = fields[1], fields[9], tokens[i]
+            i += 1
+        elif kind == "u":
+            changes.append(FileChange(status="U", file=entry.split(" ", 10)[10]))
             continue
-        seen.add(file_path)
-        changes.append(FileChange(status=status, file=file_path))
+        else:
+            # "#" 头信息、"!" 忽略文件
+            continue
+        status = xy[0] if xy[0] != "." else xy[1]
+        if status == "C":
+            status, old_file = "A", ""
+        elif status != "R":
+            old_file = ""
+        changes.append(FileChange(status=status, file=file_path, old_file=old_file))
     return changes
 
 
-def get_file_content_at(ref: str, file: str) -> str:
-    """获取某 ref 下文件的内容；失败返回空串"""
+class GitBlobReader:
+    """常驻的 `git cat-file --batch` 进程：所有「某 ref 下某文件」的读取共用一条管道。
+
+    每个文件各起一次 `git show` 时，进程启动开销会占据大部分耗时；这里只启动一次 git，
+    按 `<ref>:<path>` 逐个请求对象，响应头里直接带有 blob SHA（可作缓存键）。
+    不存在的对象返回 None；git 进程无法启动或中途退出时，剩余请求退回逐个 `git show`。
+    """
+
+    def __init__(self, cwd: Optional[str] = None):
+        self.cwd = cwd
+        self._proc: Optional[subprocess.Popen] = None
+        self._broken = False
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "GitBlobReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def read(self, ref: str, file: str) -> Optional[Tuple[str, bytes]]:
+        """读取单个文件，返回 (blob SHA, 原始字节)；不存在返回 None"""
+        return self.read_many([(ref, file)])[0]
+
+    def read_many(self, requests: Iterable[Tuple[str, str]]) -> List[Optional[Tuple[str, bytes]]]:
+        """批量读取 [(ref, file)]，结果与请求一一对应"""
+        return list(self.iter_many(requests))
+
+    def iter_many(self, requests: Iterable[Tuple[str, str]]) -> Iterator[Optional[Tuple[str, bytes]]]:
+        """生成器：按请求顺序逐个产出读取结果，调用方可边读边处理。
+
+        请求由后台线程持续写入、当前线程同时读取响应，管道缓冲区写满也不会互相阻塞。
+        迭代期间独占 git 进程；未读完就放弃时关闭进程（管道中残留的响应无法复用），下次使用时重启。
+        """
+        return self.iter_objects([f"{ref}:{file}" for ref, file in requests])
+
+    def iter_objects(self, names: List[str]) -> Iterator[Optional[Tuple[str, bytes]]]:
+        """同 iter_many，但直接接受 git 对象名（blob SHA 或 `<ref>:<path>`）"""
+        with self._lock:
+            proc = self._start() if names else None
+            # 含换行的路径无法通过 --batch 的按行协议传递，改用 git show
+            sendable = [proc is not None and "\n" not in name for name in names]
+            writer: Optional[threading.Thread] = None
+            if any(sendable):
+                writer = threading.Thread(
+                    target=self._write_requests,
+                    args=(proc, [name for name, send in zip(names, sendable) if send]),
+                    daemon=True,
+                )
+                writer.start()
+            alive = True
+            finished = False
+            try:
+                for name, send in zip(names, sendable):
+                    if send and alive:
+                        ok, result = self._read_response(proc)
+                        if ok:
+                            yield result
+                            continue
+                        alive = False
+                    yield self._show(name)
+                finished = True
+            finally:
+                if writer is not None:
+                    if not finished:
+                        self.close()
+                    writer.join()
+
+    def close(self) -> None:
+        """关闭 git 进程（可重复调用）"""
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+        proc.stdout.close()
+        proc.wait()
+
+    def _start(self) -> Optional[subprocess.Popen]:
+        if self._proc is None and not self._broken:
+            try:
+                self._proc = subprocess.Popen(
+                    ["git", "cat-file", "--batch"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    cwd=self.cwd,
+                )
+            except OSError:
+                self._broken = True
+        return self._proc
+
+    @staticmethod
+    def _write_requests(proc: subprocess.Popen, names: List[str]) -> None:
+        try:
+            for name in names:
+                proc.stdin.write(os.fsencode(name) + b"\n")
+            proc.stdin.flush()
+        except (OSError, ValueError):
+            # git 已退出或读取端已关闭管道；读取端会发现 EOF 并回退
+            pass
+
+    def _read_response(self, proc: subprocess.Popen) -> Tuple[bool, Optional[Tuple[str, bytes]]]:
+        """读取一个响应，返回 (协议是否正常, 结果)；进程异常退出时标记为不可用"""
+        header = proc.stdout.readline()
+        if not header.endswith(b"\n"):
+            self._broken = True
+            self.close()
+            return False, None
+        # 不存在/有歧义时响应为「<请求原文> missing|ambiguous」
+        if header.endswith((b" missing\n", b" ambiguous\n")):
+            return True, None
+        sha, kind, size = header.split()
+        data = proc.stdout.read(int(size))
+        proc.stdout.read(1)  # 内容后的换行
+        if kind != b"blob":
+            return True, None
+        return True, (sha.decode("ascii"), data)
+
+    def _show(self, name: str) -> Optional[Tuple[str, bytes]]:
+        """回退路径：单独起一个 git show"""
+        try:
+            result = subprocess.run(
+                ["git", "show", name],
+                capture_output=True,
+                check=True,
+                cwd=self.cwd,
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return blob_sha(result.stdout), result.stdout
+
+
+# 模块级共享的读取器：首次使用时启动 git，进程退出时关闭
+_BLOB_READER: Optional[GitBlobReader] = None
+
+
+def blob_reader() -> GitBlobReader:
+    """返回模块共享的 GitBlobReader"""
+    global _BLOB_READER
+    if _BLOB_READER is None:
+        _BLOB_READER = GitBlobReader()
+        atexit.register(_BLOB_READER.close)
+    return _BLOB_READER
+
+
+def get_file_bytes_at(ref: str, file: str) -> bytes:
+    """获取某 ref 下文件的原始字节；失败返回空字节串"""
+    blob = blob_reader().read(ref, file)
+    return blob[1] if blob is not None else b""
+
+
+def get_current_bytes(file: str) -> bytes:
+    """读取工作区当前文件的原始字节（不存在返回空字节串）"""
     try:
-        result = subprocess.run(
-            ["git", "show", f"{ref}:{file}"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        return result.stdout
-    except subprocess.CalledProcessError:
-        return ""
+        return Path(file).read_bytes()
+    except OSError:
+        return b""
+
+
+def get_file_content_at(ref: str, file: str) -> str:
+    """获取某 ref 下文件的内容；失败或不是 UTF-8 文本时返回空串"""
+    return decode_source(get_file_bytes_at(ref, file)) or ""
 
 
 def get_current_content(file: str) -> str:
     """读取工作区当前文件内容（不存在返回空串）"""
-    try:
-        return Path(file).read_text(encoding="utf-8")
-    except (OSError, UnicodeDecodeError):
-        return ""
+    return decode_source(get_current_bytes(file)) or ""
 
 
 def get_commit_messages(since: Optional[str]) -> List[str]:
@@ -188,23 +417,34 @@ def get_commit_messages(since: Optional[str]) -> List[str]:
 
 def is_skipped(file_path: str) -> bool:
     """是否为应跳过的文件（文档/测试等）"""
-    return file_matches(file_path, SKIP_GLOBS)
+    return SKIP_INDEX.matches(file_path)
 
 
 def is_feature_code(file_path: str) -> bool:
     """是否为功能性代码（用于触发 PRD 建议）"""
     if is_skipped(file_path):
         return False
-    return file_matches(file_path, FEATURE_GLOBS)
+    return FEATURE_INDEX.matches(file_path)
 
 
 # ==================== API 变更比对 ====================
 
-def collect_endpoints(file: str, content: str) -> List[Endpoint]:
-    """对单个文件提取所有端点"""
-    if not content:
+def collect_endpoints(
+    file: str,
+    content: str,
+    limits: ScanLimits = DEFAULT_SCAN_LIMITS,
+    skipped: Optional[List[SkippedFile]] = None,
+    cache: Optional[ScanCache] = None,
+    sha: Optional[str] = None,
+) -> List[Endpoint]:
+    """对单个文件提取所有端点；不满足输入防护规则的文件返回 []，原因记入 skipped。
+
+    传入 cache 时按内容的 blob SHA（sha）与该路径的模式签名复用 generate_api_doc.py 等此前的解析结果。
+    """
+    # 没有适用框架模式的文件（如 package-lock.json）不做防护检查，避免误报「跳过」
+    if not content or not patterns_for_file(file):
         return []
-    return extract_endpoints_from_content(content, file)
+    return [doc.endpoint for doc in scan_content(content, file, limits, skipped, cache, sha)]
 
 
 def diff_endpoints(
@@ -227,54 +467,202 @@ def diff_endpoints(
     return ApiChangeReport(added=added, removed=removed, modified=modified)
 
 
+# 读取队列容量：限制同时驻留内存、等待提取的文件份数
+PIPELINE_QUEUE_SIZE = 64
+# 队列结束标记
+_DONE = object()
+
+# 一侧（变更前/后）的提取结果：(缓存行, 跳过的文件)，或仍在进程池中计算的 Future
+_SideResult = Union[Tuple[List[list], List[SkippedFile]], Future]
+
+
+def _iter_endpoint_pairs(
+    candidates: List[FileChange],
+    base_ref: str,
+    limits: ScanLimits,
+    cache: Optional[ScanCache],
+    jobs: int,
+) -> Iterator[Tuple[FileChange, List[Endpoint], List[Endpoint], List[SkippedFile]]]:
+    """流水线：按 candidates 顺序产出 (变更, 之前的端点, 之后的端点, 跳过的文件)。
+
+    - 读取线程：经 cat-file 流式读出「之前」的版本（重命名取旧路径）、读取工作区「之后」的版本，
+      放入有界队列；队列满时暂停读取，内存占用与变更规模无关
+    - 当前线程：从队列取出文件，缓存命中直接取结果，未命中的提交给进程池（或就地提取）；
+      git / 磁盘读取因此与提取重叠进行
+    - 结果按输入顺序收尾（写回缓存、还原端点），与串行执行逐条一致
+    """
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    executor: Optional[ProcessPoolExecutor] = None
+    if jobs > 1 and len(candidates) >= PARALLEL_MIN_FILES:
+        try:
+            executor = ProcessPoolExecutor(max_workers=jobs)
+            # 先让进程池创建出全部 worker，再启动读取线程与 cat-file 进程：fork 出的 worker
+            # 不会继承读取线程持有的锁，也不会持有 cat-file 管道的写端（否则 git 等不到 EOF 无法退出）
+            executor.submit(int).result()
+        except (NotImplementedError, OSError) as e:
+            print(f"[警告] 无法启动进程池（{e}），改为串行提取", file=sys.stderr)
+            executor = None
+    # 已提交、尚未收尾的文件数上限：保持进程池忙碌，同时限制在途内容
+    window = jobs * 4 if executor is not None else 0
+
+    feed: "queue.Queue[object]" = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    stop = threading.Event()
+
+    def put(item: object) -> bool:
+        # 消费端提前退出时放弃，避免读取线程永久阻塞
+        while not stop.is_set():
+            try:
+                feed.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        befores = blob_reader().iter_many([
+            (base_ref, change.old_file or change.file)
+            for change in candidates if change.status != "A"
+        ])
+        try:
+            for change in candidates:
+                before = next(befores) if change.status != "A" else None
+                after: Optional[Tuple[Optional[str], bytes]] = None
+                if change.status != "D":
+                    data = get_current_bytes(change.file)
+                    after = (blob_sha(data) if cache is not None and data else None, data)
+                if not put((change, before, after)):
+                    return
+            # 走完生成器，让读取器正常结束本批请求（git 进程留给后续读取复用）
+            for _ in befores:
+                pass
+        except BaseException as exc:
+            # 读取失败转交给消费端抛出
+            put(exc)
+        finally:
+            befores.close()
+            put(_DONE)
+
+    def dispatch(file: str, blob: Optional[Tuple[Optional[str], bytes]]) -> Tuple[_SideResult, Optional[str]]:
+        # 按该版本所在的路径提取（重命名前后适用的模式可能不同），返回 (结果或 Future, 待写回的缓存键)
+        if blob is None or not blob[1] or not patterns_for_file(file):
+            return ([], []), None
+        sha, data = blob
+        key = None
+        if cache is not None:
+            key = scan_cache_key(sha or blob_sha(data), file, limits)
+            rows = cache.get(key) if key is not None else None
+            if rows is not None:
+                return (rows, []), None
+        text = decode_source(data) or ""
+        if executor is not None:
+            return executor.submit(_extract_rows, file, text, limits, cache is not None), key
+        return _extract_rows(file, text, limits, cache is not None), key
+
+    def finish(
+        change: FileChange,
+        sides: List[Tuple[_SideResult, Optional[str]]],
+    ) -> Tuple[FileChange, List[Endpoint], List[Endpoint], List[SkippedFile]]:
+        endpoints: List[List[Endpoint]] = []
+        skipped: List[SkippedFile] = []
+        for (value, key), file in zip(sides, (change.old_file or change.file, change.file)):
+            rows, side_skipped = value.result() if isinstance(value, Future) else value
+            if cache is not None and key is not None and not side_skipped:
+                cache.put(key, rows)
+            skipped.extend(side_skipped)
+            endpoints.append([row_to_doc(row, file).endpoint for row in rows])
+        return change, endpoints[0], endpoints[1], skipped
+
+    reader = threading.Thread(target=produce, daemon=True)
+    reader.start()
+    pending: Deque[Tuple[FileChange, List[Tuple[_SideResult, Optional[str]]]]] = deque()
+    try:
+        while True:
+            item = feed.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            change, before, after = item
+            pending.append((change, [dispatch(change.old_file or change.file, before), dispatch(change.file, after)]))
+            while len(pending) > window:
+                yield finish(*pending.popleft())
+        while pending:
+            yield finish(*pending.popleft())
+    finally:
+        stop.set()
+        if executor is not None:
+            executor.shutdown()
+        reader.join()
+
+
+def _extract_rows(
+    file: str,
+    text: str,
+    limits: ScanLimits,
+    with_docs: bool = True,
+) -> Tuple[List[list], List[SkippedFile]]:
+    """提取单个版本的端点，返回缓存行与跳过原因（可在进程池 worker 中执行）。
+
+    with_docs 为 False 时（不写缓存）只识别端点、不提取 docstring，比对只需要端点本身。
+    """
+    skipped: List[SkippedFile] = []
+    if not text:
+        return [], skipped
+    if with_docs:
+        docs = scan_content(text, file, limits, skipped)
+    else:
+        docs = [EndpointDoc(endpoint=ep) for ep in guarded_scan(
+            text, file, lambda: extract_endpoints_from_content(text, file), limits, skipped,
+        )]
+    return [doc_to_row(doc) for doc in docs], skipped
+
+
 def analyze_api_changes(
     changed_files: List[FileChange],
     since: Optional[str],
+    limits: ScanLimits = DEFAULT_SCAN_LIMITS,
+    cache: Optional[ScanCache] = None,
+    jobs: int = 1,
 ) -> ApiChangeReport:
-    """跨所有变更文件汇总 API 变更"""
+    """跨所有变更文件汇总 API 变更；传入 cache 时同一内容（blob）只解析一次。
+
+    jobs > 1 时端点提取在进程池中并行（0 表示使用全部 CPU），结果与串行运行完全一致。
+    """
     overall = ApiChangeReport()
     base_ref = since or "HEAD"
 
-    for change in changed_files:
-        if is_skipped(change.file):
+    # 只有存在适用框架模式的文件才需要读取内容（重命名时前后任一路径有即可）
+    candidates = [
+        change for change in changed_files
+        if not is_skipped(change.file)
+        and (patterns_for_file(change.file) or (change.old_file and patterns_for_file(change.old_file)))
+    ]
+    for change, before_eps, after_eps, skipped in _iter_endpoint_pairs(
+        candidates, base_ref, limits, cache, jobs,
+    ):
+        if skipped:
+            # 任一版本被跳过时比对结果不可信，整个文件不参与比对（同一文件只报告一次）
+            overall.skipped.append(skipped[-1])
             continue
-
-        # 获取「之前」与「之后」内容
-        if change.status == "A":
-            before_content = ""
-            after_content = get_current_content(change.file)
-        elif change.status == "D":
-            before_content = get_file_content_at(base_ref, change.file)
-            after_content = ""
-        else:
-            before_content = get_file_content_at(base_ref, change.file)
-            after_content = get_current_content(change.file)
-
-        before_eps = collect_endpoints(change.file, before_content)
-        after_eps = collect_endpoints(change.file, after_content)
         report = diff_endpoints(before_eps, after_eps)
 
         overall.added.extend(report.added)
         overall.removed.extend(report.removed)
         overall.modified.extend(report.modified)
 
-    # 单独扫描 OpenAPI 文件
+    # 单独扫描 OpenAPI 文件；YAML 解析结果与 generate_api_doc.py 共用缓存目录
+    spec_cache_dir = cache.path.parent if cache is not None else None
     for change in changed_files:
         path = Path(change.file)
         if path.name in {"openapi.yaml", "openapi.yml", "openapi.json", "swagger.yaml", "swagger.json"}:
-            current = parse_openapi_file(change.file) if change.status != "D" else []
+            current = parse_openapi_file(change.file, spec_cache_dir) if change.status != "D" else []
             previous = []
             if change.status != "A":
-                # 把 git show 的内容写入临时文件再解析
-                prev_text = get_file_content_at(base_ref, change.file)
+                # 历史版本直接在内存中解析，不落盘
+                prev_text = get_file_content_at(base_ref, change.old_file or change.file)
                 if prev_text:
-                    tmp = Path(".dev-docs-tmp-openapi" + path.suffix)
-                    try:
-                        tmp.write_text(prev_text, encoding="utf-8")
-                        previous = parse_openapi_file(str(tmp))
-                    finally:
-                        if tmp.exists():
-                            tmp.unlink()
+                    previous = parse_openapi_text(prev_text, path.suffix, change.file, spec_cache_dir)
             report = diff_endpoints(previous, current)
             overall.added.extend(report.added)
             overall.removed.extend(report.removed)
@@ -338,7 +726,7 @@ def _categorize_files(changes: List[FileChange]) -> Dict[str, List[str]]:
     """把文件按 git 状态分组"""
     buckets: Dict[str, List[str]] = {"Added": [], "Modified": [], "Deleted": [], "Renamed": []}
     for c in changes:
-        buckets.setdefault(c.status_name, []).append(c.file)
+        buckets.setdefault(c.status_name, []).append(f"{c.old_file} → {c.file}" if c.old_file else c.file)
     return buckets
 
 
@@ -409,7 +797,16 @@ def main() -> None:
     parser.add_argument("--since", help="起始 ref（commit/tag/分支），不填则比较工作区与暂存区")
     parser.add_argument("--output", help="将报告写入文件")
     parser.add_argument("--json", action="store_true", help="以 JSON 格式输出")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="不读写端点缓存（与 generate_api_doc.py 共享）")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help=f"端点缓存目录（默认 {CACHE_DIR}）")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="端点提取的并行进程数（0 表示全部 CPU，默认 1 即串行）")
+    add_scan_limit_arguments(parser)
     args = parser.parse_args()
+    if args.jobs < 0:
+        parser.error("--jobs 不能为负数")
 
     print("正在分析 Git 变更...", file=sys.stderr)
     changes = get_changed_files(args.since)
@@ -417,7 +814,11 @@ def main() -> None:
         print("没有检测到任何变更")
         return
 
-    api_report = analyze_api_changes(changes, args.since)
+    limits = scan_limits_from_args(args)
+    cache = None if args.no_cache else ScanCache.open(args.cache_dir, cache_version(limits))
+    api_report = analyze_api_changes(changes, args.since, limits, cache, args.jobs)
+    if cache is not None:
+        cache.save()
     commits = get_commit_messages(args.since)
     commit_buckets = classify_commits(commits) if commits else {}
 
@@ -431,13 +832,17 @@ def main() -> None:
     if args.json:
         result = {
             "changed_files": [
-                {"status": c.status_name, "file": c.file} for c in changes
+                {"status": c.status_name, "file": c.file, **({"old_file": c.old_file} if c.old_file else {})}
+                for c in changes
             ],
             "api_changes": {
-                "added": [_endpoint_to_dict(e) for e in api_report.added],
-                "modified": [_endpoint_to_dict(e) for e in api_report.modified],
-                "removed": [_endpoint_to_dict(e) for e in api_report.removed],
+                "added": [endpoint_to_dict(e) for e in api_report.added],
+                "modified": [endpoint_to_dict(e) for e in api_report.modified],
+                "removed": [endpoint_to_dict(e) for e in api_report.removed],
             },
+            "skipped_files": [
+                {"file": s.file, "reason": s.reason} for s in api_report.skipped
+            ],
             "commit_classification": commit_buckets,
             "documents_to_update": suggestions,
             "changelog_section": render_changelog_section(commit_buckets),
@@ -459,7 +864,8 @@ def main() -> None:
         print(output)
 
 
-def _endpoint_to_dict(e: Endpoint) -> Dict:
+def endpoint_to_dict(e: Endpoint) -> Dict:
+    """端点的 JSON 表示（--json 报告与 api_snapshots 的 diff 共用）"""
     return {
         "method": e.method,
         "path": e.path,
@@ -504,6 +910,10 @@ def _render_text_report(
             lines.append("\n### 移除 (Removed)")
             for e in api_report.removed:
                 lines.append(f"  - [{e.framework}] {e.signature()} → {e.function or '?'}  ({e.file})")
+    if api_report.skipped:
+        lines.append(f"\n### 跳过的文件 ({len(api_report.skipped)})")
+        for s in api_report.skipped:
+            lines.append(f"  ! {s.file}：{s.reason}")
 
     lines.append("\n## 3. 建议更新的文档")
     if not suggestions:
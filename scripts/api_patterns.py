@@ -16,14 +16,47 @@ Java（Spring）、Go（Gin/Echo/net-http），并支持 OpenAPI 规范解析。
 
 from __future__ import annotations
 
+import bisect
+import fnmatch
+import os
 import re
-from dataclasses import dataclass, field
-from pathlib import Path
-from typing import Callable, Iterable, List, Optional, Pattern, Tuple
+import sys
+from dataclasses import dataclass, field, fields
+from pathlib import Path, PurePath
+from typing import (
+    TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Pattern, Sequence, Tuple, TypeVar, Union,
+)
+
+if TYPE_CHECKING:
+    import argparse
+
+_T = TypeVar("_T")
 
 
 # ==================== 数据结构 ====================
 
+def slotted(cls: type) -> type:
+    """为 dataclass 生成带 __slots__ 的同名类，去掉每个实例的 __dict__。
+
+    等价于 Python 3.10+ 的 ``@dataclass(slots=True)``，但兼容 3.8/3.9。
+    用法：``@slotted`` 写在 ``@dataclass`` 之上。字段默认值保存在生成的 __init__ 中，
+    因此去掉同名类属性不影响默认值。
+    """
+    names = tuple(f.name for f in fields(cls))
+    body = {
+        key: value
+        for key, value in cls.__dict__.items()
+        if key not in names and key not in ("__dict__", "__weakref__")
+    }
+    body["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, body)
+
+
+# 取值集合很小、在大型目录中反复出现的字段，构造时驻留（sys.intern）以共享同一对象
+_INTERNED_FIELDS = ("method", "framework", "file")
+
+
+@slotted
 @dataclass
 class Endpoint:
     """统一的接口表示。
@@ -36,6 +69,9 @@ class Endpoint:
         file: 来源文件路径（相对项目根）
         line: 起始行号（1-indexed）
         description: 从 docstring/注释提取的接口描述（可选）
+
+    使用 __slots__ 且 method/framework/file 在构造时驻留：
+    聚合数百个服务、十万级端点的目录时，每个实例只占固定大小，重复的字符串只存一份。
     """
 
     method: str
@@ -46,6 +82,12 @@ class Endpoint:
     line: int = 0
     description: str = ""
 
+    def __post_init__(self) -> None:
+        for name in _INTERNED_FIELDS:
+            value = getattr(self, name)
+            if type(value) is str:
+                setattr(self, name, sys.intern(value))
+
     def signature(self) -> str:
         """生成可读签名，例：'POST /api/users'"""
         return f"{self.method.upper()} {self.path}"
@@ -64,7 +106,11 @@ class FrameworkPattern:
         path_group: 路径的捕获组索引（None = 由 path_resolver 处理）
         method_resolver: 自定义方法解析回调（用于装饰器名即方法的场景，如 @Get）
         path_resolver: 自定义路径解析回调
-        function_finder: 在装饰器之后查找处理函数名的策略
+        function_finder: 在装饰器之后查找处理函数名的策略，签名 (SourceFile, 行号 0-indexed) -> str
+        class_prefix_regex: 类级路径前缀正则（Spring/NestJS）
+        required_literals: 预过滤用字面量；任一匹配都必然包含其中至少一个子串。
+            文件中一个都不含时直接跳过正则；留空表示不做预过滤
+        priority: 同一文件适用多个模式时的匹配顺序，数值小者优先（去重时保留先匹配到的）
     """
 
     name: str
@@ -77,6 +123,52 @@ class FrameworkPattern:
     path_resolver: Optional[Callable] = None
     function_finder: Optional[Callable] = None
     class_prefix_regex: Optional[Pattern[str]] = None  # Spring/NestJS 类级路径前缀
+    required_literals: Tuple[str, ...] = ()
+    priority: int = 100
+
+
+class SourceFile:
+    """单个源文件的共享解析结果，供端点识别、函数名查找、注释提取共用。
+
+    文本只在第一次访问 lines / line_starts 时切分一次；
+    不含任何路由的文件在字面量预过滤阶段就被跳过，永远不会切分。
+
+    Attributes:
+        text: 文件全文
+        path: 文件路径（相对项目根，可为空）
+    """
+
+    __slots__ = ("text", "path", "_lines", "_line_starts")
+
+    def __init__(self, text: str, path: str = ""):
+        self.text = text
+        self.path = path
+        self._lines: Optional[List[str]] = None
+        self._line_starts: Optional[List[int]] = None
+
+    @property
+    def lines(self) -> List[str]:
+        """按换行切分的行列表（惰性构建）"""
+        if self._lines is None:
+            self._lines = self.text.split("\n")
+        return self._lines
+
+    @property
+    def line_starts(self) -> List[int]:
+        """每行起始字符偏移（惰性构建）"""
+        if self._line_starts is None:
+            starts = [0]
+            offset = 0
+            for line in self.lines:
+                offset += len(line) + 1
+                starts.append(offset)
+            starts.pop()
+            self._line_starts = starts
+        return self._line_starts
+
+    def line_of(self, offset: int) -> int:
+        """字符偏移 → 行号（0-indexed）"""
+        return bisect.bisect_right(self.line_starts, offset) - 1
 
 
 # ==================== 通用辅助 ====================
@@ -88,8 +180,9 @@ HTTP_METHODS = {
 }
 
 
-def _next_function_python(lines: List[str], start: int, max_look: int = 8) -> str:
+def _next_function_python(source: SourceFile, start: int, max_look: int = 8) -> str:
     """Python: 在装饰器之后向下查找 def / async def"""
+    lines = source.lines
     pat = re.compile(r"^\s*(?:async\s+)?def\s+(\w+)\s*\(")
     for i in range(start + 1, min(start + 1 + max_look, len(lines))):
         m = pat.match(lines[i])
@@ -98,8 +191,9 @@ def _next_function_python(lines: List[str], start: int, max_look: int = 8) -> st
     return ""
 
 
-def _next_function_typescript(lines: List[str], start: int, max_look: int = 8) -> str:
+def _next_function_typescript(source: SourceFile, start: int, max_look: int = 8) -> str:
     """TS/JS: 装饰器后向下查找方法或函数名"""
+    lines = source.lines
     patterns = [
         re.compile(r"^\s*(?:async\s+)?(\w+)\s*\([^)]*\)\s*[:{]"),  # 类方法
         re.compile(r"^\s*(?:export\s+)?(?:async\s+)?function\s+(\w+)\s*\("),  # 函数
@@ -113,8 +207,9 @@ def _next_function_typescript(lines: List[str], start: int, max_look: int = 8) -
     return ""
 
 
-def _next_function_java(lines: List[str], start: int, max_look: int = 12) -> str:
+def _next_function_java(source: SourceFile, start: int, max_look: int = 12) -> str:
     """Java: 装饰器后查找方法签名"""
+    lines = source.lines
     pat = re.compile(r"^\s*(?:public|private|protected)?\s*(?:static\s+)?[\w<>\[\],\s]+\s+(\w+)\s*\(")
     for i in range(start + 1, min(start + 1 + max_look, len(lines))):
         m = pat.match(lines[i])
@@ -123,44 +218,20 @@ def _next_function_java(lines: List[str], start: int, max_look: int = 12) -> str
     return ""
 
 
-def _next_function_go(lines: List[str], start: int, max_look: int = 5) -> str:
+def _next_function_go(source: SourceFile, start: int, max_look: int = 5) -> str:
     """Go: r.GET("/path", handler) 中提取 handler 名（同行处理）"""
     return ""
 
 
 # ==================== 各语言 / 框架模式 ====================
+#
+# 每种语言的模式在各自的加载函数里构建（含正则编译），由 PATTERN_REGISTRY 在第一次
+# 遇到该语言的文件时调用，导入本模块时不编译任何框架正则。
+# 加载之后同名模块级常量（如 FASTAPI_PATTERN）可直接使用；加载前访问也会触发加载。
+# priority 决定同一文件内各模式的匹配顺序：特定的优先于通用的（NestJS 装饰器最具特征性）。
 
 # ---------- Python ----------
 
-# FastAPI: @app.get("/users")  /  @router.post("/users")
-FASTAPI_PATTERN = FrameworkPattern(
-    name="FastAPI",
-    language="python",
-    file_globs=("**/*.py",),
-    decorator_regex=re.compile(
-        r"@(?:app|router|api_router)\.(get|post|put|delete|patch|options|head)\s*\(\s*['\"]([^'\"]+)['\"]"
-    ),
-    method_group=1,
-    path_group=2,
-    function_finder=_next_function_python,
-)
-
-# Flask: @app.route("/users", methods=["GET", "POST"])  /  @bp.route(...)
-# 注意 methods 参数可选，默认 GET
-FLASK_PATTERN = FrameworkPattern(
-    name="Flask",
-    language="python",
-    file_globs=("**/*.py",),
-    decorator_regex=re.compile(
-        r"@(?:\w+)\.route\s*\(\s*['\"]([^'\"]+)['\"](?:\s*,\s*methods\s*=\s*\[([^\]]+)\])?"
-    ),
-    method_group=None,
-    path_group=1,
-    method_resolver=lambda m: _flask_methods(m.group(2)),
-    function_finder=_next_function_python,
-)
-
-
 def _flask_methods(methods_str: Optional[str]) -> str:
     """Flask methods=["GET","POST"] → 'GET,POST'，缺省时返回 GET"""
     if not methods_str:
@@ -169,144 +240,664 @@ def _flask_methods(methods_str: Optional[str]) -> str:
     return ",".join(m.upper() for m in methods) if methods else "GET"
 
 
-# Django URL: path("users/", views.list_users, name="users")
-DJANGO_PATTERN = FrameworkPattern(
-    name="Django",
-    language="python",
-    file_globs=("**/urls.py",),
-    decorator_regex=re.compile(
-        r"(?:path|re_path|url)\s*\(\s*r?['\"]([^'\"]*)['\"]\s*,\s*([\w.]+)"
-    ),
-    method_group=None,
-    path_group=1,
-    method_resolver=lambda m: "ANY",
-    path_resolver=None,
-    function_finder=lambda lines, start, _max=0: "",
-)
+def _load_python_patterns() -> Tuple[FrameworkPattern, ...]:
+    """Python：FastAPI / Flask / Django"""
+    global FASTAPI_PATTERN, FLASK_PATTERN, DJANGO_PATTERN
+
+    # FastAPI: @app.get("/users")  /  @router.post("/users")
+    FASTAPI_PATTERN = FrameworkPattern(
+        name="FastAPI",
+        language="python",
+        file_globs=("**/*.py",),
+        decorator_regex=re.compile(
+            r"@(?:app|router|api_router)\.(get|post|put|delete|patch|options|head)\s*\(\s*['\"]([^'\"\n]+)['\"]"
+        ),
+        method_group=1,
+        path_group=2,
+        function_finder=_next_function_python,
+        required_literals=("@app.", "@router.", "@api_router."),
+        priority=30,
+    )
+
+    # Flask: @app.route("/users", methods=["GET", "POST"])  /  @bp.route(...)
+    # 注意 methods 参数可选，默认 GET
+    FLASK_PATTERN = FrameworkPattern(
+        name="Flask",
+        language="python",
+        file_globs=("**/*.py",),
+        decorator_regex=re.compile(
+            r"@(?:\w+)\.route\s*\(\s*['\"]([^'\"\n]+)['\"](?:\s*,\s*methods\s*=\s*\[([^\]]+)\])?"
+        ),
+        method_group=None,
+        path_group=1,
+        method_resolver=lambda m: _flask_methods(m.group(2)),
+        function_finder=_next_function_python,
+        required_literals=(".route",),
+        priority=31,
+    )
+
+    # Django URL: path("users/", views.list_users, name="users")
+    DJANGO_PATTERN = FrameworkPattern(
+        name="Django",
+        language="python",
+        file_globs=("**/urls.py",),
+        decorator_regex=re.compile(
+            r"(?:path|re_path|url)\s*\(\s*r?['\"]([^'\"\n]*)['\"]\s*,\s*([\w.]+)"
+        ),
+        method_group=None,
+        path_group=1,
+        method_resolver=lambda m: "ANY",
+        path_resolver=None,
+        function_finder=lambda source, start, _max=0: "",
+        required_literals=("path", "url"),
+        priority=32,
+    )
+
+    return FASTAPI_PATTERN, FLASK_PATTERN, DJANGO_PATTERN
 
 
 # ---------- Node.js / TypeScript ----------
 
-# Express / Koa: app.get("/users", handler)  /  router.post("/users", ...)
-EXPRESS_PATTERN = FrameworkPattern(
-    name="Express/Koa",
-    language="javascript",
-    file_globs=("**/*.js", "**/*.ts", "**/*.mjs", "**/*.cjs"),
-    decorator_regex=re.compile(
-        r"\b(?:app|router|api|server)\.(get|post|put|delete|patch|options|head|all)\s*\(\s*['\"`]([^'\"`]+)['\"`]"
-    ),
-    method_group=1,
-    path_group=2,
-    function_finder=_next_function_typescript,
-)
-
-# NestJS: @Get('users')  /  @Post()  装饰器
-# 注意：路径可省略（默认 ''），并依赖类级 @Controller('users')
-NEST_PATTERN = FrameworkPattern(
-    name="NestJS",
-    language="typescript",
-    file_globs=("**/*.controller.ts", "**/*.controller.js"),
-    decorator_regex=re.compile(
-        r"@(Get|Post|Put|Delete|Patch|Options|Head|All)\s*\(\s*['\"`]?([^'\"`)]*)['\"`]?\s*\)"
-    ),
-    method_group=1,
-    path_group=2,
-    function_finder=_next_function_typescript,
-    class_prefix_regex=re.compile(
-        r"@Controller\s*\(\s*['\"`]([^'\"`]+)['\"`]"
-    ),
-)
+def _load_javascript_patterns() -> Tuple[FrameworkPattern, ...]:
+    """Node.js：Express / Koa"""
+    global EXPRESS_PATTERN
+
+    # Express / Koa: app.get("/users", handler)  /  router.post("/users", ...)
+    EXPRESS_PATTERN = FrameworkPattern(
+        name="Express/Koa",
+        language="javascript",
+        file_globs=("**/*.js", "**/*.ts", "**/*.mjs", "**/*.cjs"),
+        decorator_regex=re.compile(
+            r"\b(?:app|router|api|server)\.(get|post|put|delete|patch|options|head|all)\s*\(\s*['\"`]([^'\"`\n]+)['\"`]"
+        ),
+        method_group=1,
+        path_group=2,
+        function_finder=_next_function_typescript,
+        required_literals=("app.", "router.", "api.", "server."),
+        priority=40,
+    )
+
+    return (EXPRESS_PATTERN,)
+
+
+def _load_typescript_patterns() -> Tuple[FrameworkPattern, ...]:
+    """TypeScript：NestJS 装饰器（最具特征性，优先级最高）"""
+    global NEST_PATTERN
+
+    # NestJS: @Get('users')  /  @Post()  装饰器
+    # 注意：路径可省略（默认 ''），并依赖类级 @Controller('users')
+    NEST_PATTERN = FrameworkPattern(
+        name="NestJS",
+        language="typescript",
+        file_globs=("**/*.controller.ts", "**/*.controller.js"),
+        decorator_regex=re.compile(
+            r"@(Get|Post|Put|Delete|Patch|Options|Head|All)\s*\(\s*['\"`]?([^'\"`)\n]*)['\"`]?\s*\)"
+        ),
+        method_group=1,
+        path_group=2,
+        function_finder=_next_function_typescript,
+        # 同时支持选项对象写法：@Controller({ path: 'users', version: '1' })（可跨行）
+        class_prefix_regex=re.compile(
+            r"@Controller\s*\(\s*(?:\{[^}]*?\bpath\s*:\s*)?['\"`]([^'\"`\n]+)['\"`]"
+        ),
+        required_literals=("@Get", "@Post", "@Put", "@Delete", "@Patch", "@Options", "@Head", "@All"),
+        priority=10,
+    )
+
+    return (NEST_PATTERN,)
 
 
 # ---------- Java / Spring ----------
 
-# Spring: @GetMapping("/users")  /  @RequestMapping(value="/users", method=RequestMethod.POST)
-SPRING_MAPPING_PATTERN = FrameworkPattern(
-    name="Spring",
-    language="java",
-    file_globs=("**/*.java",),
-    decorator_regex=re.compile(
-        r"@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping)\s*\(\s*(?:value\s*=\s*)?['\"]([^'\"]+)['\"]"
-    ),
-    method_group=1,
-    path_group=2,
-    method_resolver=lambda m: m.group(1).replace("Mapping", "").upper(),
-    function_finder=_next_function_java,
-    class_prefix_regex=re.compile(
-        r"@RequestMapping\s*\(\s*(?:value\s*=\s*)?['\"]([^'\"]+)['\"]"
-    ),
-)
-
-# Spring 通用 @RequestMapping(method = RequestMethod.GET, value = "/users")
-SPRING_REQUEST_MAPPING_PATTERN = FrameworkPattern(
-    name="Spring",
-    language="java",
-    file_globs=("**/*.java",),
-    decorator_regex=re.compile(
-        r"@RequestMapping\s*\([^)]*method\s*=\s*RequestMethod\.(\w+)[^)]*value\s*=\s*['\"]([^'\"]+)['\"]"
-    ),
-    method_group=1,
-    path_group=2,
-    function_finder=_next_function_java,
-)
+def _load_java_patterns() -> Tuple[FrameworkPattern, ...]:
+    """Java：Spring"""
+    global SPRING_MAPPING_PATTERN, SPRING_REQUEST_MAPPING_PATTERN
+
+    # Spring: @GetMapping("/users")  /  @RequestMapping(value="/users", method=RequestMethod.POST)
+    SPRING_MAPPING_PATTERN = FrameworkPattern(
+        name="Spring",
+        language="java",
+        file_globs=("**/*.java",),
+        decorator_regex=re.compile(
+            r"@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping)\s*\(\s*(?:value\s*=\s*)?['\"]([^'\"\n]+)['\"]"
+        ),
+        method_group=1,
+        path_group=2,
+        method_resolver=lambda m: m.group(1).replace("Mapping", "").upper(),
+        function_finder=_next_function_java,
+        class_prefix_regex=re.compile(
+            r"@RequestMapping\s*\(\s*(?:value\s*=\s*)?['\"]([^'\"]+)['\"]"
+        ),
+        required_literals=(
+            "@GetMapping", "@PostMapping", "@PutMapping", "@DeleteMapping", "@PatchMapping",
+        ),
+        priority=20,
+    )
+
+    # Spring 通用 @RequestMapping(method = RequestMethod.GET, value = "/users")
+    SPRING_REQUEST_MAPPING_PATTERN = FrameworkPattern(
+        name="Spring",
+        language="java",
+        file_globs=("**/*.java",),
+        decorator_regex=re.compile(
+            r"@RequestMapping\s*\([^)]*method\s*=\s*RequestMethod\.(\w+)[^)]*value\s*=\s*['\"]([^'\"\n]+)['\"]"
+        ),
+        method_group=1,
+        path_group=2,
+        function_finder=_next_function_java,
+        required_literals=("@RequestMapping",),
+        priority=21,
+    )
+
+    return SPRING_MAPPING_PATTERN, SPRING_REQUEST_MAPPING_PATTERN
 
 
 # ---------- Go ----------
 
-# Gin: r.GET("/users", handler)  /  group.POST(...)
-GIN_PATTERN = FrameworkPattern(
-    name="Gin",
-    language="go",
-    file_globs=("**/*.go",),
-    decorator_regex=re.compile(
-        r"\b\w+\.(GET|POST|PUT|DELETE|PATCH|OPTIONS|HEAD|Any)\s*\(\s*\"([^\"]+)\"\s*,\s*([\w.]+)"
-    ),
-    method_group=1,
-    path_group=2,
-    function_finder=lambda lines, start, _max=0: "",
+def _load_go_patterns() -> Tuple[FrameworkPattern, ...]:
+    """Go：Gin / Echo / net/http"""
+    global GIN_PATTERN, ECHO_PATTERN, NETHTTP_PATTERN
+
+    # Gin: r.GET("/users", handler)  /  group.POST(...)
+    GIN_PATTERN = FrameworkPattern(
+        name="Gin",
+        language="go",
+        file_globs=("**/*.go",),
+        decorator_regex=re.compile(
+            r"\b\w+\.(GET|POST|PUT|DELETE|PATCH|OPTIONS|HEAD|Any)\s*\(\s*\"([^\"\n]+)\"\s*,\s*([\w.]+)"
+        ),
+        method_group=1,
+        path_group=2,
+        function_finder=lambda source, start, _max=0: "",
+        required_literals=(".GET", ".POST", ".PUT", ".DELETE", ".PATCH", ".OPTIONS", ".HEAD", ".Any"),
+        priority=50,
+    )
+
+    # Echo: e.GET("/users", handler)
+    ECHO_PATTERN = FrameworkPattern(
+        name="Echo",
+        language="go",
+        file_globs=("**/*.go",),
+        decorator_regex=re.compile(
+            r"\b(?:e|echo|app|router|group)\.(GET|POST|PUT|DELETE|PATCH|OPTIONS|HEAD)\s*\(\s*\"([^\"\n]+)\""
+        ),
+        method_group=1,
+        path_group=2,
+        function_finder=lambda source, start, _max=0: "",
+        required_literals=(".GET", ".POST", ".PUT", ".DELETE", ".PATCH", ".OPTIONS", ".HEAD"),
+        priority=51,
+    )
+
+    # net/http: http.HandleFunc("/users", handler)  /  mux.Handle("/users", ...)
+    NETHTTP_PATTERN = FrameworkPattern(
+        name="net/http",
+        language="go",
+        file_globs=("**/*.go",),
+        decorator_regex=re.compile(
+            r"(?:http|mux|router)\.(?:HandleFunc|Handle)\s*\(\s*\"([^\"\n]+)\"\s*,\s*([\w.]+)"
+        ),
+        method_group=None,
+        path_group=1,
+        method_resolver=lambda m: "ANY",
+        function_finder=lambda source, start, _max=0: "",
+        required_literals=(".Handle",),
+        priority=52,
+    )
+
+    return GIN_PATTERN, ECHO_PATTERN, NETHTTP_PATTERN
+
+
+# 内置语言：(语言, 覆盖该语言全部模式的文件 glob, 加载函数)
+_BUILTIN_LANGUAGES: Tuple[Tuple[str, Tuple[str, ...], Callable[[], Iterable[FrameworkPattern]]], ...] = (
+    ("typescript", ("**/*.controller.ts", "**/*.controller.js"), _load_typescript_patterns),
+    ("java", ("**/*.java",), _load_java_patterns),
+    ("python", ("**/*.py",), _load_python_patterns),
+    ("javascript", ("**/*.js", "**/*.ts", "**/*.mjs", "**/*.cjs"), _load_javascript_patterns),
+    ("go", ("**/*.go",), _load_go_patterns),
 )
 
-# Echo: e.GET("/users", handler)
-ECHO_PATTERN = FrameworkPattern(
-    name="Echo",
-    language="go",
-    file_globs=("**/*.go",),
-    decorator_regex=re.compile(
-        r"\b(?:e|echo|app|router|group)\.(GET|POST|PUT|DELETE|PATCH|OPTIONS|HEAD)\s*\(\s*\"([^\"]+)\""
-    ),
-    method_group=1,
-    path_group=2,
-    function_finder=lambda lines, start, _max=0: "",
-)
+# 惰性导出的内置模式常量 → 所属语言（见文件末尾的 __getattr__）
+_LAZY_PATTERN_NAMES: Dict[str, str] = {
+    "FASTAPI_PATTERN": "python",
+    "FLASK_PATTERN": "python",
+    "DJANGO_PATTERN": "python",
+    "EXPRESS_PATTERN": "javascript",
+    "NEST_PATTERN": "typescript",
+    "SPRING_MAPPING_PATTERN": "java",
+    "SPRING_REQUEST_MAPPING_PATTERN": "java",
+    "GIN_PATTERN": "go",
+    "ECHO_PATTERN": "go",
+    "NETHTTP_PATTERN": "go",
+}
 
-# net/http: http.HandleFunc("/users", handler)  /  mux.Handle("/users", ...)
-NETHTTP_PATTERN = FrameworkPattern(
-    name="net/http",
-    language="go",
-    file_globs=("**/*.go",),
-    decorator_regex=re.compile(
-        r"(?:http|mux|router)\.(?:HandleFunc|Handle)\s*\(\s*\"([^\"]+)\"\s*,\s*([\w.]+)"
-    ),
-    method_group=None,
-    path_group=1,
-    method_resolver=lambda m: "ANY",
-    function_finder=lambda lines, start, _max=0: "",
-)
 
+# ==================== 模式注册表 ====================
 
-# 所有模式集合，按优先级排序（特定的优先于通用的）
-ALL_PATTERNS: Tuple[FrameworkPattern, ...] = (
-    NEST_PATTERN,                  # NestJS 装饰器最具特征性
-    SPRING_MAPPING_PATTERN,
-    SPRING_REQUEST_MAPPING_PATTERN,
-    FASTAPI_PATTERN,
-    FLASK_PATTERN,
-    DJANGO_PATTERN,
-    EXPRESS_PATTERN,
-    GIN_PATTERN,
-    ECHO_PATTERN,
-    NETHTTP_PATTERN,
-)
+class PatternRegistry:
+    """按语言惰性加载的框架模式注册表。
+
+    每种语言登记「覆盖该语言全部模式的文件 glob」和一个加载函数。加载函数负责构建
+    FrameworkPattern（含正则编译），只在第一次遇到该语言的文件时调用：
+    只改动了 Go 文件的 diff 不会编译任何 Python/Java/JS 正则。
+
+    新框架在调用方注册即可，无需修改本模块：
+
+        register_pattern(FrameworkPattern(name="Koa Router", language="javascript", ...))
+
+    同一文件适用的多个模式按 FrameworkPattern.priority 升序排列（相同时按注册顺序），
+    决定去重时保留哪一条。
+    """
+
+    def __init__(self) -> None:
+        self._languages: Dict[str, List[FrameworkPattern]] = {}
+        self._pending: Dict[str, List[Callable[[], Iterable[FrameworkPattern]]]] = {}
+        self._globs: List[Tuple[str, str]] = []
+        self._order: Dict[int, int] = {}  # id(pattern) → 加载序号
+        self._language_index: Optional[GlobIndex] = None
+        self._pattern_index: Dict[str, GlobIndex] = {}
+        self._all: Optional[Tuple[FrameworkPattern, ...]] = None
+
+    def register_language(
+        self,
+        language: str,
+        file_globs: Iterable[str],
+        loader: Callable[[], Iterable[FrameworkPattern]],
+    ) -> None:
+        """登记一种语言的模式加载函数；file_globs 必须覆盖 loader 返回的所有模式的 file_globs
+
+        同一语言可登记多个加载函数，首次使用时按登记顺序依次执行。
+        """
+        self._languages.setdefault(language, [])
+        self._pending.setdefault(language, []).append(loader)
+        for glob in file_globs:
+            if (glob, language) not in self._globs:
+                self._globs.append((glob, language))
+        self._language_index = None
+        self._pattern_index.pop(language, None)
+        self._all = None
+
+    def register_pattern(self, pattern: FrameworkPattern) -> None:
+        """注册一个已构建好的模式（归入 pattern.language）"""
+        self.register_language(pattern.language, pattern.file_globs, lambda: (pattern,))
+
+    def languages(self) -> Tuple[str, ...]:
+        """已登记的语言（按登记顺序）"""
+        return tuple(self._languages)
+
+    def patterns(self, language: str) -> List[FrameworkPattern]:
+        """返回某语言的全部模式；首次调用时执行其加载函数"""
+        pending = self._pending.pop(language, None)
+        if pending:
+            loaded = self._languages[language]
+            for loader in pending:
+                for pattern in loader():
+                    self._order.setdefault(id(pattern), len(self._order))
+                    loaded.append(pattern)
+        return self._languages.get(language, [])
+
+    def all_patterns(self) -> Tuple[FrameworkPattern, ...]:
+        """加载所有语言，按优先级返回全部模式"""
+        if self._all is None:
+            self._all = self._sorted(
+                pattern for language in self.languages() for pattern in self.patterns(language)
+            )
+        return self._all
+
+    def for_file(self, file_path: str) -> Tuple[FrameworkPattern, ...]:
+        """返回适用于该文件的模式（按优先级排序），只加载该文件涉及的语言"""
+        if self._language_index is None:
+            self._language_index = GlobIndex(self._globs)
+        found: List[FrameworkPattern] = []
+        for language in self._language_index.lookup(file_path):
+            found.extend(self._index_for(language).lookup(file_path))  # type: ignore[arg-type]
+        return self._sorted(found) if len(found) > 1 else tuple(found)
+
+    def _index_for(self, language: str) -> GlobIndex:
+        """某语言各模式 file_globs 的索引（加载该语言时构建）"""
+        index = self._pattern_index.get(language)
+        if index is None:
+            index = GlobIndex(
+                (glob, pattern) for pattern in self.patterns(language) for glob in pattern.file_globs
+            )
+            self._pattern_index[language] = index
+        return index
+
+    def _sorted(self, patterns: Iterable[FrameworkPattern]) -> Tuple[FrameworkPattern, ...]:
+        return tuple(sorted(patterns, key=lambda p: (p.priority, self._order[id(p)])))
+
+
+PATTERN_REGISTRY = PatternRegistry()
+for _language, _globs, _loader in _BUILTIN_LANGUAGES:
+    PATTERN_REGISTRY.register_language(_language, _globs, _loader)
+
+
+def register_pattern(pattern: FrameworkPattern) -> None:
+    """向全局注册表注册一个新框架模式（见 PatternRegistry.register_pattern）"""
+    PATTERN_REGISTRY.register_pattern(pattern)
+
+
+def register_language(
+    language: str,
+    file_globs: Iterable[str],
+    loader: Callable[[], Iterable[FrameworkPattern]],
+) -> None:
+    """向全局注册表登记一种语言的惰性加载函数（见 PatternRegistry.register_language）"""
+    PATTERN_REGISTRY.register_language(language, file_globs, loader)
+
+
+def __getattr__(name: str) -> object:
+    """惰性导出：ALL_PATTERNS 与内置 *_PATTERN 常量在首次访问时才加载对应语言"""
+    if name == "ALL_PATTERNS":
+        return PATTERN_REGISTRY.all_patterns()
+    language = _LAZY_PATTERN_NAMES.get(name)
+    if language is not None:
+        PATTERN_REGISTRY.patterns(language)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# ==================== 整文件匹配 ====================
+
+class WholeFileMatcher:
+    """一组 FrameworkPattern（某类文件适用的全部模式）的整文件扫描器。
+
+    每个模式的正则以 re.MULTILINE 重新编译，在全文上只运行一次 finditer，
+    匹配起始偏移经 SourceFile.line_of（行起始偏移表 + bisect）换算为行号。
+    相比逐行逐模式调用 finditer，解释器层面的循环从「行数 × 模式数」降为「模式数」，
+    同时能识别跨多行书写的声明，例如：
+
+        @RequestMapping(
+            method = RequestMethod.PUT,
+            value = "/users/{id}")
+
+    字面量预过滤：声明了 required_literals 的模式，全文不含其中任一字面量时直接跳过；
+    逐行匹配的模式只检查含字面量的行。整文件匹配的模式含字面量时仍在全文上 finditer——
+    跨行声明的匹配起点可以在字面量之前任意多行，按字面量位置截取窗口会漏掉这类匹配。
+    字面量按首字符分组编译为 ``c(?:lit1|lit2)`` 形式的正则（走 re 的字面量前缀快速搜索，
+    比逐个 ``in`` 全文查找更快）；同一文件内相同的预过滤正则只搜索一次。
+
+    含环视或 \\A/\\Z 锚点的模式在全文与单行上的语义不同，仍退化为逐行匹配。
+
+    各模式分别 finditer，而不是合并成一个 ``(?P<p0>…)|(?P<p1>…)`` 交替式：交替式在每个位置
+    只取第一个匹配的分支并消耗其文本，不同框架的模式（如多行 ``[^)]*`` 声明与其中的单行调用）
+    命中区间重叠时会漏掉后面的匹配，各模式的编号捕获组也会整体偏移。
+    每个 finditer 都在 C 层完成，N 个模式即 N 次全文扫描。
+    """
+
+    def __init__(self, patterns: Sequence[FrameworkPattern]):
+        self.patterns: Tuple[FrameworkPattern, ...] = tuple(patterns)
+        self.prefilters: Tuple[Tuple[Pattern[str], ...], ...] = tuple(
+            _literal_prefilter(p.required_literals) for p in self.patterns
+        )
+        # 与 patterns 对齐；None 表示该模式需要逐行匹配
+        self.regexes: Tuple[Optional[Pattern[str]], ...] = tuple(
+            None
+            if _LINE_SENSITIVE_RE.search(p.decorator_regex.pattern)
+            else re.compile(p.decorator_regex.pattern, p.decorator_regex.flags | re.MULTILINE)
+            for p in self.patterns
+        )
+
+    def scan(self, source: SourceFile) -> List[List[Tuple[int, re.Match]]]:
+        """扫描全文，返回与 self.patterns 对齐的命中列表：[(起始行号 0-indexed, Match), ...]
+
+        整文件匹配时 match.string 为全文，逐行匹配时为所在行；偏移均相对 match.string。
+        """
+        text = source.text
+        present: Dict[str, bool] = {}
+        hits: List[List[Tuple[int, re.Match]]] = []
+        for pattern, prefilter, regex in zip(self.patterns, self.prefilters, self.regexes):
+            found: List[Tuple[int, re.Match]] = []
+            hits.append(found)
+            if prefilter and not self._any_present(text, prefilter, present):
+                continue
+            if regex is None:
+                lines = source.lines
+                for line_no in self._candidate_lines(source, prefilter):
+                    for match in pattern.decorator_regex.finditer(lines[line_no]):
+                        found.append((line_no, match))
+            else:
+                for match in regex.finditer(text):
+                    found.append((source.line_of(match.start()), match))
+        return hits
+
+    @staticmethod
+    def _candidate_lines(source: SourceFile, prefilter: Tuple[Pattern[str], ...]) -> Iterable[int]:
+        """逐行匹配时需要检查的行号（升序）：有预过滤时只取含字面量的行。
+
+        字面量不含换行，单行内的匹配必然完整包含某个字面量，因此跳过其余行不会漏掉匹配。
+        """
+        if not prefilter:
+            return range(len(source.lines))
+        return sorted({source.line_of(m.start()) for regex in prefilter for m in regex.finditer(source.text)})
+
+    @staticmethod
+    def _any_present(
+        text: str, prefilter: Tuple[Pattern[str], ...], present: Dict[str, bool]
+    ) -> bool:
+        """全文是否含任一字面量；搜索结果按正则记入 present，同一文件内复用"""
+        for regex in prefilter:
+            hit = present.get(regex.pattern)
+            if hit is None:
+                hit = present[regex.pattern] = regex.search(text) is not None
+            if hit:
+                return True
+        return False
+
+
+_WHOLE_FILE_MATCHERS: Dict[Tuple[int, ...], WholeFileMatcher] = {}
+
+
+def get_whole_file_matcher(patterns: Sequence[FrameworkPattern]) -> WholeFileMatcher:
+    """按模式组合缓存 WholeFileMatcher（同一语言/文件类型的组合只编译一次）"""
+    key = tuple(id(p) for p in patterns)
+    matcher = _WHOLE_FILE_MATCHERS.get(key)
+    if matcher is None:
+        matcher = WholeFileMatcher(patterns)
+        _WHOLE_FILE_MATCHERS[key] = matcher
+    return matcher
+
+
+def _literal_prefilter(literals: Sequence[str]) -> Tuple[Pattern[str], ...]:
+    """把字面量按首字符分组，每组编译为一个 ``c(?:lit1|lit2)`` 正则；无字面量时返回空元组"""
+    groups: Dict[str, List[str]] = {}
+    for literal in literals:
+        group = groups.setdefault(literal[0], [])
+        if literal not in group:
+            group.append(literal)
+    return tuple(
+        re.compile(re.escape(lead) + "(?:" + "|".join(re.escape(lit[1:]) for lit in group) + ")")
+        for lead, group in groups.items()
+    )
+
+
+# 环视与 \A/\Z 在全文和单行上的判定结果可能不同
+_LINE_SENSITIVE_RE = re.compile(r"\(\?<?[=!]|\\[AZ]")
+
+
+# ==================== 输入防护 ====================
+
+@dataclass
+class ScanLimits:
+    """单文件扫描的防护阈值；数值为 0 表示不限制。
+
+    误提交到 dist/ 之外的压缩包、超长单行文件会让 ``[^)]*`` 这类模式大量回溯，
+    一个坏文件就可能拖住整次扫描。命中任一规则的文件会被跳过并记录原因。
+
+    Attributes:
+        max_file_size: 单文件最大字符数
+        max_line_length: 单行最大字符数
+        time_budget: 单文件扫描时间预算（秒），超时即放弃该文件
+        skip_generated: 是否跳过压缩（minified）/ 代码生成文件
+    """
+
+    max_file_size: int = 2_000_000
+    max_line_length: int = 5_000
+    time_budget: float = 5.0
+    skip_generated: bool = True
+
+
+DEFAULT_SCAN_LIMITS = ScanLimits()
+
+
+@dataclass
+class SkippedFile:
+    """因防护规则被跳过的文件"""
+
+    file: str
+    reason: str
+
+
+class ScanTimeout(Exception):
+    """单文件扫描超出时间预算"""
+
+
+# 代码生成器写在文件头部的惯用标记（小写比较）：Go 的 "Code generated ... DO NOT EDIT."、
+# JS/Java 的 @generated、Sphinx/脚本的 "Autogenerated by ..." 等
+_GENERATED_MARKERS = ("@generated", "do not edit", "code generated by", "autogenerated by", "auto-generated by")
+# 只在文件开头这么多字符内找生成标记
+_GENERATED_HEADER_CHARS = 1024
+# 压缩文件的常见命名
+_MINIFIED_NAME_RE = re.compile(r"[.-]min\.[cm]?js$|\.bundle\.[cm]?js$")
+# 平均行长超过该值（且文件不算太小）视为压缩文件；正常源码平均行长通常不足 50
+_MINIFIED_AVG_LINE = 300
+_MINIFIED_MIN_SIZE = 4096
+# 平均行长只按文件开头的样本估算
+_MINIFIED_SAMPLE_CHARS = 65536
+
+def check_name_limits(file_path: str, limits: ScanLimits = DEFAULT_SCAN_LIMITS) -> str:
+    """只按文件名判断的防护规则（如 *.min.js），无需读取内容；返回跳过原因，可以扫描时返回空串"""
+    if limits.skip_generated and file_path and _MINIFIED_NAME_RE.search(file_path):
+        return "压缩文件（文件名）"
+    return ""
+
+
+def check_scan_limits(text: str, file_path: str = "", limits: ScanLimits = DEFAULT_SCAN_LIMITS) -> str:
+    """按防护规则检查文件，返回跳过原因；可以正常扫描时返回空串"""
+    if limits.max_file_size and len(text) > limits.max_file_size:
+        return f"文件过大（{len(text):,} 字符 > {limits.max_file_size:,}）"
+
+    reason = check_name_limits(file_path, limits)
+    if reason:
+        return reason
+    if limits.skip_generated:
+        header = text[:_GENERATED_HEADER_CHARS].lower()
+        if any(marker in header for marker in _GENERATED_MARKERS):
+            return "生成文件（文件头含生成标记）"
+        if len(text) >= _MINIFIED_MIN_SIZE:
+            sample = text[:_MINIFIED_SAMPLE_CHARS]
+            avg = len(sample) / (sample.count("\n") + 1)
+            if avg > _MINIFIED_AVG_LINE:
+                return f"疑似压缩文件（平均行长 {avg:,.0f} 字符）"
+
+    if limits.max_line_length:
+        offset = _find_long_line(text, limits.max_line_length)
+        if offset >= 0:
+            line_no = text.count("\n", 0, offset) + 1
+            return f"第 {line_no} 行超长（> {limits.max_line_length:,} 字符）"
+    return ""
+
+
+def _find_long_line(text: str, limit: int) -> int:
+    """返回第一条长度超过 limit 的行的起始偏移，没有则返回 -1
+
+    长度 > limit 的行必然完整覆盖某个步长为 (limit + 1) // 2 的对齐块，
+    因此只需检查「块内没有换行」的少数块，而不必逐行切分整个文件。
+    """
+    if len(text) <= limit:
+        return -1
+    step = max((limit + 1) // 2, 1)
+    for block in range(0, len(text), step):
+        if text.find("\n", block, block + step) >= 0:
+            continue
+        start = text.rfind("\n", 0, block) + 1
+        end = text.find("\n", block)
+        if end < 0:
+            end = len(text)
+        if end - start > limit:
+            return start
+    return -1
+
+
+class time_budget:
+    """上下文管理器：块内执行超过 seconds 秒时抛出 ScanTimeout。
+
+    基于 SIGALRM 定时器，re 匹配过程中也能被打断；仅在 POSIX 主线程中生效，
+    其他环境（Windows、工作线程、外层已有定时器）下不做限制。seconds <= 0 表示不限时。
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self._previous_handler: object = None
+
+    def __enter__(self) -> "time_budget":
+        import signal
+        import threading
+
+        if (
+            self.seconds <= 0
+            or not hasattr(signal, "setitimer")
+            or threading.current_thread() is not threading.main_thread()
+            or signal.getitimer(signal.ITIMER_REAL)[0] > 0
+        ):
+            return self
+        self._previous_handler = signal.signal(signal.SIGALRM, self._on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, self.seconds)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self._previous_handler is None:
+            return
+        import signal
+
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, self._previous_handler)  # type: ignore[arg-type]
+        self._previous_handler = None
+
+    def _on_alarm(self, signum: int, frame: object) -> None:
+        raise ScanTimeout(f"扫描超时（> {self.seconds:g}s）")
+
+
+def guarded_scan(
+    text: str,
+    file_path: str,
+    scan: Callable[[], List[_T]],
+    limits: ScanLimits = DEFAULT_SCAN_LIMITS,
+    skipped: Optional[List[SkippedFile]] = None,
+) -> List[_T]:
+    """在防护规则下执行 scan()：文件不满足限制或扫描超时则返回 []，原因记入 skipped"""
+    reason = check_scan_limits(text, file_path, limits)
+    if not reason:
+        try:
+            with time_budget(limits.time_budget):
+                return scan()
+        except ScanTimeout as exc:
+            reason = str(exc)
+    if skipped is not None:
+        skipped.append(SkippedFile(file=file_path, reason=reason))
+    return []
+
+
+def add_scan_limit_arguments(parser: argparse.ArgumentParser) -> None:
+    """为命令行工具添加统一的防护参数"""
+    group = parser.add_argument_group("输入防护（0 表示不限制）")
+    group.add_argument("--max-file-size", type=int, default=DEFAULT_SCAN_LIMITS.max_file_size,
+                       help=f"单文件最大字符数（默认 {DEFAULT_SCAN_LIMITS.max_file_size:,}）")
+    group.add_argument("--max-line-length", type=int, default=DEFAULT_SCAN_LIMITS.max_line_length,
+                       help=f"单行最大字符数（默认 {DEFAULT_SCAN_LIMITS.max_line_length:,}）")
+    group.add_argument("--time-budget", type=float, default=DEFAULT_SCAN_LIMITS.time_budget,
+                       help=f"单文件扫描时间预算，秒（默认 {DEFAULT_SCAN_LIMITS.time_budget:g}）")
+    group.add_argument("--include-generated", action="store_true",
+                       help="不跳过压缩/代码生成文件")
+
+
+def scan_limits_from_args(args: argparse.Namespace) -> ScanLimits:
+    """从 add_scan_limit_arguments 解析出的参数构建 ScanLimits"""
+    return ScanLimits(
+        max_file_size=args.max_file_size,
+        max_line_length=args.max_line_length,
+        time_budget=args.time_budget,
+        skip_generated=not args.include_generated,
+    )
 
 
 # ==================== 主入口 ====================
@@ -331,6 +922,142 @@ def file_matches(file_path: str, patterns: Iterable[str]) -> bool:
     return False
 
 
+class GlobIndex:
+    """把一组 glob 预编译为按文件名/后缀分派的索引，判定结果与 file_matches 完全一致。
+
+    file_matches 对每个文件、每个 glob 都要构造 Path 并多次调用 Path.match；
+    索引在构建时把每个 glob 拆成「从右往左」的路径分量模式（``**/x`` 与 x 等价，
+    见 file_matches 的根目录兼容逻辑），再按最后一个分量分派：
+
+        - 纯文件名（如 ``urls.py``）→ 文件名字典，一次命中
+        - ``*<字面量>``（如 ``*.controller.ts``、``*.py``）→ 后缀字典，按后缀长度各查一次
+        - 其余带字面量尾部的（如 ``test_*.py``）→ 后缀字典 + 该分量的 fnmatch 正则复核
+        - 真正无法分派的（如 ``**``、``*``、含 [...] 的）→ 逐条用编译后的正则判定
+
+    其余分量（如 ``__tests__/**`` 中的 ``__tests__``）在分派命中后再用预编译正则校验。
+    绝对路径形式的 glob 不参与索引，直接回退到 file_matches。
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, object]]):
+        self._by_name: Dict[str, List[_GlobRule]] = {}
+        self._by_suffix: Dict[str, List[_GlobRule]] = {}
+        self._suffix_lengths: List[int] = []
+        self._unindexed: List[_GlobRule] = []
+        self._fallback: List[Tuple[int, str, object]] = []
+
+        for order, (glob, payload) in enumerate(entries):
+            effective = glob[3:] if glob.startswith("**/") else glob
+            if _IS_WINDOWS:
+                effective = effective.lower()
+            if effective.startswith(("/", "\\")) or (_IS_WINDOWS and ":" in effective):
+                self._fallback.append((order, glob, payload))
+                continue
+            parts = [part for part in re.split(r"[\\/]" if _IS_WINDOWS else "/", effective)
+                     if part and part != "."]
+            if not parts:
+                self._fallback.append((order, glob, payload))
+                continue
+            last = parts[-1]
+            rule = _GlobRule(order, payload, parts)
+            if not any(ch in last for ch in "*?["):
+                rule.last_regex = None
+                self._by_name.setdefault(last, []).append(rule)
+            elif "[" not in last and last.startswith("*") and not any(ch in last[1:] for ch in "*?"):
+                rule.last_regex = None
+                self._add_suffix(last[1:], rule)
+            elif "[" not in last and not last.endswith(("*", "?")):
+                tail = last[max(last.rfind("*"), last.rfind("?")) + 1:]
+                self._add_suffix(tail, rule)
+            else:
+                self._unindexed.append(rule)
+        self._suffix_lengths.sort(reverse=True)
+
+    def _add_suffix(self, suffix: str, rule: _GlobRule) -> None:
+        self._by_suffix.setdefault(suffix, []).append(rule)
+        if len(suffix) not in self._suffix_lengths:
+            self._suffix_lengths.append(len(suffix))
+
+    def lookup(self, file_path: str) -> Tuple[object, ...]:
+        """返回所有匹配 glob 对应的 payload（按注册顺序、去重）"""
+        parts = _path_parts(file_path)
+        matched: List[Tuple[int, object]] = []
+        if parts:
+            name = parts[-1]
+            candidates = list(self._by_name.get(name, ()))
+            for length in self._suffix_lengths:
+                if length <= len(name):
+                    candidates.extend(self._by_suffix.get(name[len(name) - length:], ()))
+            candidates.extend(self._unindexed)
+            for rule in candidates:
+                if rule.matches(parts):
+                    matched.append((rule.order, rule.payload))
+        for order, glob, payload in self._fallback:
+            if file_matches(file_path, (glob,)):
+                matched.append((order, payload))
+        if len(matched) > 1:
+            matched.sort(key=lambda item: item[0])
+        result: List[object] = []
+        seen: set = set()
+        for _order, payload in matched:
+            if id(payload) not in seen:
+                seen.add(id(payload))
+                result.append(payload)
+        return tuple(result)
+
+    def matches(self, file_path: str) -> bool:
+        """是否匹配任一 glob"""
+        return bool(self.lookup(file_path))
+
+
+class _GlobRule:
+    """GlobIndex 内部条目：一个 glob 的分量模式（从左到右）及预编译正则"""
+
+    __slots__ = ("order", "payload", "size", "regexes", "last_regex")
+
+    def __init__(self, order: int, payload: object, parts: List[str]):
+        self.order = order
+        self.payload = payload
+        self.size = len(parts)
+        # 从右往左对齐，除最后一个分量外都需要正则校验
+        self.regexes = [re.compile(fnmatch.translate(part)) for part in reversed(parts[:-1])]
+        self.last_regex: Optional[Pattern[str]] = re.compile(fnmatch.translate(parts[-1]))
+
+    def matches(self, parts: List[str]) -> bool:
+        if len(parts) < self.size:
+            return False
+        if self.last_regex is not None and not self.last_regex.match(parts[-1]):
+            return False
+        for offset, regex in enumerate(self.regexes, start=2):
+            if not regex.match(parts[-offset]):
+                return False
+        return True
+
+
+_IS_WINDOWS = os.name == "nt"
+
+
+def _path_parts(file_path: str) -> List[str]:
+    """与 Path(file_path).parts 一致的分量拆分（POSIX 下不构造 Path 对象）"""
+    if _IS_WINDOWS:
+        return [part.lower() for part in PurePath(file_path).parts]
+    parts = [part for part in file_path.split("/") if part and part != "."]
+    if file_path.startswith("/"):
+        # PurePosixPath 保留恰好两个前导斜杠作为根
+        root = "//" if file_path.startswith("//") and not file_path.startswith("///") else "/"
+        parts.insert(0, root)
+    return parts
+
+
+def patterns_for_file(file_path: str) -> Tuple[FrameworkPattern, ...]:
+    """返回适用于该文件的模式（按优先级排序）；空路径时返回全部模式
+
+    只有该文件涉及的语言会被加载（见 PatternRegistry）。
+    """
+    if not file_path:
+        return PATTERN_REGISTRY.all_patterns()
+    return PATTERN_REGISTRY.for_file(file_path)
+
+
 def extract_class_prefix(content: str, pattern: FrameworkPattern) -> str:
     """提取类级路径前缀（用于 Spring @RequestMapping、NestJS @Controller）"""
     if not pattern.class_prefix_regex:
@@ -358,71 +1085,89 @@ def normalize_path(prefix: str, path: str) -> str:
 
 
 def extract_endpoints_from_content(
-    content: str,
+    content: Union[str, SourceFile],
     file_path: str = "",
 ) -> List[Endpoint]:
-    """从单个文件内容中识别所有端点。
+    """从单个文件内容中识别所有端点（iter_endpoints_from_content 的列表版本）"""
+    return list(iter_endpoints_from_content(content, file_path))
+
+
+def iter_endpoints_from_content(
+    content: Union[str, SourceFile],
+    file_path: str = "",
+) -> Iterator[Endpoint]:
+    """生成器：从单个文件内容中逐个识别端点。
+
+    适用于该文件的每个框架模式在全文上只匹配一次（见 WholeFileMatcher），
+    跨多行书写的声明同样能识别；端点行号取声明起始行。
 
     Args:
-        content: 文件文本内容
+        content: 文件文本内容，或已构建的 SourceFile（调用方后续还要提取注释时传入，
+            可与本函数共用同一份行切分结果）
         file_path: 用于框架匹配与回填 Endpoint.file
 
-    Returns:
-        识别到的端点列表（已去重）
+    Yields:
+        识别到的端点（已去重）
     """
-    if not content:
-        return []
+    source = content if isinstance(content, SourceFile) else SourceFile(content, file_path)
+    if not source.text:
+        return
+
+    patterns = patterns_for_file(file_path)
+    if not patterns:
+        return
+
+    hits = get_whole_file_matcher(patterns).scan(source)
+    if not any(hits):
+        return
 
-    lines = content.split("\n")
-    endpoints: List[Endpoint] = []
     seen: set = set()
 
-    for pattern in ALL_PATTERNS:
-        if file_path and not file_matches(file_path, pattern.file_globs):
+    # 按模式优先级依次消费命中结果，保证与逐模式扫描时的输出顺序一致
+    for pattern, pattern_hits in zip(patterns, hits):
+        if not pattern_hits:
             continue
 
-        prefix = extract_class_prefix(content, pattern)
+        prefix = extract_class_prefix(source.text, pattern)
 
-        for line_no, line in enumerate(lines):
-            for match in pattern.decorator_regex.finditer(line):
-                method = _resolve_method(pattern, match)
-                path = _resolve_path(pattern, match, line)
-                if not method or not path:
-                    continue
-
-                full_path = normalize_path(prefix, path)
-                func_name = ""
-                if pattern.function_finder:
-                    func_name = pattern.function_finder(lines, line_no)
-
-                # 优先尝试同行抓 handler（Gin/Echo/net-http 的常见写法）
-                if not func_name and match.lastindex and match.lastindex >= 3:
-                    try:
-                        func_name = match.group(3) or ""
-                    except IndexError:
-                        func_name = ""
-
-                # 处理 Flask 多方法（'GET,POST' → 拆为多条）
-                for single_method in method.split(","):
-                    single_method = single_method.strip().upper()
-                    if not single_method:
-                        continue
-                    key = (single_method, full_path, file_path)
-                    if key in seen:
-                        continue
-                    seen.add(key)
-                    endpoints.append(
-                        Endpoint(
-                            method=single_method,
-                            path=full_path,
-                            function=func_name,
-                            framework=pattern.name,
-                            file=file_path,
-                            line=line_no + 1,
-                        )
-                    )
+        for line_no, match in pattern_hits:
+            line = source.lines[line_no]
+            method = _resolve_method(pattern, match)
+            path = _resolve_path(pattern, match, line)
+            if not method or not path:
+                continue
 
-    return endpoints
+            full_path = normalize_path(prefix, path)
+            func_name = ""
+            if pattern.function_finder:
+                # 多行声明从其最后一行之后开始找处理函数
+                last_line = line_no + match.group().rstrip().count("\n")
+                func_name = pattern.function_finder(source, last_line)
+
+            # 优先尝试同行抓 handler（Gin/Echo/net-http 的常见写法）
+            if not func_name and match.lastindex and match.lastindex >= 3:
+                try:
+                    func_name = match.group(3) or ""
+                except IndexError:
+                    func_name = ""
+
+            # 处理 Flask 多方法（'GET,POST' → 拆为多条）
+            for single_method in method.split(","):
+                single_method = single_method.strip().upper()
+                if not single_method:
+                    continue
+                key = (single_method, full_path, file_path)
+                if key in seen:
+                    continue
+                seen.add(key)
+                yield Endpoint(
+                    method=single_method,
+                    path=full_path,
+                    function=func_name,
+                    framework=pattern.name,
+                    file=file_path,
+                    line=line_no + 1,
+                )
 
 
 def _resolve_method(pattern: FrameworkPattern, match: re.Match) -> str:
@@ -452,7 +1197,7 @@ def _resolve_path(pattern: FrameworkPattern, match: re.Match, line: str) -> str:
 
 # ==================== OpenAPI 解析 ====================
 
-def parse_openapi_file(path: str) -> List[Endpoint]:
+def parse_openapi_file(path: str, cache_dir: Optional[Union[str, Path]] = None) -> List[Endpoint]:
     """解析 OpenAPI 3.x（YAML 或 JSON）文件，提取所有端点。
 
     依赖：PyYAML（yaml 模块）。若未安装则降级跳过 YAML 文件。
@@ -465,26 +1210,76 @@ def parse_openapi_file(path: str) -> List[Endpoint]:
         text = file_path.read_text(encoding="utf-8")
     except OSError:
         return []
+    return parse_openapi_text(text, file_path.suffix, str(file_path), cache_dir)
+
 
-    spec: Optional[dict] = None
-    if file_path.suffix in (".yaml", ".yml"):
+def load_openapi_spec(
+    text: str,
+    fmt: str,
+    source: str = "",
+    cache_dir: Optional[Union[str, Path]] = None,
+) -> Optional[dict]:
+    """把 OpenAPI 规范文本解析为 dict；格式不支持或解析失败时返回 None（原因打印到 stderr）。
+
+    YAML 在 PyYAML 编译了 libyaml 时使用 CSafeLoader（比纯 Python 的 SafeLoader 快数倍）。
+    指定 cache_dir 时按文本内容哈希缓存 YAML 的解析结果（见 scan_cache.store_spec），
+    同一份规范再次解析时直接加载，跳过 YAML 解析；JSON 由标准库 C 实现解析，不缓存。
+
+    Args:
+        text: 规范内容
+        fmt: "yaml" / "yml" / "json"，也接受带点的后缀（".yaml"）
+        source: 告警信息中的来源路径
+        cache_dir: 解析缓存所在目录（通常为 .dev-docs-cache）；None 表示不缓存
+    """
+    fmt = fmt.lower().lstrip(".")
+    label = source or "OpenAPI 文本"
+    spec: object = None
+    if fmt in ("yaml", "yml"):
+        key = None
+        if cache_dir is not None:
+            from scan_cache import load_spec, spec_key
+            key = spec_key(text)
+            spec = load_spec(cache_dir, key)
+            if isinstance(spec, dict):
+                return spec
         try:
             import yaml  # type: ignore
-            spec = yaml.safe_load(text)
         except ImportError:
-            print(f"[警告] 解析 {path} 需要 PyYAML，请运行 pip install pyyaml")
-            return []
+            print(f"[警告] 解析 {label} 需要 PyYAML，请运行 pip install pyyaml", file=sys.stderr)
+            return None
+        try:
+            spec = yaml.load(text, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
         except yaml.YAMLError as exc:
-            print(f"[警告] OpenAPI YAML 解析失败：{exc}")
-            return []
-    elif file_path.suffix == ".json":
+            print(f"[警告] OpenAPI YAML 解析失败（{label}）：{exc}", file=sys.stderr)
+            return None
+        if key is not None and isinstance(spec, dict):
+            from scan_cache import store_spec
+            store_spec(cache_dir, key, spec)
+    elif fmt == "json":
         import json
         try:
             spec = json.loads(text)
         except json.JSONDecodeError as exc:
-            print(f"[警告] OpenAPI JSON 解析失败：{exc}")
-            return []
+            print(f"[警告] OpenAPI JSON 解析失败（{label}）：{exc}", file=sys.stderr)
+            return None
+    return spec if isinstance(spec, dict) else None
+
+
+def parse_openapi_text(
+    text: str,
+    fmt: str,
+    source: str = "",
+    cache_dir: Optional[Union[str, Path]] = None,
+) -> List[Endpoint]:
+    """直接从内存中的文本解析 OpenAPI 3.x 规范，不写临时文件。
 
+    Args:
+        text: 规范内容（如 git cat-file / git show 取出的历史版本）
+        fmt: "yaml" / "yml" / "json"，也接受带点的后缀（".yaml"）
+        source: 写入 Endpoint.file 的来源路径，同时用于告警信息
+        cache_dir: 解析缓存目录，见 load_openapi_spec
+    """
+    spec = load_openapi_spec(text, fmt, source, cache_dir)
     if not isinstance(spec, dict):
         return []
 
@@ -505,7 +1300,7 @@ def parse_openapi_file(path: str) -> List[Endpoint]:
                     path=path_str,
                     function=op.get("operationId", ""),
                     framework="OpenAPI",
-                    file=str(file_path),
+                    file=source,
                     description=description.strip(),
                 )
             )
@@ -514,24 +1309,30 @@ def parse_openapi_file(path: str) -> List[Endpoint]:
 
 # ==================== CLI 自检 ====================
 
+# 自检与基准共用的样例：(文件路径, 内容)
+_SAMPLES: Tuple[Tuple[str, str], ...] = (
+    ("app/api.py", '@app.get("/users")\nasync def list_users():\n    return []\n'),
+    ("flask_app.py", '@app.route("/login", methods=["POST"])\ndef login():\n    pass\n'),
+    ("user.controller.ts",
+     '@Controller("users")\nclass UC {\n  @Get(":id")\n  findOne() {}\n}\n'),
+    ("UserController.java",
+     '@RequestMapping("/api")\nclass UC {\n  @GetMapping("/users")\n  public List<User> list() { return null; }\n}\n'),
+    ("OrderController.java",
+     'class OC {\n  @RequestMapping(\n      method = RequestMethod.PUT,\n'
+     '      value = "/orders/{id}")\n  public void update(long id) {}\n}\n'),
+    ("server.go",
+     'r.GET("/users", listUsers)\nr.POST("/users", createUser)\n'),
+    ("express.js",
+     'router.get("/health", (req, res) => res.json({ok: true}))\n'),
+)
+
+
 def _self_test() -> None:
     """快速自检：传入若干样例，验证识别结果"""
-    samples = [
-        ("app/api.py", '@app.get("/users")\nasync def list_users():\n    return []\n'),
-        ("flask_app.py", '@app.route("/login", methods=["POST"])\ndef login():\n    pass\n'),
-        ("user.controller.ts",
-         '@Controller("users")\nclass UC {\n  @Get(":id")\n  findOne() {}\n}\n'),
-        ("UserController.java",
-         '@RequestMapping("/api")\nclass UC {\n  @GetMapping("/users")\n  public List<User> list() { return null; }\n}\n'),
-        ("server.go",
-         'r.GET("/users", listUsers)\nr.POST("/users", createUser)\n'),
-        ("express.js",
-         'router.get("/health", (req, res) => res.json({ok: true}))\n'),
-    ]
     print("=" * 60)
     print("api_patterns 自检")
     print("=" * 60)
-    for file_path, content in samples:
+    for file_path, content in _SAMPLES:
         endpoints = extract_endpoints_from_content(content, file_path)
         print(f"\n📄 {file_path}")
         if not endpoints:
@@ -541,5 +1342,235 @@ def _self_test() -> None:
             print(f"   [{e.framework:10}] {e.signature():30} → {e.function or '?'}")
 
 
+def _benchmark(rounds: int = 5) -> None:
+    """基准：逐模式逐行扫描 vs WholeFileMatcher 整文件扫描（取 rounds 次最优）
+
+    每个样例被放大为两种文件：「大量普通代码行 + 少量路由行」模拟路由稀疏的真实分布，
+    「无路由」只含普通代码行，用于观察字面量预过滤的效果。
+    逐行扫描的每条命中（起始行号 + 捕获组）都必须出现在整文件扫描结果中，否则直接报错；
+    整文件扫描额外多出的是跨行声明。
+    """
+    import time
+
+    filler = "    result = compute(value, options)  # ordinary code line\n"
+    print("=" * 60)
+    print(f"api_patterns 基准（best of {rounds}）")
+    print("=" * 60)
+    print(f"{'文件':32} {'逐行(ms)':>12} {'整文件(ms)':>12} {'加速':>8}")
+    for file_path, snippet in _SAMPLES:
+        patterns = patterns_for_file(file_path)
+        matcher = get_whole_file_matcher(patterns)
+        cases = (
+            (file_path, (filler * 200 + snippet) * 20),
+            (f"{file_path}（无路由）", filler * 4000),
+        )
+        for label, content in cases:
+            def per_line() -> List[List[Tuple[int, re.Match]]]:
+                lines = content.split("\n")
+                hits: List[List[Tuple[int, re.Match]]] = []
+                for pattern in patterns:
+                    found = []
+                    for line_no, line in enumerate(lines):
+                        for match in pattern.decorator_regex.finditer(line):
+                            found.append((line_no, match))
+                    hits.append(found)
+                return hits
+
+            def whole_file() -> List[List[Tuple[int, re.Match]]]:
+                return matcher.scan(SourceFile(content))
+
+            def keys(hits: List[List[Tuple[int, re.Match]]]) -> List[set]:
+                return [{(no, m.groups()) for no, m in found} for found in hits]
+
+            if any(old - new for old, new in zip(keys(per_line()), keys(whole_file()))):
+                raise AssertionError(f"整文件扫描遗漏了逐行扫描的命中: {label}")
+
+            timings = []
+            for fn in (per_line, whole_file):
+                best = float("inf")
+                for _ in range(rounds):
+                    started = time.perf_counter()
+                    fn()
+                    best = min(best, time.perf_counter() - started)
+                timings.append(best * 1000)
+            print(f"{label:32} {timings[0]:12.2f} {timings[1]:12.2f} {timings[0] / timings[1]:7.1f}x")
+
+
+def _memory_benchmark(count: int = 200_000) -> None:
+    """内存基准：用 tracemalloc 对比合成的 count 个端点目录的峰值内存
+
+    对照组是字段相同、带 __dict__ 且不驻留字符串的普通 dataclass。
+    方法/框架/文件字符串每次都重新构造（与从多个文件、多份 OpenAPI 中解析得到时一样），
+    因此对照组中它们各自独立占用内存。
+    """
+    import tracemalloc
+    from dataclasses import make_dataclass
+
+    plain = make_dataclass(
+        "PlainEndpoint",
+        [(f.name, f.type, field(default=f.default)) for f in fields(Endpoint)],
+    )
+    methods = ("get", "post", "put", "delete", "patch")
+    frameworks = ("fastapi", "spring", "gin", "express/koa")
+
+    def build(cls: type) -> list:
+        catalog = []
+        for i in range(count):
+            service = i // 400
+            catalog.append(cls(
+                method=methods[i % 5].upper(),
+                path=f"/api/v1/svc{service}/items/{i}",
+                function=f"handler_{i}",
+                framework=frameworks[service % 4].title(),
+                file=f"services/svc{service}/routes.py",
+                line=i % 400 + 1,
+            ))
+        return catalog
+
+    print("=" * 60)
+    print(f"Endpoint 内存基准（{count:,} 个端点）")
+    print("=" * 60)
+    peaks = []
+    for label, cls in (("普通 dataclass", plain), ("Endpoint（slots + 驻留）", Endpoint)):
+        tracemalloc.start()
+        catalog = build(cls)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del catalog
+        peaks.append(peak)
+        print(f"{label:28} 峰值 {peak / 1024 / 1024:8.1f} MiB  （{peak / count:6.1f} B/端点）")
+    print(f"节省 {(1 - peaks[1] / peaks[0]) * 100:.1f}%")
+
+
+def _openapi_benchmark(paths: int = 5000) -> None:
+    """OpenAPI 加载基准：合成含 paths 个路径的 YAML 规范，对比各加载方式的耗时
+
+    依次测量纯 Python SafeLoader、libyaml CSafeLoader（PyYAML 未编译 libyaml 时跳过）、
+    load_openapi_spec 冷加载（解析并写入缓存）与热加载（直接读取 marshal 缓存），
+    并校验各方式得到的规范完全一致。
+    """
+    import shutil
+    import tempfile
+    import time
+
+    try:
+        import yaml  # type: ignore
+    except ImportError:
+        print("[警告] 基准需要 PyYAML，请运行 pip install pyyaml", file=sys.stderr)
+        return
+
+    chunks = ["openapi: 3.0.3\ninfo:\n  title: bench\n  version: 1.0.0\npaths:\n"]
+    for i in range(paths):
+        chunks.append(
+            f"  /api/v1/resource{i}/{{id}}:\n"
+            f"    get:\n"
+            f"      operationId: getResource{i}\n"
+            f"      summary: 获取资源 {i}\n"
+            f"      tags: [group{i % 50}]\n"
+            f"      parameters:\n"
+            f"        - name: id\n          in: path\n          required: true\n"
+            f"          schema: {{type: integer, format: int64}}\n"
+            f"      responses:\n"
+            f"        '200':\n"
+            f"          description: OK\n"
+            f"          content:\n"
+            f"            application/json:\n"
+            f"              schema:\n"
+            f"                type: object\n"
+            f"                properties:\n"
+            f"                  id: {{type: integer}}\n"
+            f"                  name: {{type: string, example: item-{i}}}\n"
+            f"    delete:\n"
+            f"      operationId: deleteResource{i}\n"
+            f"      responses:\n"
+            f"        '204': {{description: No Content}}\n"
+        )
+    text = "".join(chunks)
+
+    print("=" * 60)
+    print(f"OpenAPI 加载基准（{paths:,} 个路径，{len(text.encode('utf-8')) / 1024 / 1024:.1f} MiB YAML）")
+    print("=" * 60)
+    tmp = tempfile.mkdtemp(prefix="dev-docs-bench-")
+    try:
+        cases = [("SafeLoader（纯 Python）", lambda: yaml.load(text, Loader=yaml.SafeLoader))]
+        if hasattr(yaml, "CSafeLoader"):
+            cases.append(("CSafeLoader（libyaml）", lambda: yaml.load(text, Loader=yaml.CSafeLoader)))
+        else:
+            print("（PyYAML 未编译 libyaml，跳过 CSafeLoader）")
+        cases.append(("冷加载（解析并写缓存）", lambda: load_openapi_spec(text, "yaml", cache_dir=tmp)))
+        cases.append(("热加载（marshal 缓存）", lambda: load_openapi_spec(text, "yaml", cache_dir=tmp)))
+
+        expected = None
+        timings: List[float] = []
+        for label, load in cases:
+            started = time.perf_counter()
+            spec = load()
+            elapsed = time.perf_counter() - started
+            timings.append(elapsed)
+            if expected is None:
+                expected = spec
+            elif spec != expected:
+                raise AssertionError(f"{label} 的结果与 SafeLoader 不一致")
+            print(f"{label:24} {elapsed * 1000:10.1f} ms  {timings[0] / elapsed:7.1f}x")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _check_import_time(budget_ms: float = 5.0, runs: int = 10) -> int:
+    """导入耗时预算检查：用 ``python -X importtime`` 测量本模块的导入耗时（取 runs 次最优）
+
+    预算只针对本模块自身（importtime 的 self 列）：re/dataclasses/typing 等标准库
+    由调用脚本共同承担，不计入。测量前先预热一次写入字节码缓存，避免把编译时间算进去。
+    git hook 里的短命令每次都要付这笔开销，因此模块导入时不应编译任何框架正则。
+
+    Returns:
+        进程退出码：超出预算时为 1
+    """
+    import subprocess
+
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    cmd = [sys.executable, "-X", "importtime", "-c", "import api_patterns"]
+    cwd = str(Path(__file__).resolve().parent)
+    subprocess.run(cmd, cwd=cwd, env=env, capture_output=True, check=True)
+
+    best_self = best_total = float("inf")
+    for _ in range(runs):
+        result = subprocess.run(cmd, cwd=cwd, env=env, capture_output=True, text=True, check=True)
+        for line in result.stderr.splitlines():
+            # 格式：import time: self [us] | cumulative | imported package
+            parts = line.split("|")
+            if len(parts) == 3 and parts[2].strip() == "api_patterns":
+                best_self = min(best_self, int(parts[0].rsplit(":", 1)[1]) / 1000)
+                best_total = min(best_total, int(parts[1]) / 1000)
+
+    print("=" * 60)
+    print(f"api_patterns 导入耗时（best of {runs}）")
+    print("=" * 60)
+    print(f"模块自身: {best_self:.2f} ms（预算 {budget_ms:.2f} ms）")
+    print(f"含依赖:   {best_total:.2f} ms")
+    if best_self > budget_ms:
+        print(f"❌ 超出导入耗时预算 {best_self - budget_ms:.2f} ms")
+        return 1
+    print("✅ 在预算内")
+    return 0
+
+
 if __name__ == "__main__":
-    _self_test()
+    if "--bench" in sys.argv[1:]:
+        _benchmark()
+    elif "--bench-memory" in sys.argv[1:]:
+        _memory_benchmark()
+    elif "--bench-openapi" in sys.argv[1:]:
+        # 可选参数：路径数，例如 --bench-openapi 20000（约 12 MiB）
+        rest = sys.argv[sys.argv.index("--bench-openapi") + 1:]
+        if rest:
+            _openapi_benchmark(int(rest[0]))
+        else:
+            _openapi_benchmark()
+    elif "--import-budget" in sys.argv[1:]:
+        # 可选参数：预算毫秒数，例如 --import-budget 8
+        rest = sys.argv[sys.argv.index("--import-budget") + 1:]
+        sys.exit(_check_import_time(float(rest[0])) if rest else _check_import_time())
+    else:
+        _self_test()
@@ -0,0 +1,623 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按提交保存 API 端点快照：任意两个已快照提交之间的比对只是集合运算
+
+每个提交 SHA 对应一个压缩的快照文件，保存该提交下的完整端点集合（按文件分组）。
+快照增量构建：从最近的已快照祖先（沿第一父提交回溯）出发，用一次
+`git diff-tree` 找出其间变动的文件，只重新提取这些文件；内容与端点缓存
+（与 generate_api_doc.py / analyze_changes.py 共享）中已有的 blob 连读都不用读。
+没有可用祖先时按 `git ls-tree` 全量构建一次。
+
+文件过滤与 analyze_changes.py 一致（跳过文档、测试等），因此
+`diff v1.0.0 HEAD` 与 `analyze_changes.py --since v1.0.0` 在干净工作区下给出同样的端点集合。
+
+用法:
+    python api_snapshots.py <action> [options]
+
+Actions:
+    build       为指定提交建立快照（默认 HEAD）
+    diff        比对两个提交的端点集合（缺快照时先增量建立）
+    inspect     列出全部快照，或查看某个提交的快照
+    prune       清理过期（版本不符、提交已不存在）或多余的快照
+
+Examples:
+    python api_snapshots.py build                       # 为 HEAD 建立快照
+    python api_snapshots.py build v1.0.0 v1.1.0 HEAD    # 为多个 tag 建立快照
+    python api_snapshots.py diff v1.0.0                 # v1.0.0 → HEAD 的端点变更
+    python api_snapshots.py diff v1.0.0 v1.1.0 --json
+    python api_snapshots.py inspect                     # 列出全部快照
+    python api_snapshots.py inspect v1.0.0 --endpoints  # 列出某个快照的全部端点
+    python api_snapshots.py prune --keep 50             # 只保留最近使用的 50 个
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+from api_patterns import (  # noqa: E402
+    Endpoint,
+    ScanLimits,
+    SkippedFile,
+    add_scan_limit_arguments,
+    patterns_for_file,
+    scan_limits_from_args,
+)
+from analyze_changes import (  # noqa: E402
+    SKIP_GLOBS,
+    ApiChangeReport,
+    blob_reader,
+    collect_endpoints,
+    diff_endpoints,
+    endpoint_to_dict,
+    is_skipped,
+    render_api_changelog_section,
+    run_git,
+)
+from endpoint_scan import cache_version, decode_source, row_to_doc, scan_cache_key  # noqa: E402
+from scan_cache import CACHE_DIR, ScanCache, content_version, ensure_cache_directory  # noqa: E402
+
+
+# ==================== 配置 ====================
+
+# 快照子目录（位于端点缓存目录下，随缓存目录一起被 git 忽略）
+SNAPSHOT_SUBDIR = "snapshots"
+SNAPSHOT_SUFFIX = ".json.gz"
+# 快照文件格式版本；结构变化时递增
+SNAPSHOT_FORMAT = 1
+# 增量构建时沿第一父提交向上寻找已快照祖先的最大步数，超过则全量构建
+DEFAULT_MAX_CHAIN = 1000
+# git 用全 0 表示不存在的对象
+_NULL_SHA = "0" * 40
+# 子模块在树中的文件模式
+_GITLINK_MODE = "160000"
+
+
+# ==================== 数据结构 ====================
+
+@dataclass
+class Snapshot:
+    """单个提交的端点集合。
+
+    files 以路径为键保存端点行 [method, path, function, framework, line]，
+    不含端点的文件不记录；skipped 记录因输入防护未扫描的文件及原因。
+    """
+    commit: str
+    version: str
+    base: str = ""  # 增量构建所基于的提交（全量构建时为空）
+    files: Dict[str, List[list]] = field(default_factory=dict)
+    skipped: Dict[str, str] = field(default_factory=dict)
+
+    def endpoints(self) -> List[Endpoint]:
+        """按路径顺序展开为 Endpoint 列表"""
+        return [ep for file in sorted(self.files) for ep in _row_endpoints(self.files[file], file)]
+
+    def endpoint_count(self) -> int:
+        return sum(len(rows) for rows in self.files.values())
+
+    def to_json(self) -> Dict:
+        return {
+            "format": SNAPSHOT_FORMAT,
+            "version": self.version,
+            "commit": self.commit,
+            "base": self.base,
+            "files": self.files,
+            "skipped": self.skipped,
+        }
+
+
+def snapshot_version(limits: ScanLimits) -> str:
+    """快照版本：端点缓存版本（模式库、提取逻辑、阈值）加上文件过滤规则"""
+    return content_version(cache_version(limits), "\n".join(SKIP_GLOBS))
+
+
+class SnapshotStore:
+    """快照目录：每个提交一个 `<sha>.json.gz`，写入时先写临时文件再原子替换。
+
+    读取快照时刷新文件 mtime，prune --keep 据此保留最近使用的快照。
+    """
+
+    def __init__(self, cache_dir: str, version: str):
+        self.cache_dir = Path(cache_dir)
+        self.directory = self.cache_dir / SNAPSHOT_SUBDIR
+        self.version = version
+
+    def path_for(self, commit: str) -> Path:
+        return self.directory / f"{commit}{SNAPSHOT_SUFFIX}"
+
+    def commits(self) -> List[str]:
+        """已有快照的提交 SHA（按最近使用排序，最近的在前）"""
+        try:
+            entries = [
+                entry for entry in os.scandir(self.directory)
+                if entry.name.endswith(SNAPSHOT_SUFFIX) and entry.is_file()
+            ]
+        except FileNotFoundError:
+            return []
+        entries.sort(key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+        return [entry.name[: -len(SNAPSHOT_SUFFIX)] for entry in entries]
+
+    def read_raw(self, commit: str) -> Optional[Dict]:
+        """读取快照原始内容，不校验版本；不存在或损坏返回 None"""
+        try:
+            data = json.loads(gzip.decompress(self.path_for(commit).read_bytes()).decode("utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, EOFError) as e:
+            print(f"[警告] 快照文件不可用: {self.path_for(commit)}（{e}）", file=sys.stderr)
+            return None
+        return data if isinstance(data, dict) else None
+
+    def is_current(self, data: Dict) -> bool:
+        return data.get("format") == SNAPSHOT_FORMAT and data.get("version") == self.version
+
+    def load(self, commit: str) -> Optional[Snapshot]:
+        """读取与当前版本一致的快照；版本不符（模式库或过滤规则已变化）视为不存在"""
+        data = self.read_raw(commit)
+        if data is None or not self.is_current(data):
+            return None
+        try:
+            os.utime(str(self.path_for(commit)))
+        except OSError:
+            pass
+        return Snapshot(
+            commit=commit,
+            version=self.version,
+            base=data.get("base") or "",
+            files=data.get("files", {}),
+            skipped=data.get("skipped", {}),
+        )
+
+    def save(self, snapshot: Snapshot) -> None:
+        """原子写入快照；写入失败只告警"""
+        path = self.path_for(snapshot.commit)
+        tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+        payload = json.dumps(snapshot.to_json(), ensure_ascii=False, separators=(",", ":"))
+        try:
+            ensure_cache_directory(self.cache_dir)
+            self.directory.mkdir(exist_ok=True)
+            tmp.write_bytes(gzip.compress(payload.encode("utf-8"), mtime=0))
+            os.replace(str(tmp), str(path))
+        except OSError as e:
+            print(f"[警告] 无法写入快照 {path}: {e}", file=sys.stderr)
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+
+    def remove(self, commit: str) -> int:
+        """删除快照，返回释放的字节数"""
+        path = self.path_for(commit)
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return 0
+        return size
+
+
+# ==================== Git 辅助 ====================
+
+def resolve_commit(ref: str) -> Optional[str]:
+    """把 ref（分支、tag、短 SHA 等）解析为完整提交 SHA"""
+    sha = run_git(["rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}"]).strip()
+    return sha or None
+
+
+def existing_commits(shas: List[str]) -> Set[str]:
+    """用一次 `git cat-file --batch-check` 找出仓库中仍然存在的提交"""
+    if not shas:
+        return set()
+    try:
+        result = subprocess.run(
+            ["git", "cat-file", "--batch-check"],
+            input="\n".join(shas) + "\n",
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return set(shas)  # 无法判断时保守地视为都存在
+    alive: Set[str] = set()
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        if len(parts) == 3 and parts[1] == "commit":
+            alive.add(parts[0])
+    return alive
+
+
+def _iter_tree_blobs(commit: str) -> Iterator[Tuple[str, str]]:
+    """`git ls-tree -r -z`：产出提交中每个文件的 (路径, blob SHA)"""
+    for entry in run_git(["ls-tree", "-r", "-z", "--full-tree", commit]).split("\0"):
+        if not entry:
+            continue
+        meta, _, path = entry.partition("\t")
+        mode, kind, sha = meta.split(" ")
+        if kind == "blob":
+            yield path, sha
+
+
+def _iter_tree_changes(base: str, commit: str) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+    """`git diff-tree -r -z -M --raw`：产出 (路径, 删除的旧路径, 新 blob SHA)。
+
+    删除时新 blob SHA 为 None；重命名产出新路径并给出旧路径，复制只产出新路径。
+    """
+    tokens = run_git(["diff-tree", "-r", "-z", "-M", "--raw", base, commit]).split("\0")
+    i = 0
+    while i < len(tokens):
+        meta = tokens[i]
+        i += 1
+        if not meta.startswith(":"):
+            continue
+        _old_mode, new_mode, _old_sha, new_sha, status = meta[1:].split(" ")
+        letter = status[0]
+        if letter in ("R", "C"):
+            src, dst = tokens[i], tokens[i + 1]
+            i += 2
+            removed = src if letter == "R" else None
+            path = dst
+        else:
+            path = tokens[i]
+            i += 1
+            removed = path
+        if letter == "D" or new_sha == _NULL_SHA or new_mode == _GITLINK_MODE:
+            yield path, removed, None
+        else:
+            yield path, removed, new_sha
+
+
+# ==================== 快照构建 ====================
+
+def _is_candidate(path: str) -> bool:
+    """与 analyze_api_changes 相同的过滤：跳过文档/测试，且要有适用的框架模式"""
+    return not is_skipped(path) and bool(patterns_for_file(path))
+
+
+def find_base_snapshot(store: SnapshotStore, commit: str, max_chain: int) -> Optional[Snapshot]:
+    """沿第一父提交向上寻找最近的已快照祖先（不含 commit 本身）"""
+    if max_chain <= 0:
+        return None
+    available = set(store.commits())
+    if not available:
+        return None
+    ancestors = run_git(["rev-list", "--first-parent", f"--max-count={max_chain + 1}", commit]).split()
+    for ancestor in ancestors[1:]:
+        if ancestor in available:
+            snapshot = store.load(ancestor)
+            if snapshot is not None:
+                return snapshot
+    return None
+
+
+def build_snapshot(
+    store: SnapshotStore,
+    commit: str,
+    limits: ScanLimits,
+    cache: Optional[ScanCache] = None,
+    max_chain: int = DEFAULT_MAX_CHAIN,
+    force: bool = False,
+) -> Tuple[Snapshot, Optional[int]]:
+    """建立（或读取已有的）提交快照，返回 (快照, 重新提取的文件数)；直接复用已有快照时文件数为 None。
+
+    有已快照祖先时只处理两者之间变动的文件；端点缓存命中的 blob 不读取内容。
+    """
+    if not force:
+        existing = store.load(commit)
+        if existing is not None:
+            return existing, None
+
+    base = None if force else find_base_snapshot(store, commit, max_chain)
+    snapshot = Snapshot(commit=commit, version=store.version)
+    if base is None:
+        todo = [(path, sha) for path, sha in _iter_tree_blobs(commit) if _is_candidate(path)]
+    else:
+        snapshot.base = base.commit
+        snapshot.files = dict(base.files)
+        snapshot.skipped = dict(base.skipped)
+        todo = []
+        for path, removed, sha in _iter_tree_changes(base.commit, commit):
+            for stale in (removed, path):
+                if stale is not None:
+                    snapshot.files.pop(stale, None)
+                    snapshot.skipped.pop(stale, None)
+            if sha is not None and _is_candidate(path):
+                todo.append((path, sha))
+
+    # 先查端点缓存，只读取未命中的 blob；键带上路径的模式签名，同一内容在适用模式不同的路径下分别提取
+    misses: List[Tuple[str, str]] = []
+    for path, sha in todo:
+        key = scan_cache_key(sha, path, limits) if cache is not None else None
+        rows = cache.get(key) if key is not None else None
+        if rows is None:
+            misses.append((path, sha))
+        elif rows:
+            snapshot.files[path] = [_endpoint_row(row_to_doc(row, path).endpoint) for row in rows]
+
+    skipped: List[SkippedFile] = []
+    results = blob_reader().iter_objects([sha for _path, sha in misses])
+    for (path, sha), result in zip(misses, results):
+        text = decode_source(result[1]) if result is not None else None
+        if not text:
+            continue
+        endpoints = collect_endpoints(path, text, limits, skipped, cache, sha)
+        if endpoints:
+            snapshot.files[path] = [_endpoint_row(ep) for ep in endpoints]
+    for item in skipped:
+        snapshot.skipped[item.file] = item.reason
+
+    store.save(snapshot)
+    return snapshot, len(misses)
+
+
+def _endpoint_row(ep: Endpoint) -> list:
+    return [ep.method, ep.path, ep.function, ep.framework, ep.line]
+
+
+def _row_endpoints(rows: Optional[List[list]], file: str) -> List[Endpoint]:
+    return [
+        Endpoint(method=row[0], path=row[1], function=row[2], framework=row[3], file=file, line=row[4])
+        for row in rows or ()
+    ]
+
+
+def diff_snapshots(
+    before: Snapshot,
+    after: Snapshot,
+    changes: Optional[Iterable[Tuple[str, Optional[str], Optional[str]]]] = None,
+) -> ApiChangeReport:
+    """两个快照之间的端点变更，逐文件比对，结果与 analyze_api_changes 一致。
+
+    只读取两个提交之间的树差异（changes 默认取 _iter_tree_changes），不读取、不解析文件内容：
+    重命名按旧路径 → 新路径比对，复制视为新增；任一版本被跳过的文件不参与比对，只报告一次。
+    """
+    if changes is None:
+        changes = _iter_tree_changes(before.commit, after.commit)
+    report = ApiChangeReport()
+    for path, removed, _sha in changes:
+        if is_skipped(path):
+            continue
+        skipped = [
+            SkippedFile(file, side.skipped[file])
+            for side, file in ((before, removed), (after, path))
+            if file is not None and file in side.skipped
+        ]
+        if skipped:
+            report.skipped.append(skipped[-1])
+            continue
+        before_eps = _row_endpoints(before.files.get(removed) if removed is not None else None, removed or path)
+        file_report = diff_endpoints(before_eps, _row_endpoints(after.files.get(path), path))
+        report.added.extend(file_report.added)
+        report.removed.extend(file_report.removed)
+        report.modified.extend(file_report.modified)
+    return report
+
+
+# ==================== 命令实现 ====================
+
+def _open_context(args) -> Tuple[SnapshotStore, Optional[ScanCache], ScanLimits]:
+    limits = scan_limits_from_args(args)
+    store = SnapshotStore(args.cache_dir, snapshot_version(limits))
+    cache = None if args.no_cache else ScanCache.open(args.cache_dir, cache_version(limits))
+    return store, cache, limits
+
+
+def _resolve_or_exit(ref: str) -> str:
+    commit = resolve_commit(ref)
+    if commit is None:
+        print(f"[错误] 无法解析提交: {ref}", file=sys.stderr)
+        sys.exit(1)
+    return commit
+
+
+def _ensure_snapshot(store, commit, ref, limits, cache, args) -> Tuple[Snapshot, Optional[int]]:
+    snapshot, extracted = build_snapshot(store, commit, limits, cache, args.max_chain, getattr(args, "force", False))
+    if extracted is not None:
+        origin = f"基于 {snapshot.base[:12]} 增量构建" if snapshot.base else "全量构建"
+        print(f"  → {ref} ({commit[:12]})：{origin}，重新提取 {extracted} 个文件，"
+              f"共 {snapshot.endpoint_count()} 个端点", file=sys.stderr)
+    return snapshot, extracted
+
+
+def cmd_build(args) -> None:
+    store, cache, limits = _open_context(args)
+    for ref in args.refs or ["HEAD"]:
+        commit = _resolve_or_exit(ref)
+        if _ensure_snapshot(store, commit, ref, limits, cache, args)[1] is None:
+            print(f"  → {ref} ({commit[:12]})：快照已存在", file=sys.stderr)
+    if cache is not None:
+        cache.save()
+    print(f"✅ 快照目录: {store.directory}")
+
+
+def cmd_diff(args) -> None:
+    store, cache, limits = _open_context(args)
+    base_commit = _resolve_or_exit(args.base)
+    target_commit = _resolve_or_exit(args.target)
+    # 先建较早的一侧，另一侧通常可以基于它增量构建
+    before = _ensure_snapshot(store, base_commit, args.base, limits, cache, args)[0]
+    after = _ensure_snapshot(store, target_commit, args.target, limits, cache, args)[0]
+    if cache is not None:
+        cache.save()
+    report = diff_snapshots(before, after)
+
+    if args.json:
+        print(json.dumps({
+            "base": base_commit,
+            "target": target_commit,
+            "api_changes": {
+                "added": [endpoint_to_dict(e) for e in report.added],
+                "modified": [endpoint_to_dict(e) for e in report.modified],
+                "removed": [endpoint_to_dict(e) for e in report.removed],
+            },
+            "skipped_files": [{"file": s.file, "reason": s.reason} for s in report.skipped],
+            "api_changelog_section": render_api_changelog_section(report),
+        }, ensure_ascii=False, indent=2))
+        return
+
+    print(f"API 端点变更: {args.base} ({base_commit[:12]}) → {args.target} ({target_commit[:12]})")
+    if report.is_empty():
+        print("\n  未检测到 API 端点变更")
+        return
+    for title, mark, endpoints in (
+        ("新增 (Added)", "+", report.added),
+        ("变更 (Modified)", "~", report.modified),
+        ("移除 (Removed)", "-", report.removed),
+    ):
+        if endpoints:
+            print(f"\n### {title}")
+            for e in endpoints:
+                print(f"  {mark} [{e.framework}] {e.signature()} → {e.function or '?'}  ({e.file}:{e.line})")
+    if report.skipped:
+        print(f"\n### 跳过的文件 ({len(report.skipped)})")
+        for s in report.skipped:
+            print(f"  ! {s.file}：{s.reason}")
+
+
+def cmd_inspect(args) -> None:
+    limits = scan_limits_from_args(args)
+    store = SnapshotStore(args.cache_dir, snapshot_version(limits))
+    if args.ref:
+        commit = _resolve_or_exit(args.ref)
+        data = store.read_raw(commit)
+        if data is None:
+            print(f"[错误] {args.ref} ({commit[:12]}) 没有快照，可先运行 build", file=sys.stderr)
+            sys.exit(1)
+        snapshot = Snapshot(commit=commit, version=data.get("version", ""), base=data.get("base") or "",
+                            files=data.get("files", {}), skipped=data.get("skipped", {}))
+        print(f"提交:     {commit}")
+        print(f"文件:     {store.path_for(commit)}（{store.path_for(commit).stat().st_size} 字节）")
+        print(f"版本:     {snapshot.version}{'' if store.is_current(data) else '（已过期）'}")
+        print(f"构建方式: {'基于 ' + snapshot.base + ' 增量' if snapshot.base else '全量'}")
+        print(f"端点:     {snapshot.endpoint_count()} 个，分布在 {len(snapshot.files)} 个文件")
+        if snapshot.skipped:
+            print(f"跳过:     {len(snapshot.skipped)} 个文件")
+        if args.endpoints:
+            for e in snapshot.endpoints():
+                print(f"  [{e.framework}] {e.signature()} → {e.function or '?'}  ({e.file}:{e.line})")
+        return
+
+    commits = store.commits()
+    if not commits:
+        print(f"没有快照（目录: {store.directory}）")
+        return
+    subjects = _commit_subjects(existing_commits(commits))
+    total = 0
+    print(f"快照目录: {store.directory}（最近使用的在前）")
+    for commit in commits:
+        data = store.read_raw(commit) or {}
+        size = store.path_for(commit).stat().st_size
+        total += size
+        count = sum(len(rows) for rows in data.get("files", {}).values())
+        if commit not in subjects:
+            state = "  [提交已不存在]"
+        elif not store.is_current(data):
+            state = "  [已过期]"
+        else:
+            state = ""
+        print(f"  {commit[:12]}  {count:>6} 个端点  {size:>9} 字节  {subjects.get(commit, '')}{state}")
+    print(f"共 {len(commits)} 个快照，{total} 字节")
+
+
+def _commit_subjects(commits: Set[str]) -> Dict[str, str]:
+    """一次 git log 取出多个提交的标题"""
+    if not commits:
+        return {}
+    out = run_git(["log", "--no-walk=unsorted", "--format=%H%x00%s", *sorted(commits)])
+    subjects: Dict[str, str] = {}
+    for line in out.splitlines():
+        sha, _, subject = line.partition("\0")
+        subjects[sha] = subject
+    return subjects
+
+
+def cmd_prune(args) -> None:
+    limits = scan_limits_from_args(args)
+    store = SnapshotStore(args.cache_dir, snapshot_version(limits))
+    commits = store.commits()
+    alive = existing_commits(commits)
+    doomed: List[Tuple[str, str]] = []
+    kept = 0
+    for commit in commits:
+        data = store.read_raw(commit)
+        if commit not in alive:
+            doomed.append((commit, "提交已不存在"))
+        elif data is None or not store.is_current(data):
+            doomed.append((commit, "版本已过期"))
+        elif args.keep is not None and kept >= args.keep:
+            doomed.append((commit, f"超出保留数量 {args.keep}"))
+        else:
+            kept += 1
+
+    freed = 0
+    for commit, reason in doomed:
+        print(f"  - {commit[:12]}：{reason}")
+        if not args.dry_run:
+            freed += store.remove(commit)
+    verb = "将删除" if args.dry_run else "已删除"
+    print(f"{verb} {len(doomed)} 个快照，保留 {kept} 个" + ("" if args.dry_run else f"，释放 {freed} 字节"))
+
+
+# ==================== CLI ====================
+
+def main() -> None:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--cache-dir", default=CACHE_DIR,
+                        help=f"端点缓存目录，快照位于其下的 {SNAPSHOT_SUBDIR}/（默认 {CACHE_DIR}）")
+    add_scan_limit_arguments(common)
+
+    building = argparse.ArgumentParser(add_help=False)
+    building.add_argument("--no-cache", action="store_true",
+                          help="构建时不读写端点缓存（与 generate_api_doc.py 共享）")
+    building.add_argument("--max-chain", type=int, default=DEFAULT_MAX_CHAIN,
+                          help=f"向上寻找已快照祖先的最大提交数，0 表示总是全量构建（默认 {DEFAULT_MAX_CHAIN}）")
+
+    parser = argparse.ArgumentParser(
+        description="按提交保存 API 端点快照",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    sub = parser.add_subparsers(dest="command", required=False)
+
+    p_build = sub.add_parser("build", parents=[common, building], help="为提交建立快照")
+    p_build.add_argument("refs", nargs="*", help="提交、tag 或分支（默认 HEAD）")
+    p_build.add_argument("--force", "-f", action="store_true", help="忽略已有快照，全量重建")
+
+    p_diff = sub.add_parser("diff", parents=[common, building], help="比对两个提交的端点集合")
+    p_diff.add_argument("base", help="起始 ref")
+    p_diff.add_argument("target", nargs="?", default="HEAD", help="目标 ref（默认 HEAD）")
+    p_diff.add_argument("--json", action="store_true", help="以 JSON 格式输出")
+
+    p_inspect = sub.add_parser("inspect", parents=[common], help="列出或查看快照")
+    p_inspect.add_argument("ref", nargs="?", help="要查看的提交；省略时列出全部快照")
+    p_inspect.add_argument("--endpoints", action="store_true", help="列出快照中的全部端点")
+
+    p_prune = sub.add_parser("prune", parents=[common], help="清理快照")
+    p_prune.add_argument("--keep", type=int, help="只保留最近使用的 N 个有效快照")
+    p_prune.add_argument("--dry-run", action="store_true", help="只列出将被删除的快照")
+
+    args = parser.parse_args()
+
+    handlers = {
+        "build": cmd_build,
+        "diff": cmd_diff,
+        "inspect": cmd_inspect,
+        "prune": cmd_prune,
+    }
+
+    if not args.command:
+        parser.print_help()
+        return
+    handlers[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
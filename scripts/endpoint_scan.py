@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按内容提取端点（带 docstring/注释）与扫描缓存的编码
+
+generate_api_doc.py、analyze_changes.py 与 api_snapshots.py 共用的部分：
+    - EndpointDoc：带描述的端点信息
+    - scan_content：提取一段源码内容中的端点，并附上 docstring/注释
+    - 扫描缓存的版本、键（blob SHA + 路径的模式签名）与缓存行的编码/还原
+
+只依赖 api_patterns.py 与 scan_cache.py：analyze_changes.py 导入本模块即可，
+不必加载 generate_api_doc.py 的目录遍历、OpenAPI 解析与 Markdown 渲染代码。
+"""
+
+from __future__ import annotations
+
+import bisect
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+from api_patterns import (  # noqa: E402
+    DEFAULT_SCAN_LIMITS,
+    Endpoint,
+    ScanLimits,
+    SkippedFile,
+    SourceFile,
+    check_name_limits,
+    guarded_scan,
+    iter_endpoints_from_content,
+    patterns_for_file,
+    slotted,
+)
+from scan_cache import blob_sha, content_version  # noqa: E402
+
+if TYPE_CHECKING:
+    from generate_api_doc import RefResolver
+
+
+# ==================== 配置 ====================
+
+# 文件数少于该值时直接串行：进程池启动 + 结果回传的开销会超过并行收益
+PARALLEL_MIN_FILES = 64
+
+
+# ==================== 数据结构 ====================
+
+@slotted
+@dataclass
+class EndpointDoc:
+    """带描述的端点信息（用于渲染 API.md）；与 Endpoint 一样使用 __slots__"""
+    endpoint: Endpoint
+    summary: str = ""           # 一句话描述
+    description: str = ""       # 详细描述
+    parameters: List[Dict] = field(default_factory=list)
+    request_body: Optional[Dict] = None
+    responses: Dict[str, Dict] = field(default_factory=dict)
+    tags: List[str] = field(default_factory=list)
+    # OpenAPI 来源的 $ref 解析器（同一规范的端点共享）：只是渲染辅助，不是端点数据，
+    # 因此不参与 __eq__ / __repr__
+    resolver: Optional[RefResolver] = field(default=None, compare=False, repr=False)
+
+
+# ==================== 扫描缓存 ====================
+
+def cache_version(limits: ScanLimits = DEFAULT_SCAN_LIMITS) -> str:
+    """扫描缓存的版本号：模式库、本模块的提取逻辑或影响结果的阈值变化时随之变化"""
+    here = Path(__file__)
+    return content_version(
+        here.with_name("api_patterns.py").read_bytes(),
+        here.read_bytes(),
+        f"{limits.max_file_size}/{limits.max_line_length}/{limits.skip_generated}",
+    )
+
+
+def pattern_signature(rel_str: str) -> str:
+    """该路径适用的模式集合（名称与优先级）的签名。
+
+    端点识别取决于路径：NestJS 只认 *.controller.ts，Django 只认 urls.py，
+    同一内容在适用模式不同的两个路径下提取结果不同。
+    """
+    return content_version(*(f"{p.name}:{p.priority}" for p in patterns_for_file(rel_str)))
+
+
+def scan_cache_key(sha: str, rel_str: str, limits: ScanLimits = DEFAULT_SCAN_LIMITS) -> Optional[str]:
+    """扫描缓存的键：内容的 blob SHA 加上路径的模式签名；仅凭文件名就该跳过的文件
+    （如 *.min.js）返回 None，不查也不写缓存，交给扫描记录跳过原因"""
+    if check_name_limits(rel_str, limits):
+        return None
+    return content_version(sha, pattern_signature(rel_str))
+
+
+def doc_to_row(doc: EndpointDoc) -> list:
+    """把源码扫描得到的 EndpointDoc 编码为缓存行（不含文件路径，内容相同即可复用）"""
+    ep = doc.endpoint
+    return [ep.method, ep.path, ep.function, ep.framework, ep.line, ep.description,
+            doc.summary, doc.description]
+
+
+def row_to_doc(row: list, rel_str: str) -> EndpointDoc:
+    """缓存行还原为 EndpointDoc，文件路径取当前扫描到的相对路径"""
+    method, path, function, framework, line, ep_description, summary, description = row
+    return EndpointDoc(
+        endpoint=Endpoint(
+            method=method,
+            path=path,
+            function=function,
+            framework=framework,
+            file=rel_str,
+            line=line,
+            description=ep_description,
+        ),
+        summary=summary,
+        description=description,
+    )
+
+
+# ==================== 按内容扫描 ====================
+
+def decode_source(data: bytes) -> Optional[str]:
+    """按 UTF-8 解码源码并统一换行符（与 Path.read_text 的结果一致）；不是 UTF-8 时返回 None"""
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def scan_content(
+    content: str,
+    rel_str: str,
+    limits: ScanLimits = DEFAULT_SCAN_LIMITS,
+    skipped: Optional[List[SkippedFile]] = None,
+    cache: Optional[ScanCache] = None,
+    sha: Optional[str] = None,
+) -> List[EndpointDoc]:
+    """提取一段源码内容中的端点（带 docstring），供 analyze_changes 等按内容扫描的调用方使用。
+
+    传入 cache 时以 scan_cache_key（内容的 blob SHA + rel_str 的模式签名）为键复用结果：
+    同一内容无论来自哪个 ref、分支或脚本，只要所在路径适用的模式相同都只解析一次。
+    sha 应为原始字节的 blob SHA（如 git 给出的对象名）；省略时按 UTF-8 编码后的内容计算。
+    """
+    key = None
+    if cache is not None:
+        key = scan_cache_key(sha or blob_sha(content.encode("utf-8")), rel_str, limits)
+        rows = cache.get(key) if key is not None else None
+        if rows is not None:
+            return [row_to_doc(row, rel_str) for row in rows]
+    file_skipped: List[SkippedFile] = []
+    docs = guarded_scan(
+        content,
+        rel_str,
+        lambda: list(_scan_file(content, rel_str)),
+        limits,
+        file_skipped,
+    )
+    if skipped is not None:
+        skipped.extend(file_skipped)
+    if key is not None and not file_skipped:
+        cache.put(key, [doc_to_row(doc) for doc in docs])
+    return docs
+
+
+def _scan_file(content: str, rel_str: str) -> Iterator[EndpointDoc]:
+    """识别单个文件中的端点并附上 docstring/注释"""
+    # 同一个 SourceFile 贯穿端点识别与注释提取，整个文件只切分一次
+    source = SourceFile(content, rel_str)
+    comments = CommentIndex(source)
+    for ep in iter_endpoints_from_content(source, rel_str):
+        doc_text = _extract_docstring_for_endpoint(comments, ep)
+        summary, description = _split_summary(doc_text)
+        yield EndpointDoc(
+            endpoint=ep,
+            summary=summary,
+            description=description,
+        )
+
+
+# ==================== docstring / 注释提取 ====================
+
+def _extract_docstring_for_endpoint(comments: CommentIndex, ep: Endpoint) -> str:
+    """根据端点行号尝试抓取上下文的注释/docstring。
+
+    策略：
+        1. 装饰器之后的下一段 docstring（Python：函数体内的三引号）
+        2. 装饰器之前的连续注释行（JS/TS/Java/Go：// 或 /** */）
+    """
+    line_no = max(ep.line - 1, 0)
+
+    # 1. 向下找 Python docstring
+    py_doc = comments.docstring_after(line_no)
+    if py_doc:
+        return py_doc
+
+    # 2. 向上找块/单行注释（JSDoc / Javadoc / Go doc）
+    block_doc = comments.comment_before(line_no)
+    if block_doc:
+        return block_doc
+
+    return ""
+
+
+# Python 函数定义行；前导空白限定在行内，便于在全文上以 MULTILINE 一次扫完
+_PY_DEF_RE = re.compile(r"^[^\S\n]*(?:async[^\S\n]+)?def[^\S\n]+\w+[^\S\n]*\(", re.MULTILINE)
+# 单行块注释：/** ... */ 同行（JSDoc 简写）
+_SINGLE_BLOCK_RE = re.compile(r"^/\*+\s*(.*?)\s*\*+/\s*$")
+
+# 向上扫描时遇到「不属于注释组」的行，终止扫描
+_STOP = None
+
+
+class CommentIndex:
+    """单个文件的注释/docstring 索引，每个端点的查找都变成字典命中。
+
+    - Python docstring：函数定义行在首次使用时用一次全文正则扫描建立有序表，
+      端点行之后最近的 def 用 bisect 定位；每个 def 的 docstring 只解析一次
+    - 前置注释块：自下而上的扫描只依赖「当前行 + 是否处于 /* */ 块内」两个状态，
+      因此把每个 (行号, 状态) 的结果（本行贡献的文本 + 上一个状态）记下来，
+      相邻端点的扫描在已走过的行上直接复用。整个文件每行每个状态最多处理一次，
+      总代价与文件行数线性相关，而不是「端点数 × 注释块长度」
+
+    查找结果与逐端点上下扫描的旧实现逐字一致。
+    """
+
+    def __init__(self, source: SourceFile):
+        self.source = source
+        self._def_lines: Optional[List[int]] = None
+        self._docstrings: Dict[int, str] = {}
+        self._comments: Dict[int, str] = {}
+        # (行号, in_block) → (本行贡献的文本或 None, 下一个状态键) / _STOP
+        self._walk: Dict[Tuple[int, bool], Optional[Tuple[Optional[str], Tuple[int, bool]]]] = {}
+
+    # ---------- Python docstring ----------
+
+    def docstring_after(self, start: int, max_look: int = 10) -> str:
+        """从装饰器行向下 max_look 行内找 def，返回其 docstring"""
+        if self._def_lines is None:
+            text = self.source.text
+            self._def_lines = [
+                self.source.line_of(m.start()) for m in _PY_DEF_RE.finditer(text)
+            ] if "def" in text else []
+        limit = min(start + 1 + max_look, len(self.source.lines))
+        pos = bisect.bisect_right(self._def_lines, start)
+        if pos >= len(self._def_lines) or self._def_lines[pos] >= limit:
+            return ""
+        def_line = self._def_lines[pos]
+        doc = self._docstrings.get(def_line)
+        if doc is None:
+            doc = self._parse_docstring(def_line)
+            self._docstrings[def_line] = doc
+        return doc
+
+    def _parse_docstring(self, def_line: int) -> str:
+        lines = self.source.lines
+        # def 行可能跨多行（参数过多），找到第一个 ":" 收尾
+        body_start = def_line + 1
+        for i in range(def_line, min(def_line + 5, len(lines))):
+            if lines[i].rstrip().endswith(":"):
+                body_start = i + 1
+                break
+
+        if body_start >= len(lines):
+            return ""
+
+        first = lines[body_start].strip()
+        quote: Optional[str] = None
+        if first.startswith('"""') or first.startswith("'''"):
+            quote = first[:3]
+        else:
+            return ""
+
+        # 单行 docstring
+        if first.endswith(quote) and len(first) > 6:
+            return first[3:-3].strip()
+
+        # 多行 docstring
+        parts: List[str] = [first[3:]]
+        for j in range(body_start + 1, min(body_start + 30, len(lines))):
+            line = lines[j]
+            if quote in line:
+                parts.append(line.split(quote)[0])
+                break
+            parts.append(line)
+        return "\n".join(part.strip() for part in parts).strip()
+
+    # ---------- 前置注释块 ----------
+
+    def comment_before(self, start: int) -> str:
+        """从装饰器行向上找连续的注释块（含 JSDoc/Javadoc/Go doc）"""
+        cached = self._comments.get(start)
+        if cached is not None:
+            return cached
+
+        collected: List[str] = []
+        key: Tuple[int, bool] = (start - 1, False)
+        self._resolve(key)
+        while key[0] >= 0:
+            entry = self._walk[key]
+            if entry is _STOP:
+                break
+            text, key = entry
+            if text is not None:
+                collected.append(text)
+        collected.reverse()
+
+        # 过滤掉 JSDoc tag 行（@param 等），保留正文
+        cleaned = [line for line in collected if not line.startswith("@")]
+        result = "\n".join(cleaned).strip()
+        self._comments[start] = result
+        return result
+
+    def _resolve(self, key: Tuple[int, bool]) -> None:
+        """沿向上扫描的状态链补齐 self._walk，遇到已记录的状态即停止"""
+        lines = self.source.lines
+        while key[0] >= 0 and key not in self._walk:
+            i, in_block = key
+            stripped = lines[i].strip()
+            entry = self._step(stripped, in_block)
+            if entry is _STOP:
+                self._walk[key] = _STOP
+                return
+            text, next_in_block = entry
+            next_key = (i - 1, next_in_block)
+            self._walk[key] = (text, next_key)
+            key = next_key
+
+    @staticmethod
+    def _step(stripped: str, in_block: bool) -> Optional[Tuple[Optional[str], bool]]:
+        """单行状态转移：返回 (本行贡献的文本或 None, 上一行的 in_block)，或 _STOP"""
+        # 单行块注释：/** ... */ 同行（JSDoc 简写）
+        single_block = _SINGLE_BLOCK_RE.match(stripped)
+        if single_block:
+            text = single_block.group(1).strip()
+            return (text or None, in_block)
+
+        # 多行块注释结尾 */
+        if stripped.endswith("*/"):
+            # 该行可能含内容（如 ` * description */`）
+            inner = stripped[:-2].lstrip("*").strip()
+            return (inner or None, True)
+
+        if in_block:
+            # 块开始 /** 或 /*
+            if stripped.startswith("/**") or stripped.startswith("/*"):
+                # 该行可能含内容
+                inner = stripped.lstrip("/").lstrip("*").strip()
+                return (inner or None, False)
+            return (stripped.lstrip("*").strip(), True)
+
+        # 单行注释 //
+        if stripped.startswith("//"):
+            return (stripped[2:].strip(), False)
+
+        # 装饰器/空行：继续往上看（同一注解组）
+        if stripped.startswith("@") or stripped == "":
+            return (None, False)
+        return _STOP
+
+
+def _split_summary(doc_text: str) -> Tuple[str, str]:
+    """把 docstring 拆成 (summary, description)：第一行为 summary"""
+    if not doc_text:
+        return "", ""
+    lines = [line.strip() for line in doc_text.split("\n")]
+    summary = lines[0]
+    rest = "\n".join(lines[1:]).strip()
+    return summary, rest
@@ -17,6 +17,9 @@
     # 同时使用：以源码扫描结果补全 OpenAPI 缺失的端点
     python generate_api_doc.py --openapi docs/api/openapi.yaml --source ./src --output docs/api/API.md
 
+    # 按分组拆成多个文件：docs/api/API.md 为索引，各分组写入 docs/api/API/<分组>.md
+    python generate_api_doc.py --openapi docs/api/openapi.yaml --split-by tag -j 0
+
     # 指定项目元信息
     python generate_api_doc.py --source ./src --project-name "我的项目" --base-url "https://api.example.com"
 """
@@ -24,37 +27,47 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
+import io
+import json
+import os
 import re
+import subprocess
 import sys
-from dataclasses import dataclass, field
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote, unquote
 
 sys.path.insert(0, str(Path(__file__).parent))
 from api_patterns import (  # noqa: E402
+    DEFAULT_SCAN_LIMITS,
     Endpoint,
-    extract_endpoints_from_content,
+    ScanLimits,
+    SkippedFile,
+    add_scan_limit_arguments,
+    check_name_limits,
+    load_openapi_spec,
     parse_openapi_file,
-    file_matches,
+    patterns_for_file,
+    scan_limits_from_args,
 )
+from endpoint_scan import (  # noqa: E402
+    PARALLEL_MIN_FILES,
+    EndpointDoc,
+    cache_version,
+    decode_source,
+    doc_to_row,
+    pattern_signature,
+    row_to_doc,
+    scan_content,
+)
+from scan_cache import CACHE_DIR, ScanCache, blob_sha, content_version, ensure_cache_directory  # noqa: E402
 
 
-# ==================== 数据结构 ====================
-
-@dataclass
-class EndpointDoc:
-    """带描述的端点信息（用于渲染 API.md）"""
-    endpoint: Endpoint
-    summary: str = ""           # 一句话描述
-    description: str = ""       # 详细描述
-    parameters: List[Dict] = field(default_factory=list)
-    request_body: Optional[Dict] = None
-    responses: Dict[str, Dict] = field(default_factory=dict)
-    tags: List[str] = field(default_factory=list)
-
-
-# ==================== 源码扫描 + docstring 提取 ====================
+# ==================== 源码扫描 ====================
 
 # 跳过这些目录（性能 + 减少噪音）
 SKIP_DIRS = {
@@ -64,194 +77,436 @@ SKIP_DIRS = {
     ".pytest_cache", ".mypy_cache",
 }
 
+# 仅扫描有意义的源码后缀
+SOURCE_SUFFIXES = {".py", ".js", ".ts", ".tsx", ".jsx", ".java", ".go", ".kt"}
 
-def scan_source(root: str) -> List[EndpointDoc]:
-    """递归扫描源码目录，返回带 docstring 的端点列表"""
-    docs: List[EndpointDoc] = []
+
+@dataclass
+class WalkOptions:
+    """源码目录遍历选项。
+
+    include/exclude 按相对 root 的路径从右往左匹配（``legacy`` 命中任意层级的 legacy）；
+    ``*``/``?``/``[...]`` 不跨越 ``/``，``**`` 分量匹配任意多层目录，``dir/**`` 即 dir 下的全部内容。
+    """
+    include: Tuple[str, ...] = ()     # 非空时只保留匹配任一 glob 的文件
+    exclude: Tuple[str, ...] = ()     # 匹配的文件被排除；匹配的目录整棵跳过
+    follow_symlinks: bool = True      # 是否进入指向目录的符号链接（带环检测）
+    git_files: bool = False           # 用 git ls-files 列出候选文件（遵循 .gitignore）
+
+
+DEFAULT_WALK_OPTIONS = WalkOptions()
+
+
+def _glob_to_regex(glob: str) -> str:
+    """把遍历用的 glob 翻译为正则片段（匹配以 / 分隔的相对路径，语义见 WalkOptions）"""
+    if os.name == "nt":
+        glob = glob.replace("\\", "/")
+    anchored = glob.startswith("/")
+    parts = [part for part in glob.split("/") if part and part != "."]
+    while parts and parts[0] == "**":
+        # 开头的 **/ 与右锚定的默认语义等价
+        parts.pop(0)
+        anchored = False
+    if not parts:
+        return ".*"
+    out = [] if anchored else ["(?:.*/)?"]
+    for index, part in enumerate(parts):
+        last = index == len(parts) - 1
+        if part == "**":
+            out.append(".+" if last else "(?:[^/]+/)*")
+            continue
+        i, n = 0, len(part)
+        while i < n:
+            ch = part[i]
+            i += 1
+            if ch == "*":
+                out.append("[^/]*")
+            elif ch == "?":
+                out.append("[^/]")
+            elif ch == "[":
+                # 与 fnmatch 相同：开头的 ! 表示取反，紧随其后的 ] 视为字面量
+                start = i + 1 if i < n and part[i] == "!" else i
+                end = part.find("]", start + 1 if start < n and part[start] == "]" else start)
+                if end < 0:
+                    out.append("\\[")
+                    continue
+                body = part[start:end].replace("\\", "\\\\")
+                if start > i:
+                    body = "^" + body
+                elif body.startswith("^"):
+                    body = "\\" + body
+                out.append("[" + body + "]")
+                i = end + 1
+            else:
+                out.append(re.escape(ch))
+        if not last:
+            out.append("/")
+    return "".join(out)
+
+
+def _compile_walk_globs(globs: Iterable[str]) -> Optional[Callable[[str], bool]]:
+    """把一组 glob 合并为一个正则，返回「相对路径是否命中任一 glob」的判定函数；无 glob 时返回 None"""
+    globs = [glob for glob in globs if glob]
+    if not globs:
+        return None
+    flags = re.IGNORECASE if os.name == "nt" else 0
+    regex = re.compile("(?:" + "|".join(_glob_to_regex(glob) for glob in globs) + ")\\Z", flags)
+    if os.sep == "/":
+        return lambda rel: regex.match(rel) is not None
+    return lambda rel: regex.match(rel.replace(os.sep, "/")) is not None
+
+
+def scan_source(
+    root: str,
+    limits: ScanLimits = DEFAULT_SCAN_LIMITS,
+    skipped: Optional[List[SkippedFile]] = None,
+    jobs: int = 1,
+    walk: WalkOptions = DEFAULT_WALK_OPTIONS,
+    cache: Optional[ScanCache] = None,
+) -> List[EndpointDoc]:
+    """递归扫描源码目录，返回带 docstring 的端点列表（iter_scan_source 的列表版本）"""
+    return list(iter_scan_source(root, limits, skipped, jobs, walk, cache))
+
+
+def iter_scan_source(
+    root: str,
+    limits: ScanLimits = DEFAULT_SCAN_LIMITS,
+    skipped: Optional[List[SkippedFile]] = None,
+    jobs: int = 1,
+    walk: WalkOptions = DEFAULT_WALK_OPTIONS,
+    cache: Optional[ScanCache] = None,
+) -> Iterator[EndpointDoc]:
+    """生成器：递归扫描源码目录，每处理完一个文件就 yield 其中带 docstring 的端点。
+
+    不在内存中累积整棵目录的结果，调用方可边扫描边消费（合并、渲染）。
+    压缩/生成文件、超大文件、超长行文件以及超出时间预算的文件会被跳过（见 ScanLimits），
+    原因追加到 skipped。
+
+    jobs > 1 时把文件分批交给进程池处理（0 表示使用全部 CPU）；结果按文件遍历顺序
+    依次产出，与串行扫描逐条一致。文件数不足 PARALLEL_MIN_FILES 或进程池不可用时回退串行。
+    walk 控制目录遍历的 include/exclude glob 与符号链接处理（见 WalkOptions）。
+    传入 cache 时，内容未变的文件直接取缓存结果，只有变化的文件才重新提取；
+    保存缓存（cache.save()）由调用方在消费完毕后负责。
+    """
     root_path = Path(root)
     if not root_path.exists():
         print(f"[警告] 源码目录不存在: {root}", file=sys.stderr)
-        return docs
+        return
 
-    for path in _walk_source_files(root_path):
-        try:
-            content = path.read_text(encoding="utf-8")
-        except (OSError, UnicodeDecodeError):
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    # 每个任务：(文件路径, 相对路径, 缓存命中的结果或 None, 未命中时写回缓存所需的印记,
+    #           查缓存时已读出的内容或 None)。串行时算哈希读过的文件不再读第二次；
+    # 并行时任务列表要先整体建好，不保留内容（否则冷缓存时整棵源码树同时驻留内存），由 worker 自行读取
+    keep_content = jobs <= 1
+    tasks: Iterable[Tuple[str, str, Optional[List[EndpointDoc]], Optional[_CacheStamp], Optional[str]]] = (
+        (path, rel_str) + (
+            _cache_probe(cache, path, rel_str, limits, keep_content) if cache is not None else (None, None, None)
+        )
+        for path, rel_str in _iter_candidate_files(root_path, walk)
+    )
+    results: Optional[Iterator[_ScanResult]] = None
+    if jobs > 1:
+        tasks = list(tasks)
+        misses = [(path, rel_str) for path, rel_str, hit, _stamp, _content in tasks if hit is None]
+        if len(misses) >= PARALLEL_MIN_FILES:
+            results = _scan_parallel(misses, limits, jobs, cache is not None)
+
+    for path, rel_str, hit, stamp, content in tasks:
+        if hit is not None:
+            yield from hit
             continue
-        # 转为相对路径，便于在文档中显示
+        if results is not None:
+            docs, file_skipped, key = next(results)
+        elif content is None and stamp is not None:
+            docs, file_skipped, key = _scan_batch([(path, rel_str)], limits, True)[0]
+        else:
+            file_skipped = []
+            docs = _scan_path(path, rel_str, limits, file_skipped, content)
+            key = stamp[3] if stamp is not None else None
+        if skipped is not None:
+            skipped.extend(file_skipped)
+        # 被跳过的文件不入缓存：阈值或超时在下次运行时可能不同；
+        # 重新读取到的内容与算键时不同（两次读取之间被改写）时也不写，下次运行再按新内容提取
+        if stamp is not None and key == stamp[3] and not file_skipped:
+            cache.put(key, [doc_to_row(doc) for doc in docs])
+            cache.record_file(*stamp)
+        yield from docs
+
+
+def _iter_candidate_files(
+    root_path: Path,
+    walk: WalkOptions = DEFAULT_WALK_OPTIONS,
+) -> Iterator[Tuple[str, str]]:
+    """生成器：yield (文件路径, 相对路径)，已排除没有适用框架模式的文件"""
+    files: Optional[Iterable[Tuple[str, str]]] = None
+    if walk.git_files and root_path.is_dir():
+        files = _git_source_files(root_path, walk)
+        if files is None:
+            print(f"[警告] {root_path} 不在 git 仓库中或 git 不可用，改为遍历目录", file=sys.stderr)
+    if files is None:
+        files = _walk_source_files(root_path, walk)
+    for path, rel_str in files:
+        # 没有适用框架模式的文件（如 .kt）不读取，也不参与防护检查
+        if patterns_for_file(rel_str):
+            yield path, rel_str
+
+
+def _scan_path(
+    path: str,
+    rel_str: str,
+    limits: ScanLimits,
+    skipped: Optional[List[SkippedFile]],
+    content: Optional[str] = None,
+) -> List[EndpointDoc]:
+    """扫描单个文件；content 为 None 时才读取文件，读取失败返回空列表"""
+    if content is None:
         try:
-            rel = path.relative_to(root_path)
-        except ValueError:
-            rel = path
-        rel_str = str(rel)
-        endpoints = extract_endpoints_from_content(content, rel_str)
-        for ep in endpoints:
-            doc_text = _extract_docstring_for_endpoint(content, ep)
-            summary, description = _split_summary(doc_text)
-            docs.append(EndpointDoc(
-                endpoint=ep,
-                summary=summary,
-                description=description,
-            ))
-    return docs
+            content = Path(path).read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            return []
+    return scan_content(content, rel_str, limits, skipped)
 
 
-def _walk_source_files(root: Path):
-    """生成器：递归 yield 所有源码文件，跳过 SKIP_DIRS"""
-    if root.is_file():
-        yield root
-        return
-    for child in root.iterdir():
-        if child.name in SKIP_DIRS or child.name.startswith("."):
-            continue
-        if child.is_dir():
-            yield from _walk_source_files(child)
-        else:
-            # 仅扫描有意义的源码后缀
-            if child.suffix in {".py", ".js", ".ts", ".tsx", ".jsx",
-                                 ".java", ".go", ".kt"}:
-                yield child
+# 单个文件的扫描结果：(端点列表, 跳过的文件, 所读内容的缓存键或 None)
+_ScanResult = Tuple[List[EndpointDoc], List[SkippedFile], Optional[str]]
 
 
-def _extract_docstring_for_endpoint(content: str, ep: Endpoint) -> str:
-    """根据端点行号尝试抓取上下文的注释/docstring。
+def _scan_batch(
+    batch: List[Tuple[str, str]],
+    limits: ScanLimits,
+    keyed: bool = False,
+) -> List[_ScanResult]:
+    """进程池工作函数：读取并扫描一批 (路径, 相对路径)，逐个文件返回结果。
 
-    策略：
-        1. 装饰器之后的下一段 docstring（Python：函数体内的三引号）
-        2. 装饰器之前的连续注释行（JS/TS/Java/Go：// 或 /** */）
+    keyed 为 True 时顺带算出所读字节的缓存键，调用方据此确认与查缓存时算键的内容一致。
     """
-    lines = content.split("\n")
-    line_no = max(ep.line - 1, 0)
-
-    # 1. 向下找 Python docstring
-    py_doc = _python_docstring_after(lines, line_no)
-    if py_doc:
-        return py_doc
-
-    # 2. 向上找块/单行注释（JSDoc / Javadoc / Go doc）
-    block_doc = _block_comment_before(lines, line_no)
-    if block_doc:
-        return block_doc
-
-    return ""
-
-
-def _python_docstring_after(lines: List[str], start: int, max_look: int = 10) -> str:
-    """从装饰器行向下找 def，再尝试抓 docstring"""
-    pat_def = re.compile(r"^\s*(?:async\s+)?def\s+\w+\s*\(")
-    def_line = -1
-    for i in range(start + 1, min(start + 1 + max_look, len(lines))):
-        if pat_def.match(lines[i]):
-            def_line = i
-            break
-    if def_line < 0:
-        return ""
-
-    # def 行可能跨多行（参数过多），找到第一个 ":" 收尾
-    body_start = def_line + 1
-    for i in range(def_line, min(def_line + 5, len(lines))):
-        if lines[i].rstrip().endswith(":"):
-            body_start = i + 1
-            break
-
-    if body_start >= len(lines):
-        return ""
-
-    first = lines[body_start].strip()
-    quote: Optional[str] = None
-    if first.startswith('"""') or first.startswith("'''"):
-        quote = first[:3]
-    else:
-        return ""
-
-    # 单行 docstring
-    if first.endswith(quote) and len(first) > 6:
-        return first[3:-3].strip()
-
-    # 多行 docstring
-    parts: List[str] = [first[3:]]
-    for j in range(body_start + 1, min(body_start + 30, len(lines))):
-        line = lines[j]
-        if quote in line:
-            parts.append(line.split(quote)[0])
-            break
-        parts.append(line)
-    return "\n".join(part.strip() for part in parts).strip()
-
-
-def _block_comment_before(lines: List[str], start: int) -> str:
-    """从装饰器行向上找连续的注释块（含 JSDoc/Javadoc/Go doc）"""
-    collected: List[str] = []
-    i = start - 1
-    in_block = False
-    while i >= 0:
-        stripped = lines[i].strip()
-
-        # 单行块注释：/** ... */ 同行（JSDoc 简写）
-        single_block = re.match(r"^/\*+\s*(.*?)\s*\*+/\s*$", stripped)
-        if single_block:
-            text = single_block.group(1).strip()
-            if text:
-                collected.insert(0, text)
-            i -= 1
+    results: List[_ScanResult] = []
+    for path, rel_str in batch:
+        skipped: List[SkippedFile] = []
+        try:
+            data = Path(path).read_bytes()
+        except OSError:
+            results.append(([], skipped, None))
             continue
+        key = content_version(blob_sha(data), pattern_signature(rel_str)) if keyed else None
+        docs = _scan_path(path, rel_str, limits, skipped, decode_source(data) or "")
+        results.append((docs, skipped, key))
+    return results
+
+
+def _scan_parallel(
+    files: List[Tuple[str, str]],
+    limits: ScanLimits,
+    jobs: int,
+    keyed: bool = False,
+) -> Optional[Iterator[_ScanResult]]:
+    """把文件切成连续的批次交给进程池，按文件顺序逐个返回结果；进程池无法启动时返回 None。
+
+    每个 worker 分到约 4 个批次，兼顾负载均衡与进程间传输次数；只传路径，文件由 worker 读取。
+    executor.map 保证结果顺序与提交顺序一致，因此输出与串行扫描相同。
+    """
+    try:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=jobs)
+    except (ImportError, NotImplementedError, OSError) as e:
+        print(f"[警告] 无法启动进程池（{e}），改为串行扫描", file=sys.stderr)
+        return None
 
-        # 多行块注释结尾 */
-        if stripped.endswith("*/"):
-            in_block = True
-            # 该行可能含内容（如 ` * description */`）
-            inner = stripped[:-2].lstrip("*").strip()
-            if inner:
-                collected.insert(0, inner)
-            i -= 1
-            continue
+    size = max(1, -(-len(files) // (jobs * 4)))
+    batches = [files[i:i + size] for i in range(0, len(files), size)]
 
-        if in_block:
-            # 块开始 /** 或 /*
-            if stripped.startswith("/**") or stripped.startswith("/*"):
-                # 该行可能含内容
-                inner = stripped.lstrip("/").lstrip("*").strip()
-                if inner:
-                    collected.insert(0, inner)
-                in_block = False
-                i -= 1
-                continue
-            cleaned = stripped.lstrip("*").strip()
-            collected.insert(0, cleaned)
-            i -= 1
-            continue
+    def results() -> Iterator[_ScanResult]:
+        with executor:
+            for batch in executor.map(_scan_batch, batches, [limits] * len(batches), [keyed] * len(batches)):
+                yield from batch
 
-        # 单行注释 //
-        if stripped.startswith("//"):
-            collected.insert(0, stripped[2:].strip())
-            i -= 1
-            continue
+    return results()
 
-        # 装饰器/空行：继续往上看（同一注解组）
-        if stripped.startswith("@") or stripped == "":
-            i -= 1
-            continue
-        break
 
-    # 过滤掉 JSDoc tag 行（@param 等），保留正文
-    cleaned = [line for line in collected if not line.startswith("@")]
-    return "\n".join(cleaned).strip()
+# ---------- 扫描缓存 ----------
+
+# 写回缓存所需的印记：(路径键, mtime_ns, size, 缓存键)
+_CacheStamp = Tuple[str, int, int, str]
+
+
+def _cache_probe(
+    cache: ScanCache,
+    path: str,
+    rel_str: str,
+    limits: ScanLimits = DEFAULT_SCAN_LIMITS,
+    keep_content: bool = True,
+) -> Tuple[Optional[List[EndpointDoc]], Optional[_CacheStamp], Optional[str]]:
+    """查询缓存，返回 (命中的结果, 未命中时的印记, 已读出的内容)；文件不可读或不入缓存时全为 None。
+
+    (mtime, size) 与上次一致时不读文件；否则读一次文件算 blob SHA，再按内容与模式签名查找。
+    未命中且 keep_content 时解码后的内容一并返回供扫描使用：同一份字节既用于算键又用于提取，
+    两次读取之间文件被改写也不会把新内容的结果存到旧内容的键下。
+    路径索引的键同样带上模式签名，签名不同的记录不会被误用。
+    """
+    if check_name_limits(rel_str, limits):
+        return None, None, None
+    signature = pattern_signature(rel_str)
+    index_key = f"{os.path.abspath(path)}#{signature}"
+    content: Optional[str] = None
+    try:
+        st = os.stat(path)
+        key = cache.lookup_file(index_key, st.st_mtime_ns, st.st_size)
+        if key is None:
+            data = Path(path).read_bytes()
+            key = content_version(blob_sha(data), signature)
+            if keep_content:
+                content = decode_source(data) or ""
+    except OSError:
+        return None, None, None
+    stamp = (index_key, st.st_mtime_ns, st.st_size, key)
+    rows = cache.get(key)
+    if rows is None:
+        return None, stamp, content
+    cache.record_file(*stamp)
+    return [row_to_doc(row, rel_str) for row in rows], None, None
+
+
+def _walk_source_files(
+    root: Path,
+    options: WalkOptions = DEFAULT_WALK_OPTIONS,
+) -> Iterator[Tuple[str, str]]:
+    """生成器：迭代遍历源码目录，yield (文件路径, 相对 root 的路径)，跳过 SKIP_DIRS 与隐藏目录。
+
+    使用 os.scandir 的 DirEntry 缓存类型信息，普通文件和目录不再额外 stat；
+    用显式栈代替递归，目录再深也不会增加 Python 调用帧。遍历顺序与逐层递归一致。
+    跟随符号链接时按 (st_dev, st_ino) 记录已进入的目录，链接成环或重复指向同一目录只遍历一次。
+    """
+    if root.is_file():
+        yield str(root), root.name
+        return
 
+    include = _compile_walk_globs(options.include)
+    exclude = _compile_walk_globs(options.exclude)
+    follow = options.follow_symlinks
+    visited = set()
+    if follow:
+        st = root.stat()
+        visited.add((st.st_dev, st.st_ino))
 
-def _split_summary(doc_text: str) -> Tuple[str, str]:
-    """把 docstring 拆成 (summary, description)：第一行为 summary"""
-    if not doc_text:
-        return "", ""
-    lines = [line.strip() for line in doc_text.split("\n")]
-    summary = lines[0]
-    rest = "\n".join(lines[1:]).strip()
-    return summary, rest
+    # 栈中每一项：(目录迭代器, 该目录相对 root 的前缀)
+    stack = [(os.scandir(root), "")]
+    try:
+        while stack:
+            entries, prefix = stack[-1]
+            for entry in entries:
+                name = entry.name
+                if name in SKIP_DIRS or name.startswith("."):
+                    continue
+                try:
+                    is_dir = entry.is_dir()
+                    if is_dir and not follow and entry.is_symlink():
+                        continue
+                except OSError:
+                    continue
+                rel = prefix + name
+                if is_dir:
+                    if exclude is not None and exclude(rel):
+                        continue
+                    if follow:
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        key = (st.st_dev, st.st_ino)
+                        if key in visited:
+                            continue
+                        visited.add(key)
+                    try:
+                        children = os.scandir(entry.path)
+                    except OSError:
+                        continue
+                    # 先处理子目录，当前目录的迭代器留在栈中稍后继续
+                    stack.append((children, rel + os.sep))
+                    break
+                # 仅扫描有意义的源码后缀
+                if os.path.splitext(name)[1] not in SOURCE_SUFFIXES:
+                    continue
+                if include is not None and not include(rel):
+                    continue
+                if exclude is not None and exclude(rel):
+                    continue
+                yield entry.path, rel
+            else:
+                stack.pop()[0].close()
+    finally:
+        for entries, _ in stack:
+            entries.close()
+
+
+def _git_source_files(
+    root: Path,
+    options: WalkOptions = DEFAULT_WALK_OPTIONS,
+) -> Optional[List[Tuple[str, str]]]:
+    """用一次 git ls-files 列出 root 下已跟踪及未被忽略的未跟踪文件，返回 [(文件路径, 相对路径)]。
+
+    被 .gitignore 忽略的构建产物、生成代码等从不触碰，也不需要逐目录 scandir。
+    先按后缀过滤再应用 SKIP_DIRS、隐藏目录与 include/exclude 规则（语义与
+    _walk_source_files 相同，符号链接按普通文件处理）；git 顺序为路径字典序。
+    不在 git 仓库中或 git 不可用时返回 None。
+    """
+    try:
+        result = subprocess.run(
+            ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+            cwd=str(root),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+
+    include = _compile_walk_globs(options.include)
+    exclude = _compile_walk_globs(options.exclude)
+    pruned: Dict[str, bool] = {}
+
+    def is_pruned(dir_rel: str) -> bool:
+        # 目录是否被跳过；按目录缓存，同一目录下的文件只判定一次
+        cached = pruned.get(dir_rel)
+        if cached is None:
+            parent, _, name = dir_rel.rpartition("/")
+            cached = (
+                (bool(parent) and is_pruned(parent))
+                or name in SKIP_DIRS
+                or name.startswith(".")
+                or (exclude is not None and exclude(dir_rel))
+            )
+            pruned[dir_rel] = cached
+        return cached
+
+    files: List[Tuple[str, str]] = []
+    previous = b""
+    for raw in result.stdout.split(b"\0"):
+        # 冲突未解决的文件在 --cached 中按 stage 重复出现
+        if not raw or raw == previous:
+            continue
+        previous = raw
+        rel = os.fsdecode(raw)
+        if os.path.splitext(rel)[1] not in SOURCE_SUFFIXES:
+            continue
+        dir_rel, _, name = rel.rpartition("/")
+        if name.startswith(".") or (dir_rel and is_pruned(dir_rel)):
+            continue
+        if os.sep != "/":
+            rel = rel.replace("/", os.sep)
+        if include is not None and not include(rel):
+            continue
+        if exclude is not None and exclude(rel):
+            continue
+        files.append((os.path.join(str(root), rel), rel))
+    return files
 
 
 # ==================== OpenAPI 转 EndpointDoc ====================
 
-def from_openapi(path: str) -> List[EndpointDoc]:
-    """OpenAPI → EndpointDoc，保留参数与响应结构"""
+def from_openapi(path: str, cache_dir: Optional[str] = None) -> List[EndpointDoc]:
+    """OpenAPI → EndpointDoc，保留参数与响应结构；指定 cache_dir 时复用已缓存的 YAML 解析结果"""
     docs: List[EndpointDoc] = []
     try:
         text = Path(path).read_text(encoding="utf-8")
@@ -259,27 +514,10 @@ def from_openapi(path: str) -> List[EndpointDoc]:
         print(f"[警告] OpenAPI 文件读取失败: {path}", file=sys.stderr)
         return docs
 
-    spec: Optional[dict] = None
-    if path.endswith((".yaml", ".yml")):
-        try:
-            import yaml  # type: ignore
-            spec = yaml.safe_load(text)
-        except ImportError:
-            print("[警告] 解析 YAML 需要 PyYAML，请运行 pip install pyyaml", file=sys.stderr)
-            return docs
-        except yaml.YAMLError as exc:
-            print(f"[警告] YAML 解析失败: {exc}", file=sys.stderr)
-            return docs
-    elif path.endswith(".json"):
-        import json
-        try:
-            spec = json.loads(text)
-        except json.JSONDecodeError as exc:
-            print(f"[警告] JSON 解析失败: {exc}", file=sys.stderr)
-            return docs
-
-    if not isinstance(spec, dict):
+    spec = load_openapi_spec(text, Path(path).suffix, path, cache_dir)
+    if spec is None:
         return docs
+    resolver = RefResolver(spec, path, cache_dir)
 
     paths = spec.get("paths", {})
     for path_str, path_item in paths.items():
@@ -306,14 +544,181 @@ def from_openapi(path: str) -> List[EndpointDoc]:
                 request_body=op.get("requestBody"),
                 responses=op.get("responses", {}),
                 tags=op.get("tags", []),
+                resolver=resolver,
             ))
     return docs
 
 
+# ==================== $ref 解析 ====================
+
+# 示例生成的上限：schema 嵌套层数（超出处输出 null）、数组元素数、对象属性数
+EXAMPLE_MAX_DEPTH = 10
+EXAMPLE_MAX_ITEMS = 3
+EXAMPLE_MAX_PROPERTIES = 100
+
+
+class RefResolver:
+    """OpenAPI `$ref` 解析与示例生成；同一份规范的所有端点共享一个实例。
+
+    - 引用键为「文件绝对路径#JSON Pointer」，外部文件（`common.yaml#/Error`）在首次引用时
+      才读取，每个文件只解析一次（YAML 同样经过 load_openapi_spec 的解析缓存）
+    - 正在展开的引用再次出现即为循环，在该处输出 null
+    - 每个组件的示例按（引用键, 剩余深度）记忆化，并记下展开时经过的全部引用；
+      只有这些引用都不在当前引用链上时才复用（否则循环截断的位置会不同），
+      因此共享组件的数千个操作只展开一次，且每个端点的示例与渲染顺序无关
+    """
+
+    def __init__(self, spec: dict, path: str = "", cache_dir: Optional[str] = None):
+        self.root = str(Path(path).resolve()) if path else ""
+        self.cache_dir = cache_dir
+        self._documents: Dict[str, Optional[dict]] = {self.root: spec}
+        self._examples: Dict[Tuple[str, int], Tuple[object, frozenset]] = {}
+        self._chain: set = set()  # 正在展开的引用键
+        self._warned: set = set()
+
+    def deref(self, node: object, file: Optional[str] = None) -> Tuple[object, str]:
+        """沿 `$ref` 链解析到最终对象（参数、请求体、响应等），返回 (对象, 所在文件)"""
+        file = self.root if file is None else file
+        seen = set()
+        while isinstance(node, dict) and isinstance(node.get("$ref"), str):
+            key = self._ref_key(node["$ref"], file)
+            if key is None or key in seen:
+                return {}, file
+            seen.add(key)
+            node, file = self._target(key)
+        return node, file
+
+    def example(self, schema: object, file: Optional[str] = None) -> object:
+        """根据 schema 生成示例值"""
+        return self._example(schema, self.root if file is None else file, EXAMPLE_MAX_DEPTH, set())
+
+    def _example(self, schema: object, file: str, depth: int, visited: set) -> object:
+        """生成示例，并把途经的引用键记入 visited"""
+        if not isinstance(schema, dict):
+            return None
+        ref = schema.get("$ref")
+        if isinstance(ref, str):
+            return self._ref_example(ref, file, depth, visited)
+        if "example" in schema:
+            return schema["example"]
+        if depth <= 0:
+            return None
+        variants = schema.get("oneOf") or schema.get("anyOf")
+        if isinstance(variants, list) and variants and "type" not in schema and "properties" not in schema:
+            return self._example(variants[0], file, depth, visited)
+        typ = schema.get("type")
+        if typ == "string":
+            return schema.get("default", "string")
+        if typ == "integer":
+            return schema.get("default", 0)
+        if typ == "number":
+            return schema.get("default", 0.0)
+        if typ == "boolean":
+            return schema.get("default", False)
+        if typ == "array":
+            item = self._example(schema.get("items", {}), file, depth - 1, visited)
+            min_items = schema.get("minItems")
+            count = min(min_items, EXAMPLE_MAX_ITEMS) if isinstance(min_items, int) and min_items > 1 else 1
+            return [item] * count
+        if typ == "object" or "properties" in schema or "allOf" in schema:
+            result: Dict[str, object] = {}
+            for part in schema.get("allOf") or ():
+                value = self._example(part, file, depth, visited)
+                if isinstance(value, dict):
+                    result.update(value)
+            properties = schema.get("properties") or {}
+            for index, (name, prop_schema) in enumerate(properties.items()):
+                if index >= EXAMPLE_MAX_PROPERTIES:
+                    break
+                result[name] = self._example(prop_schema, file, depth - 1, visited)
+            return result
+        return None
+
+    def _ref_example(self, ref: str, file: str, depth: int, visited: set) -> object:
+        key = self._ref_key(ref, file)
+        if key is None:
+            return None
+        visited.add(key)
+        cached = self._examples.get((key, depth))
+        if cached is not None and cached[1].isdisjoint(self._chain):
+            visited.update(cached[1])
+            return cached[0]
+        if key in self._chain:
+            return None  # 循环引用：在此截断
+        target, target_file = self._target(key)
+        inner = {key}
+        self._chain.add(key)
+        try:
+            value = self._example(target, target_file, depth, inner)
+        finally:
+            self._chain.discard(key)
+        if inner.isdisjoint(self._chain):
+            # 展开过程未碰到外层引用链：结果与调用位置无关，可以复用
+            self._examples[(key, depth)] = (value, frozenset(inner))
+        visited.update(inner)
+        return value
+
+    def _ref_key(self, ref: str, file: str) -> Optional[str]:
+        """把 `$ref` 规范化为「文件绝对路径#JSON Pointer」；远程引用不支持，返回 None"""
+        location, _, pointer = ref.partition("#")
+        if not location:
+            return f"{file}#{pointer}"
+        if "://" in location:
+            self._warn(ref, "不支持远程引用")
+            return None
+        base = Path(file).parent if file else Path.cwd()
+        return f"{(base / location).resolve()}#{pointer}"
+
+    def _target(self, key: str) -> Tuple[object, str]:
+        """按引用键取目标对象；文件或路径不存在时返回 ({}, 文件) 并告警一次"""
+        file, _, pointer = key.partition("#")
+        node: object = self._document(file)
+        for token in pointer.split("/")[1:] if pointer else ():
+            token = unquote(token).replace("~1", "/").replace("~0", "~")
+            if isinstance(node, dict) and token in node:
+                node = node[token]
+            elif isinstance(node, list) and token.isdigit() and int(token) < len(node):
+                node = node[int(token)]
+            else:
+                self._warn(key, "引用目标不存在")
+                return {}, file
+        if node is None:
+            self._warn(key, "引用目标不存在")
+            return {}, file
+        return node, file
+
+    def _document(self, file: str) -> Optional[dict]:
+        """外部文件在首次引用时读取并解析，之后复用"""
+        if file not in self._documents:
+            try:
+                text = Path(file).read_text(encoding="utf-8")
+            except OSError:
+                self._documents[file] = None
+            else:
+                suffix = Path(file).suffix
+                self._documents[file] = load_openapi_spec(
+                    text, suffix if suffix in (".json", ".yaml", ".yml") else ".yaml", file, self.cache_dir,
+                )
+        return self._documents[file]
+
+    def _warn(self, ref: str, reason: str) -> None:
+        if ref not in self._warned:
+            self._warned.add(ref)
+            print(f"[警告] 无法解析 $ref {ref}：{reason}", file=sys.stderr)
+
+
+# 源码扫描得到的端点没有规范，用空解析器渲染
+_NO_SPEC = RefResolver({})
+
+
 # ==================== 合并去重 ====================
 
-def merge_docs(*sources: List[EndpointDoc]) -> List[EndpointDoc]:
-    """按 (method, path) 去重，OpenAPI 优先（信息更完整）"""
+def merge_docs(*sources: Iterable[EndpointDoc]) -> List[EndpointDoc]:
+    """按 (method, path) 去重，OpenAPI 优先（信息更完整）
+
+    sources 可以是列表，也可以是 iter_scan_source 等生成器：逐条消费，
+    只保留去重后的结果，不会同时持有各来源的完整列表。
+    """
     by_key: Dict[Tuple[str, str], EndpointDoc] = {}
     for source in sources:
         for doc in source:
@@ -331,21 +736,100 @@ def merge_docs(*sources: List[EndpointDoc]) -> List[EndpointDoc]:
 
 # ==================== Markdown 渲染 ====================
 
+# 流式写出时的文件缓冲区大小
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+class MarkdownWriter:
+    """把 Markdown 行流式写入二进制流：每行以换行结尾，逐个端点编码后直接写出，
+    不在内存中拼接整篇文档；同时累计已写字节数与 SHA-1（供增量渲染记录位置与摘要）"""
+
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self._digest = hashlib.sha1()
+        self.size = 0
+
+    def write_lines(self, lines: Iterable[str]) -> None:
+        self.write_bytes("".join(line + "\n" for line in lines).encode("utf-8"))
+
+    def write_bytes(self, data: bytes) -> None:
+        self._stream.write(data)
+        self._digest.update(data)
+        self.size += len(data)
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
 def render_api_md(
-    docs: List[EndpointDoc],
+    docs: Iterable[EndpointDoc],
     project_name: str = "项目",
     version: str = "1.0.0",
     base_url: str = "https://api.example.com",
 ) -> str:
-    """渲染完整 API.md 内容"""
+    """渲染完整 API.md 内容；docs 可以是任意可迭代对象（只遍历一次）。
+
+    与 write_api_md 共用同一渲染路径；大型目录请直接用 write_api_md 写文件。
+    """
+    buffer = io.BytesIO()
+    write_api_md(docs, buffer, project_name, version, base_url)
+    return buffer.getvalue().decode("utf-8")
+
+
+def write_api_md(
+    docs: Iterable[EndpointDoc],
+    stream: BinaryIO,
+    project_name: str = "项目",
+    version: str = "1.0.0",
+    base_url: str = "https://api.example.com",
+) -> int:
+    """把完整 API.md 流式写入二进制流，返回端点总数。
+
+    分组与页眉、页脚写完即丢，每次只有一个端点的 Markdown 驻留内存，
+    峰值内存与目录规模无关（端点列表本身除外）。
+    """
     today = datetime.now().strftime("%Y-%m-%d")
-    by_tag: Dict[str, List[EndpointDoc]] = {}
+    by_tag, total = group_by_tag(docs)
 
+    out = MarkdownWriter(stream)
+    out.write_lines(_render_header(project_name, version, base_url, total, today))
+    for section_idx, tag in enumerate(sorted(by_tag.keys()), 1):
+        _write_tag_section(out, section_idx, tag, by_tag[tag])
+    out.write_lines(_render_footer(today))
+    return total
+
+
+@contextmanager
+def _atomic_output(path: Path) -> Iterator[BinaryIO]:
+    """先写入同目录下的临时文件，成功后原子替换目标文件；出错时删除临时文件"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb", buffering=WRITE_BUFFER_SIZE) as stream:
+            yield stream
+        os.replace(str(tmp), str(path))
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+
+
+def group_by_tag(docs: Iterable[EndpointDoc]) -> Tuple[Dict[str, List[EndpointDoc]], int]:
+    """按分组（首个 tag，没有时由路径推断）归类，返回 (分组 → 端点, 端点总数)"""
+    by_tag: Dict[str, List[EndpointDoc]] = {}
+    total = 0
     for doc in docs:
         tag = (doc.tags[0] if doc.tags else _infer_tag_from_path(doc.endpoint.path))
         by_tag.setdefault(tag, []).append(doc)
+        total += 1
+    return by_tag, total
+
 
-    lines: List[str] = [
+def _render_header(project_name: str, version: str, base_url: str, total: int, today: str) -> List[str]:
+    """文档信息、概述与「接口列表」标题"""
+    return [
         f"# {project_name} API 接口文档",
         "",
         "## 文档信息",
@@ -355,7 +839,7 @@ def render_api_md(
         f"| 版本 | v{version} |",
         f"| 最后更新 | {today} |",
         f"| 基础 URL | `{base_url}` |",
-        f"| 接口总数 | {len(docs)} |",
+        f"| 接口总数 | {total} |",
         "",
         "---",
         "",
@@ -374,17 +858,31 @@ def render_api_md(
         "",
     ]
 
-    section_idx = 0
-    for tag in sorted(by_tag.keys()):
-        section_idx += 1
-        endpoints = sorted(by_tag[tag], key=lambda d: (d.endpoint.path, d.endpoint.method))
-        lines.append(f"### 2.{section_idx} {tag}")
+
+def _section_heading(section_idx: int, tag: str) -> str:
+    return f"### 2.{section_idx} {tag}"
+
+
+def _sorted_section(docs: List[EndpointDoc]) -> List[EndpointDoc]:
+    return sorted(docs, key=lambda d: (d.endpoint.path, d.endpoint.method))
+
+
+def _write_tag_section(out: MarkdownWriter, section_idx: int, tag: str, docs: List[EndpointDoc]) -> None:
+    """写出单个分组的全部端点（按路径、方法排序），逐个端点编码写出"""
+    out.write_lines((_section_heading(section_idx, tag), ""))
+    _write_endpoints(out, docs)
+
+
+def _write_endpoints(out: MarkdownWriter, docs: List[EndpointDoc]) -> None:
+    for doc in _sorted_section(docs):
+        lines = _render_endpoint(doc)
         lines.append("")
-        for doc in endpoints:
-            lines.extend(_render_endpoint(doc))
-            lines.append("")
+        out.write_lines(lines)
 
-    lines.extend([
+
+def _render_footer(today: str) -> List[str]:
+    """错误码说明与附录（每行写出时附带换行，文档以换行结尾）"""
+    return [
         "---",
         "",
         "## 3. 错误码说明",
@@ -405,10 +903,7 @@ def render_api_md(
         "",
         "- [API 变更日志](./API_CHANGELOG.md)",
         f"- 生成方式：`python scripts/generate_api_doc.py`（{today}）",
-        "",
-    ])
-
-    return "\n".join(lines)
+    ]
 
 
 def _infer_tag_from_path(path: str) -> str:
@@ -427,6 +922,7 @@ def _infer_tag_from_path(path: str) -> str:
 def _render_endpoint(doc: EndpointDoc) -> List[str]:
     """渲染单个端点的 Markdown 段落"""
     ep = doc.endpoint
+    resolver = doc.resolver or _NO_SPEC
     summary = doc.summary or doc.endpoint.function or "（无描述）"
     out: List[str] = [
         f"#### `{ep.method} {ep.path}` — {summary}",
@@ -460,9 +956,12 @@ def _render_endpoint(doc: EndpointDoc) -> List[str]:
         out.append("| 参数 | 位置 | 类型 | 必填 | 描述 |")
         out.append("|------|------|------|------|------|")
         for p in doc.parameters:
+            p, p_file = resolver.deref(p)
             if not isinstance(p, dict):
                 continue
-            schema = p.get("schema", {}) or {}
+            schema, _ = resolver.deref(p.get("schema", {}) or {}, p_file)
+            if not isinstance(schema, dict):
+                schema = {}
             out.append(
                 f"| `{p.get('name', '?')}` | {p.get('in', '?')} | "
                 f"{schema.get('type', '?')} | {'是' if p.get('required') else '否'} | "
@@ -472,10 +971,11 @@ def _render_endpoint(doc: EndpointDoc) -> List[str]:
 
     # 请求体
     if doc.request_body:
+        request_body, rb_file = resolver.deref(doc.request_body)
         out.append("**请求体**")
         out.append("")
         out.append("```json")
-        out.append(_pretty_request_body(doc.request_body))
+        out.append(_pretty_request_body(request_body, resolver, rb_file))
         out.append("```")
         out.append("")
 
@@ -486,6 +986,7 @@ def _render_endpoint(doc: EndpointDoc) -> List[str]:
         out.append("| 状态码 | 描述 |")
         out.append("|--------|------|")
         for code, resp in doc.responses.items():
+            resp, _ = resolver.deref(resp)
             if isinstance(resp, dict):
                 desc = (resp.get("description") or "").strip() or "-"
                 out.append(f"| {code} | {desc} |")
@@ -494,47 +995,496 @@ def _render_endpoint(doc: EndpointDoc) -> List[str]:
     return out
 
 
-def _pretty_request_body(rb: Dict) -> str:
-    """从 OpenAPI requestBody 提取一个示例 JSON"""
+def _pretty_request_body(rb: Dict, resolver: Optional[RefResolver] = None, file: Optional[str] = None) -> str:
+    """从 OpenAPI requestBody 提取一个示例 JSON；schema 中的 $ref 经 resolver 解析"""
+    if not isinstance(rb, dict):
+        return "{}"
     content = rb.get("content", {}) or {}
     json_section = content.get("application/json", {})
     if "example" in json_section:
-        import json
         return json.dumps(json_section["example"], ensure_ascii=False, indent=2)
     schema = json_section.get("schema", {})
     if schema:
-        import json
-        return json.dumps(_schema_to_example(schema), ensure_ascii=False, indent=2)
+        return json.dumps(_schema_to_example(schema, resolver, file), ensure_ascii=False, indent=2)
     return "{}"
 
 
-def _schema_to_example(schema: Dict) -> object:
-    """根据 schema 生成简单示例（不解析 $ref）"""
-    if not isinstance(schema, dict):
+def _schema_to_example(schema: Dict, resolver: Optional[RefResolver] = None, file: Optional[str] = None) -> object:
+    """根据 schema 生成简单示例（$ref、allOf/oneOf/anyOf 由 RefResolver 处理）"""
+    return (resolver or _NO_SPEC).example(schema, file)
+
+
+# ==================== 增量渲染 ====================
+
+# 增量渲染状态所在的子目录（位于缓存目录下）
+RENDER_STATE_SUBDIR = "render"
+# 指向外部文件的 $ref 值（如 common.yaml#/Error），不含以 # 开头的文档内引用
+_EXTERNAL_REF_RE = re.compile(r"""["']?\$ref["']?\s*:\s*["']?([^"'#\s,}]+)""")
+
+
+def openapi_fingerprint(path: str) -> str:
+    """规范文件及其直接、间接引用的外部文件的内容指纹：任一文件变化，指纹即变化"""
+    pending = [Path(path).resolve()]
+    seen = set()
+    parts: List[str] = []
+    while pending:
+        file = pending.pop()
+        if file in seen:
+            continue
+        seen.add(file)
+        try:
+            data = file.read_bytes()
+        except OSError:
+            parts.append(f"{file}:-")
+            continue
+        parts.append(f"{file}:{blob_sha(data)}")
+        for match in _EXTERNAL_REF_RE.finditer(data.decode("utf-8", errors="replace")):
+            if "://" not in match.group(1):
+                pending.append((file.parent / match.group(1)).resolve())
+    return content_version(*sorted(parts))
+
+
+def _section_fingerprint(tag: str, docs: List[EndpointDoc], spec_fingerprint: str) -> str:
+    """分组的输入指纹：决定渲染结果的全部字段（不含分组序号）；
+    来自 OpenAPI 的端点额外带上规范指纹，被引用的组件变化时同样视为变化"""
+    digest = hashlib.sha1(tag.encode("utf-8"))
+    for doc in docs:
+        ep = doc.endpoint
+        digest.update(json.dumps(
+            [ep.method, ep.path, ep.function, ep.framework, ep.file, ep.line,
+             doc.summary, doc.description, doc.parameters, doc.request_body, doc.responses, doc.tags,
+             spec_fingerprint if doc.resolver is not None else ""],
+            ensure_ascii=False, default=str, separators=(",", ":"),
+        ).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def write_api_md_incremental(
+    docs: Iterable[EndpointDoc],
+    output: str,
+    cache_dir: str = CACHE_DIR,
+    project_name: str = "项目",
+    version: str = "1.0.0",
+    base_url: str = "https://api.example.com",
+    spec_fingerprint: str = "",
+) -> Tuple[bool, int, int]:
+    """增量更新 API.md，返回 (是否写入, 重新渲染的分组数, 复用的分组数)。
+
+    上次生成时在缓存目录记下每个分组的输入指纹及其在文件中的字节范围。本次只渲染指纹变化的分组，
+    其余分组从现有文件中按字节范围复制（分组序号变化时只改标题行）；页眉、页脚很短，总是重新生成。
+    所有分组与页眉输入都没变时不写文件，日期也保持不变。现有文件被手工改动过
+    （内容摘要与记录不符）或渲染代码变化时整体重新生成，结果与 write_api_md 完全一致。
+    """
+    today = datetime.now().strftime("%Y-%m-%d")
+    by_tag, total = group_by_tag(docs)
+    sections = [(tag, by_tag[tag]) for tag in sorted(by_tag)]
+    keys = [(tag, _section_fingerprint(tag, _sorted_section(items), spec_fingerprint)) for tag, items in sections]
+    header_fp = content_version(project_name, version, base_url, str(total))
+    render_version = content_version(Path(__file__).read_bytes())
+
+    out_path = Path(output)
+    state_path = Path(cache_dir) / RENDER_STATE_SUBDIR / f"{content_version(str(out_path.resolve()))}.json"
+    previous: Dict[Tuple[str, str], Tuple[int, int]] = {}
+    try:
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+        valid = (
+            isinstance(state, dict)
+            and state.get("version") == render_version
+            and state.get("digest") == _file_sha1(out_path)
+        )
+    except (OSError, ValueError):
+        valid = False
+    if valid:
+        if state.get("header") == header_fp and [(tag, fp) for tag, fp, _length in state["sections"]] == keys:
+            return False, 0, len(sections)
+        offset = state["header_len"]
+        for tag, fp, length in state["sections"]:
+            previous[(tag, fp)] = (offset, length)
+            offset += length
+
+    layout = []
+    rendered = 0
+    with _atomic_output(out_path) as stream, (open(out_path, "rb") if previous else nullcontext()) as old:
+        out = MarkdownWriter(stream)
+        out.write_lines(_render_header(project_name, version, base_url, total, today))
+        header_len = out.size
+        for section_idx, ((tag, items), (_tag, fp)) in enumerate(zip(sections, keys), 1):
+            start = out.size
+            span = previous.get((tag, fp))
+            if span is not None:
+                # 内容未变：按新序号重写标题行，其余字节原样复制
+                old.seek(span[0])
+                remaining = span[1] - len(old.readline())
+                out.write_lines((_section_heading(section_idx, tag),))
+                while remaining > 0:
+                    chunk = old.read(min(remaining, WRITE_BUFFER_SIZE))
+                    if not chunk:
+                        break
+                    out.write_bytes(chunk)
+                    remaining -= len(chunk)
+            else:
+                _write_tag_section(out, section_idx, tag, items)
+                rendered += 1
+            layout.append([tag, fp, out.size - start])
+        out.write_lines(_render_footer(today))
+
+    _save_render_state(state_path, {
+        "version": render_version,
+        "digest": out.hexdigest(),
+        "header": header_fp,
+        "header_len": header_len,
+        "sections": layout,
+    })
+    return True, rendered, len(sections) - rendered
+
+
+def _file_sha1(path: Path) -> str:
+    """分块计算文件内容的 SHA-1，不把整个文件读入内存"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(WRITE_BUFFER_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _save_render_state(path: Path, state: Dict) -> None:
+    """原子写入增量渲染状态；失败只告警（下次整体重新生成）"""
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    try:
+        ensure_cache_directory(path.parent.parent)
+        path.parent.mkdir(exist_ok=True)
+        tmp.write_text(json.dumps(state, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(str(tmp), str(path))
+    except OSError as e:
+        print(f"[警告] 无法写入增量渲染状态 {path}: {e}", file=sys.stderr)
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+# ==================== 分片输出 ====================
+
+# 分片文件首行标记：清理过期分片时只删除带此标记的文件，不误删手写文档
+SHARD_MARKER = "<!-- dev-docs: split-by tag -->"
+# 分片数不足该值时串行渲染（进程启动与传输的开销大于收益）
+PARALLEL_MIN_SHARDS = 4
+_INDEX_DATE_RE = re.compile(r"^\| 最后更新 \| (\d{4}-\d{2}-\d{2}) \|$", re.MULTILINE)
+
+
+def shard_directory(output: str) -> Path:
+    """分片目录：与索引文件同级、以其文件名（不含扩展名）命名，如 docs/api/API.md → docs/api/API/；
+    索引文件没有扩展名时加 .d 后缀，避免与索引同名"""
+    path = Path(output)
+    return path.with_name(path.stem if path.suffix else f"{path.name}.d")
+
+
+def shard_names(tags: Iterable[str]) -> Dict[str, str]:
+    """分组 → 分片文件名（不含 .md）：非文件名字符替换为 -；
+    忽略大小写后重名的（如 Users 与 users）按分组排序依次加 -2、-3，保证结果稳定"""
+    names: Dict[str, str] = {}
+    used = set()
+    for tag in sorted(tags):
+        base = re.sub(r"[^\w.-]+", "-", tag).strip("-.") or "default"
+        name, suffix = base, 2
+        while name.lower() in used:
+            name, suffix = f"{base}-{suffix}", suffix + 1
+        used.add(name.lower())
+        names[tag] = name
+    return names
+
+
+def write_split_docs(
+    docs: Iterable[EndpointDoc],
+    output: str,
+    project_name: str = "项目",
+    version: str = "1.0.0",
+    base_url: str = "https://api.example.com",
+    jobs: int = 1,
+) -> Tuple[int, int, bool, int]:
+    """按分组拆分输出：每个分组一个 Markdown 文件，output 为带各分组接口数与链接的索引。
+
+    返回 (分片数, 重写的分片数, 索引是否重写, 删除的过期分片数)。
+
+    分片内不含日期，内容与现有文件相同时不重写（mtime 不变，diff 只涉及真正变化的分组）；
+    索引沿用现有文件中的日期渲染，同样只在内容变化时才重写并更新日期。
+    分片由 jobs 个进程并行渲染（0 表示全部 CPU），不再对应任何分组的旧分片会被删除。
+    """
+    by_tag, total = group_by_tag(docs)
+    names = shard_names(by_tag)
+    directory = shard_directory(output)
+    directory.mkdir(parents=True, exist_ok=True)
+    meta = (project_name, version, base_url, Path(output).name)
+    shards = [(tag, names[tag], by_tag[tag]) for tag in sorted(by_tag)]
+
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    changed: Optional[List[bool]] = None
+    if jobs > 1 and len(shards) >= PARALLEL_MIN_SHARDS:
+        changed = _write_shards_parallel(shards, str(directory), meta, jobs)
+    if changed is None:
+        changed = _write_shard_batch(shards, str(directory), meta)
+
+    removed = 0
+    current = {f"{name}.md" for name in names.values()}
+    for entry in sorted(directory.glob("*.md")):
+        if entry.name not in current and _is_shard(entry):
+            entry.unlink()
+            removed += 1
+
+    # 先按现有索引里的日期渲染：内容相同说明没有变化，日期也保持不变
+    index_path = Path(output)
+    try:
+        old = index_path.read_bytes()
+    except OSError:
+        old = b""
+    match = _INDEX_DATE_RE.search(old.decode("utf-8", errors="replace"))
+    if match and _render_index(shards, directory.name, meta, total, match.group(1)) == old:
+        index_written = False
+    else:
+        today = datetime.now().strftime("%Y-%m-%d")
+        index_written = _write_if_changed(index_path, _render_index(shards, directory.name, meta, total, today))
+    return len(shards), sum(changed), index_written, removed
+
+
+def _write_shards_parallel(
+    shards: List[Tuple[str, str, List[EndpointDoc]]],
+    directory: str,
+    meta: Tuple[str, str, str, str],
+    jobs: int,
+) -> Optional[List[bool]]:
+    """把分片分给 jobs 个进程渲染写出，按 shards 顺序返回各分片是否重写；进程池无法启动时返回 None。
+
+    每个进程只分到一个批次（按端点数贪心均衡）：同一规范的端点共享 RefResolver，
+    一个批次只序列化一次，规范不会随每个分片重复传输。
+    """
+    try:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=jobs)
+    except (ImportError, NotImplementedError, OSError) as e:
+        print(f"[警告] 无法启动进程池（{e}），改为串行渲染", file=sys.stderr)
         return None
-    if "example" in schema:
-        return schema["example"]
-    typ = schema.get("type")
-    if typ == "string":
-        return schema.get("default", "string")
-    if typ == "integer":
-        return schema.get("default", 0)
-    if typ == "number":
-        return schema.get("default", 0.0)
-    if typ == "boolean":
-        return schema.get("default", False)
-    if typ == "array":
-        return [_schema_to_example(schema.get("items", {}))]
-    if typ == "object" or "properties" in schema:
-        result = {}
-        for name, prop_schema in (schema.get("properties") or {}).items():
-            result[name] = _schema_to_example(prop_schema)
-        return result
-    return None
+
+    loads = [0] * jobs
+    batches: List[List[int]] = [[] for _ in range(jobs)]
+    for i in sorted(range(len(shards)), key=lambda i: -len(shards[i][2])):
+        lightest = loads.index(min(loads))
+        batches[lightest].append(i)
+        loads[lightest] += len(shards[i][2])
+    batches = [batch for batch in batches if batch]
+
+    changed = [False] * len(shards)
+    with executor:
+        results = executor.map(
+            _write_shard_batch,
+            [[shards[i] for i in batch] for batch in batches],
+            [directory] * len(batches),
+            [meta] * len(batches),
+        )
+        for batch, flags in zip(batches, results):
+            for i, flag in zip(batch, flags):
+                changed[i] = flag
+    return changed
+
+
+def _write_shard_batch(
+    batch: List[Tuple[str, str, List[EndpointDoc]]],
+    directory: str,
+    meta: Tuple[str, str, str, str],
+) -> List[bool]:
+    """进程池工作函数：渲染一批分片并写出有变化的，逐个返回是否重写"""
+    return [
+        _write_if_changed(Path(directory) / f"{name}.md", _render_shard(tag, docs, meta))
+        for tag, name, docs in batch
+    ]
+
+
+def _render_shard(tag: str, docs: List[EndpointDoc], meta: Tuple[str, str, str, str]) -> bytes:
+    """单个分组的分片：标记行、标题、返回索引的链接，以及按路径、方法排序的全部端点"""
+    project_name, version, base_url, index_name = meta
+    buffer = io.BytesIO()
+    out = MarkdownWriter(buffer)
+    out.write_lines([
+        SHARD_MARKER,
+        f"# {project_name} API 接口文档 · {tag}",
+        "",
+        f"> 版本 v{version} · 基础 URL `{base_url}` · {len(docs)} 个接口 · [返回索引](../{quote(index_name)})",
+        "",
+    ])
+    _write_endpoints(out, docs)
+    return buffer.getvalue()
+
+
+def _render_index(
+    shards: List[Tuple[str, str, List[EndpointDoc]]],
+    directory_name: str,
+    meta: Tuple[str, str, str, str],
+    total: int,
+    today: str,
+) -> bytes:
+    """索引：与单文件相同的页眉、页脚，接口列表换成各分组的接口数与分片链接"""
+    project_name, version, base_url, _index_name = meta
+    lines = _render_header(project_name, version, base_url, total, today)
+    lines += ["| 分组 | 接口数 |", "|------|--------|"]
+    for tag, name, docs in shards:
+        label = tag.replace("\\", "\\\\").replace("|", "\\|").replace("[", "\\[").replace("]", "\\]")
+        lines.append(f"| [{label}]({quote(f'{directory_name}/{name}.md')}) | {len(docs)} |")
+    lines.append("")
+    lines += _render_footer(today)
+    return "".join(line + "\n" for line in lines).encode("utf-8")
+
+
+def _is_shard(path: Path) -> bool:
+    """文件首行是否为分片标记"""
+    try:
+        with open(path, "rb") as f:
+            return f.readline().rstrip(b"\r\n") == SHARD_MARKER.encode("utf-8")
+    except OSError:
+        return False
+
+
+def _write_if_changed(path: Path, data: bytes) -> bool:
+    """内容与现有文件不同时原子写入，返回是否写入；相同时不动文件"""
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    with _atomic_output(path) as stream:
+        stream.write(data)
+    return True
 
 
 # ==================== 主流程 ====================
 
+def _counted(docs: Iterable[EndpointDoc], counts: Dict[str, int], label: str) -> Iterator[EndpointDoc]:
+    """透传 docs，同时把条数累计到 counts[label]（用于流式消费后的统计输出）"""
+    counts[label] = 0
+    for doc in docs:
+        counts[label] += 1
+        yield doc
+
+
+def _benchmark_walk(count: int = 500_000) -> None:
+    """在临时目录生成约 count 个文件的树，对比旧版递归 iterdir 与 scandir 迭代遍历"""
+    import shutil
+    import tempfile
+    import time
+
+    def walk_iterdir(root: Path) -> Iterator[Path]:
+        # 旧实现：递归 + 每个条目一次 is_dir()
+        for child in root.iterdir():
+            if child.name in SKIP_DIRS or child.name.startswith("."):
+                continue
+            if child.is_dir():
+                yield from walk_iterdir(child)
+            elif child.suffix in SOURCE_SUFFIXES:
+                yield child
+
+    suffixes = (".py", ".ts", ".java", ".go", ".md", ".json", ".js", ".txt")
+    per_dir = 50
+    tmp = Path(tempfile.mkdtemp(prefix="walk-bench-"))
+    try:
+        print(f"生成 {count} 个文件 …", file=sys.stderr)
+        made = 0
+        d = 0
+        while made < count:
+            # 三层目录：a{i}/b{j}/c{k}，每个叶子目录 per_dir 个文件；夹杂需跳过的目录
+            leaf = tmp / f"a{d // 400}" / f"b{d // 20 % 20}" / f"c{d % 20}"
+            if d % 97 == 0:
+                leaf = leaf / "node_modules"
+            leaf.mkdir(parents=True)
+            for i in range(min(per_dir, count - made)):
+                (leaf / f"f{i}{suffixes[i % len(suffixes)]}").touch()
+            made += per_dir
+            d += 1
+
+        timings = {}
+        found = {}
+        for label, walk in (
+            ("iterdir 递归", lambda: [str(p.relative_to(tmp)) for p in walk_iterdir(tmp)]),
+            ("scandir 迭代", lambda: [rel for _, rel in _walk_source_files(tmp)]),
+        ):
+            start = time.perf_counter()
+            found[label] = walk()
+            timings[label] = time.perf_counter() - start
+        old, new = found.values()
+        assert old == new, "两种遍历结果不一致"
+        for label, seconds in timings.items():
+            print(f"{label}: {seconds:.2f}s（{len(found[label])} 个源码文件）")
+        base, fast = timings.values()
+        print(f"加速比: {base / fast:.1f}x")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _benchmark_render(count: int = 40_000) -> None:
+    """基准：对比「拼接整篇字符串再写入」与 write_api_md 流式写出的峰值内存（tracemalloc）
+
+    合成 count 个带请求体示例的端点，再取其四分之一做对照：
+    流式写出的峰值应基本不随端点数增长，整篇拼接则与输出大小成正比。
+    端点列表在测量前已建好，不计入峰值。
+    """
+    import tempfile
+    import time
+    import tracemalloc
+
+    def build(n: int) -> List[EndpointDoc]:
+        body = {"content": {"application/json": {"schema": {
+            "type": "object",
+            "properties": {f"field{k}": {"type": "string"} for k in range(12)},
+        }}}}
+        return [
+            EndpointDoc(
+                endpoint=Endpoint(method="POST", path=f"/api/v1/group{i % 200}/items/{i}",
+                                  function=f"handler_{i}", framework="FastAPI",
+                                  file=f"app/group{i % 200}.py", line=i % 500 + 1),
+                summary=f"接口 {i}",
+                request_body=body,
+            )
+            for i in range(n)
+        ]
+
+    def joined(docs: List[EndpointDoc], path: str) -> None:
+        # 旧实现：所有行放进一个列表，join 成整篇字符串后一次写入
+        today = datetime.now().strftime("%Y-%m-%d")
+        by_tag, total = group_by_tag(docs)
+        lines = _render_header("项目", "1.0.0", "https://api.example.com", total, today)
+        for section_idx, tag in enumerate(sorted(by_tag), 1):
+            lines.extend((_section_heading(section_idx, tag), ""))
+            for doc in _sorted_section(by_tag[tag]):
+                lines.extend(_render_endpoint(doc))
+                lines.append("")
+        lines.extend(_render_footer(today))
+        Path(path).write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+
+    def streamed(docs: List[EndpointDoc], path: str) -> None:
+        with _atomic_output(Path(path)) as stream:
+            write_api_md(docs, stream)
+
+    print("=" * 60)
+    print("API.md 渲染峰值内存（不含端点列表本身）")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory(prefix="render-bench-") as tmp:
+        for n in (count // 4, count):
+            docs = build(n)
+            outputs = []
+            for label, render in (("整篇拼接", joined), ("流式写出", streamed)):
+                path = str(Path(tmp) / f"{label}.md")
+                tracemalloc.start()
+                started = time.perf_counter()
+                render(docs, path)
+                elapsed = time.perf_counter() - started
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                outputs.append(Path(path).read_bytes())
+                print(f"{n:>8,} 个端点  {label}  峰值 {peak / 1024 / 1024:8.1f} MiB  {elapsed:6.2f}s")
+            # 日期相同的前提下两种方式输出必须逐字节一致
+            assert outputs[0] == outputs[1], "流式写出与整篇拼接的结果不一致"
+            print(f"{'':>8}  输出 {len(outputs[1]) / 1024 / 1024:.1f} MiB，逐字节一致")
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="从 OpenAPI 或源码生成完整 API.md")
     parser.add_argument("--openapi", help="OpenAPI 规范文件（.yaml/.json）")
@@ -543,39 +1493,139 @@ def main() -> None:
     parser.add_argument("--project-name", default="项目", help="项目名称")
     parser.add_argument("--version", default="1.0.0", help="API 版本")
     parser.add_argument("--base-url", default="https://api.example.com", help="基础 URL")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="源码扫描与分片渲染的并行进程数（0 表示全部 CPU，默认 1 即串行）")
+    parser.add_argument("--include", action="append", default=[], metavar="GLOB",
+                        help="只扫描匹配的文件（可多次指定）")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                        help="排除匹配的文件；匹配的目录整棵跳过（可多次指定）")
+    parser.add_argument("--follow-symlinks", action="store_true", default=True,
+                        help="进入指向目录的符号链接（默认行为，自动检测链接环）")
+    parser.add_argument("--no-follow-symlinks", dest="follow_symlinks", action="store_false",
+                        help="不进入指向目录的符号链接")
+    parser.add_argument("--git-files", action="store_true",
+                        help="用 git ls-files 列出候选文件，跳过 .gitignore 忽略的内容")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="不读写扫描缓存与 OpenAPI 解析缓存，全部重新解析")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help=f"扫描缓存目录（默认 {CACHE_DIR}）")
+    parser.add_argument("--incremental", action="store_true",
+                        help="只重新渲染端点有变化的分组并拼入现有文件；没有变化时不写文件")
+    parser.add_argument("--split-by", choices=["tag"],
+                        help="按分组拆分：每个分组写入与输出文件同名目录下的一个文件，输出文件改为索引；"
+                             "只重写内容有变化的文件")
+    parser.add_argument("--bench-walk", type=int, nargs="?", const=500_000, metavar="N",
+                        help="基准测试：对比新旧目录遍历（默认 500000 个文件）")
+    parser.add_argument("--bench-render", type=int, nargs="?", const=40_000, metavar="N",
+                        help="基准测试：对比整篇拼接与流式写出的峰值内存（默认 40000 个端点）")
+    add_scan_limit_arguments(parser)
     args = parser.parse_args()
+    for flag, value in (("--bench-walk", args.bench_walk), ("--bench-render", args.bench_render)):
+        if value is not None and value < 1:
+            parser.error(f"{flag} 的 N 必须为正整数")
+    if args.bench_walk is not None:
+        _benchmark_walk(args.bench_walk)
+        return
+    if args.bench_render is not None:
+        _benchmark_render(args.bench_render)
+        return
+    if args.jobs < 0:
+        parser.error("--jobs 不能为负数")
 
     if not args.openapi and not args.source:
         parser.error("至少指定 --openapi 或 --source 之一")
+    if args.incremental and args.no_cache:
+        parser.error("--incremental 需要在缓存目录中记录分组指纹，不能与 --no-cache 同时使用")
+    if args.incremental and args.split_by:
+        parser.error("--split-by 本身只重写有变化的文件，不能与 --incremental 同时使用")
 
-    sources: List[List[EndpointDoc]] = []
+    # 各来源以生成器形式交给 merge_docs 逐条消费，扫描结果不会整体驻留内存
+    sources: List[Iterable[EndpointDoc]] = []
+    counts: Dict[str, int] = {}
+    skipped: List[SkippedFile] = []
 
     if args.openapi:
         print(f"解析 OpenAPI: {args.openapi}", file=sys.stderr)
-        openapi_docs = from_openapi(args.openapi)
-        print(f"  → {len(openapi_docs)} 个端点", file=sys.stderr)
-        sources.append(openapi_docs)
+        spec_cache_dir = None if args.no_cache else args.cache_dir
+        sources.append(_counted(from_openapi(args.openapi, spec_cache_dir), counts, "OpenAPI"))
 
+    cache: Optional[ScanCache] = None
     if args.source:
         print(f"扫描源码: {args.source}", file=sys.stderr)
-        source_docs = scan_source(args.source)
-        print(f"  → {len(source_docs)} 个端点", file=sys.stderr)
-        sources.append(source_docs)
+        limits = scan_limits_from_args(args)
+        if not args.no_cache:
+            cache = ScanCache.open(args.cache_dir, cache_version(limits))
+        sources.append(_counted(
+            iter_scan_source(
+                args.source,
+                limits,
+                skipped,
+                args.jobs,
+                WalkOptions(
+                    include=tuple(args.include),
+                    exclude=tuple(args.exclude),
+                    follow_symlinks=args.follow_symlinks,
+                    git_files=args.git_files,
+                ),
+                cache,
+            ),
+            counts,
+            "源码",
+        ))
 
     merged = merge_docs(*sources)
+    for label, count in counts.items():
+        print(f"  → {label} {count} 个端点", file=sys.stderr)
+    if cache is not None:
+        print(f"  → 缓存命中 {cache.hits} 个文件，重新提取 {cache.misses} 个", file=sys.stderr)
+        cache.save()
+    if skipped:
+        print(f"[警告] 跳过 {len(skipped)} 个文件：", file=sys.stderr)
+        for item in skipped:
+            print(f"  - {item.file}：{item.reason}", file=sys.stderr)
     if not merged:
         print("[警告] 未识别到任何端点，输出空文档", file=sys.stderr)
 
-    output = render_api_md(
-        merged,
-        project_name=args.project_name,
-        version=args.version,
-        base_url=args.base_url,
-    )
+    if args.incremental:
+        written, rendered, reused = write_api_md_incremental(
+            merged,
+            args.output,
+            args.cache_dir,
+            project_name=args.project_name,
+            version=args.version,
+            base_url=args.base_url,
+            spec_fingerprint=openapi_fingerprint(args.openapi) if args.openapi else "",
+        )
+        if written:
+            print(f"✅ 已增量更新 API 文档: {args.output}（{len(merged)} 个端点；"
+                  f"重新渲染 {rendered} 个分组，复用 {reused} 个）", file=sys.stderr)
+        else:
+            print(f"✅ API 文档无变化，未写入: {args.output}", file=sys.stderr)
+        return
+
+    if args.split_by:
+        shards, written, index_written, removed = write_split_docs(
+            merged,
+            args.output,
+            project_name=args.project_name,
+            version=args.version,
+            base_url=args.base_url,
+            jobs=args.jobs,
+        )
+        print(f"✅ 已按分组拆分 API 文档: {args.output} + {shard_directory(args.output)}/（{len(merged)} 个端点，"
+              f"{shards} 个分组；重写 {written} 个分片，{shards - written} 个无变化"
+              f"{f'，删除 {removed} 个过期分片' if removed else ''}；"
+              f"索引{'已更新' if index_written else '无变化'}）", file=sys.stderr)
+        return
 
-    out_path = Path(args.output)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_text(output, encoding="utf-8")
+    with _atomic_output(Path(args.output)) as stream:
+        write_api_md(
+            merged,
+            stream,
+            project_name=args.project_name,
+            version=args.version,
+            base_url=args.base_url,
+        )
     print(f"✅ 已生成 API 文档: {args.output}（{len(merged)} 个端点）", file=sys.stderr)
 
 
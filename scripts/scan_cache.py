@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+源码扫描结果的持久化缓存
+
+为 generate_api_doc.py 与 analyze_changes.py 提供跨运行、跨脚本共享的端点提取缓存：
+同一份内容（git blob）无论出现在哪个 ref、分支或路径，只要适用的框架模式相同，都只解析一次。
+
+设计：
+    1. 内容寻址：提取结果按「文件内容的 git blob SHA-1 + 该路径适用的模式签名」存放（blobs）——
+       重命名、复制、切换分支后内容与适用模式都相同的文件直接命中；
+       适用模式不同的路径（如 urls.py 与普通 .py）即使内容相同也分别提取
+    2. 路径索引：files 记录 路径 → (mtime_ns, size, 缓存键)；
+       mtime 与大小都没变时不读文件即命中，否则读文件算哈希再查 blobs
+    3. 版本：缓存整体带一个版本号（由模式库源码、提取代码与扫描阈值算出），
+       任何一项变化都会让旧缓存整体失效
+    4. LRU 容量上限：blobs 按最近使用排序，保存时从最久未用的一端淘汰，
+       直到序列化大小不超过上限；指向被淘汰 blob 的路径记录一并删除
+
+缓存文件是单个 JSON（默认 .dev-docs-cache/scan.json），写入时先写临时文件再原子替换。
+缓存只是加速手段：文件损坏、版本不符、目录不可写时都退化为完整扫描，不影响结果。
+
+同一目录下的 specs/ 保存解析后的 OpenAPI 规范（marshal 格式，按文本内容哈希命名），
+再次遇到同一份 YAML 规范时直接加载，跳过 YAML 解析。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import marshal
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# 默认缓存目录（相对当前工作目录）
+CACHE_DIR = ".dev-docs-cache"
+# 默认容量上限：序列化后的 blobs 总字节数
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# 缓存文件格式版本；结构变化时递增，旧文件自动作废
+FORMAT_VERSION = 1
+# mtime 距写入时刻不足该值的文件不记录 stat：同一时间粒度内再次修改、
+# 且大小不变时 (mtime, size) 无法察觉（即 git 所说的 racy 文件），下次改用内容哈希校验
+_RACY_NS = 2_000_000_000
+# 解析后的规范缓存：子目录与保留份数（按最近使用淘汰）
+SPEC_SUBDIR = "specs"
+SPEC_CACHE_ENTRIES = 8
+
+
+def blob_sha(data: bytes) -> str:
+    """计算与 `git hash-object` 相同的 blob SHA-1"""
+    digest = hashlib.sha1(b"blob %d\0" % len(data))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def content_version(*parts: Union[str, bytes]) -> str:
+    """把若干源码/配置片段合成一个版本号（任一片段变化，版本号即变化）"""
+    digest = hashlib.sha1(b"dev-docs-cache %d" % FORMAT_VERSION)
+    for part in parts:
+        data = part.encode("utf-8") if isinstance(part, str) else part
+        digest.update(b"\0%d\0" % len(data))
+        digest.update(data)
+    return digest.hexdigest()[:16]
+
+
+def ensure_cache_directory(directory: Union[str, Path]) -> Path:
+    """创建缓存目录，并在其中放置忽略一切的 .gitignore，避免被 git status / ls-files 列出"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    ignore = directory / ".gitignore"
+    if not ignore.exists():
+        ignore.write_text("# 由 dev-docs 自动创建\n*\n", encoding="utf-8")
+    return directory
+
+
+class ScanCache:
+    """提取结果缓存：缓存键 → 记录列表（JSON 可序列化的行），外加 路径 → stat 索引。
+
+    键与记录的结构都由调用方决定：endpoint_scan.scan_cache_key 由 blob SHA 与路径的模式签名合成，
+    EndpointDoc 编码为不含文件路径的列表，因此内容与适用模式都相同的文件在任何路径下都能复用。
+    """
+
+    def __init__(self, path: Union[str, Path], version: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.version = version
+        self.max_bytes = max_bytes
+        # 两个字典的插入顺序即 LRU 顺序：越靠后越近期使用
+        self._blobs: Dict[str, List[list]] = {}
+        self._files: Dict[str, Tuple[int, int, str]] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def open(
+        cls,
+        directory: Union[str, Path] = CACHE_DIR,
+        version: str = "",
+        name: str = "scan.json",
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> "ScanCache":
+        """打开（或新建）缓存；文件不存在、损坏或版本不符时返回空缓存"""
+        cache = cls(Path(directory) / name, version, max_bytes)
+        try:
+            data = json.loads(cache.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return cache
+        except (OSError, ValueError) as e:
+            print(f"[警告] 缓存文件不可用，将重建: {cache.path}（{e}）", file=sys.stderr)
+            cache._dirty = True
+            return cache
+        if not isinstance(data, dict) or data.get("version") != version:
+            # 模式库或提取逻辑已变化：整体作废
+            cache._dirty = True
+            return cache
+        cache._blobs = data.get("blobs", {})
+        cache._files = {key: tuple(value) for key, value in data.get("files", {}).items()}
+        return cache
+
+    # ---------- 查询 ----------
+
+    def lookup_file(self, key: str, mtime_ns: int, size: int) -> Optional[str]:
+        """按 stat 查路径索引：mtime 与大小都一致且对应记录仍在缓存中时返回缓存键"""
+        entry = self._files.get(key)
+        if entry is None or entry[0] != mtime_ns or entry[1] != size:
+            return None
+        sha = entry[2]
+        return sha if sha in self._blobs else None
+
+    def get(self, sha: str) -> Optional[List[list]]:
+        """按缓存键取提取结果，命中时标记为最近使用"""
+        rows = self._blobs.pop(sha, None)
+        if rows is None:
+            self.misses += 1
+            return None
+        self._blobs[sha] = rows
+        self.hits += 1
+        self._dirty = True
+        return rows
+
+    # ---------- 写入 ----------
+
+    def put(self, sha: str, rows: List[list]) -> None:
+        """记录某个内容的提取结果"""
+        self._blobs.pop(sha, None)
+        self._blobs[sha] = rows
+        self._dirty = True
+
+    def record_file(self, key: str, mtime_ns: int, size: int, sha: str) -> None:
+        """记录路径当前的 stat 与缓存键；刚修改过的（racy）文件不记录 stat"""
+        if time.time_ns() - mtime_ns < _RACY_NS:
+            mtime_ns = -1
+        self._files.pop(key, None)
+        self._files[key] = (mtime_ns, size, sha)
+        self._dirty = True
+
+    def save(self) -> None:
+        """按 LRU 裁剪到容量上限后原子写回；写入失败只告警"""
+        if not self._dirty:
+            return
+        self._evict()
+        payload = {
+            "version": self.version,
+            "files": self._files,
+            "blobs": self._blobs,
+        }
+        tmp = self.path.with_name(self.path.name + f".{os.getpid()}.tmp")
+        try:
+            self._ensure_directory()
+            tmp.write_text(
+                json.dumps(payload, ensure_ascii=False, separators=(",", ":")),
+                encoding="utf-8",
+            )
+            os.replace(str(tmp), str(self.path))
+        except OSError as e:
+            print(f"[警告] 无法写入缓存 {self.path}: {e}", file=sys.stderr)
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+            return
+        self._dirty = False
+
+    def _ensure_directory(self) -> None:
+        ensure_cache_directory(self.path.parent)
+
+    def _evict(self) -> None:
+        """从最久未用的一端淘汰 blob，直到序列化大小不超过 max_bytes"""
+        if self.max_bytes <= 0:
+            return
+        sizes = {
+            sha: len(sha) + len(json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+            for sha, rows in self._blobs.items()
+        }
+        # 路径索引按每条约 100 字节估算，计入总量
+        total = sum(sizes.values()) + 100 * len(self._files)
+        if total <= self.max_bytes:
+            return
+        for sha in list(self._blobs):
+            if total <= self.max_bytes:
+                break
+            del self._blobs[sha]
+            total -= sizes[sha]
+        live = self._blobs
+        for key in [key for key, entry in self._files.items() if entry[2] not in live]:
+            del self._files[key]
+
+
+# ==================== 规范解析缓存 ====================
+
+def spec_key(text: str) -> str:
+    """规范缓存键：文本内容哈希，外加 marshal 格式与解释器版本（marshal 不保证跨版本兼容）"""
+    return content_version(
+        blob_sha(text.encode("utf-8")),
+        f"spec/marshal{marshal.version}/py{sys.version_info[0]}.{sys.version_info[1]}",
+    )
+
+
+def load_spec(directory: Union[str, Path], key: str) -> Optional[Any]:
+    """读取缓存的解析结果；不存在或损坏时返回 None"""
+    path = Path(directory) / SPEC_SUBDIR / f"{key}.marshal"
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    try:
+        spec = marshal.loads(data)
+    except (EOFError, ValueError, TypeError):
+        return None
+    try:
+        os.utime(str(path))  # 刷新 mtime，作为 LRU 依据
+    except OSError:
+        pass
+    return spec
+
+
+def store_spec(directory: Union[str, Path], key: str, spec: Any) -> None:
+    """缓存解析结果并按最近使用只保留 SPEC_CACHE_ENTRIES 份。
+
+    含 marshal 不支持的类型（如 YAML 中未加引号的日期）时不缓存；写入失败只告警。
+    """
+    try:
+        data = marshal.dumps(spec)
+    except ValueError:
+        return
+    specs = Path(directory) / SPEC_SUBDIR
+    path = specs / f"{key}.marshal"
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    try:
+        ensure_cache_directory(directory)
+        specs.mkdir(exist_ok=True)
+        tmp.write_bytes(data)
+        os.replace(str(tmp), str(path))
+    except OSError as e:
+        print(f"[警告] 无法写入规范缓存 {path}: {e}", file=sys.stderr)
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        return
+    try:
+        entries = sorted(
+            ((entry.stat().st_mtime_ns, entry.path) for entry in os.scandir(specs) if entry.name.endswith(".marshal")),
+            reverse=True,
+        )
+        for _mtime, stale in entries[SPEC_CACHE_ENTRIES:]:
+            os.unlink(stale)
+    except OSError:
+        pass  # 与其他进程并发清理时忽略
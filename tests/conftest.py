@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""pytest 公共配置：scripts/ 下的脚本按顶层模块导入（与脚本之间的相互导入方式一致）；临时 git 仓库"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import analyze_changes  # noqa: E402
+
+
+@pytest.fixture
+def git_repo(tmp_path, monkeypatch):
+    """在临时目录初始化 git 仓库并切换为当前目录，返回执行 git 命令的函数"""
+    for name in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"):
+        monkeypatch.setenv(name, "test")
+    for name in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(name, "test@example.com")
+    monkeypatch.chdir(tmp_path)
+
+    def git(*args):
+        return subprocess.run(
+            ["git", *args], check=True, capture_output=True, text=True,
+        ).stdout
+
+    git("init", "-q")
+    # 共享的 cat-file 读取器绑定在启动时的仓库上，每个临时仓库各用一个
+    monkeypatch.setattr(analyze_changes, "_BLOB_READER", None)
+    yield git
+    if analyze_changes._BLOB_READER is not None:
+        analyze_changes._BLOB_READER.close()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""变更检测：porcelain v2 / name-status 的 -z 输出解析，重命名保留旧路径"""
+
+from analyze_changes import FileChange, _parse_name_status_z, _parse_porcelain_v2_z, get_changed_files
+
+ZERO = "0" * 40
+ONE = "1" * 40
+
+
+def test_porcelain_v2_rename_keeps_old_file():
+    out = "\0".join([
+        "# branch.oid " + ONE,
+        f"2 R. N... 100644 100644 100644 {ONE} {ONE} R100 src/new name.py",
+        "src/old name.py",
+        f"1 .M N... 100644 100644 100644 {ONE} {ONE} src/app.py",
+        f"1 A. N... 000000 100644 100644 {ZERO} {ONE} src/added.py",
+        "? src/untracked.py",
+        "",
+    ])
+    assert _parse_porcelain_v2_z(out) == [
+        FileChange(status="R", file="src/new name.py", old_file="src/old name.py"),
+        FileChange(status="M", file="src/app.py"),
+        FileChange(status="A", file="src/added.py"),
+        FileChange(status="A", file="src/untracked.py"),
+    ]
+
+
+def test_porcelain_v2_copy_is_added():
+    out = f"2 C. N... 100644 100644 100644 {ONE} {ONE} C100 src/copy.py\0src/orig.py\0"
+    assert _parse_porcelain_v2_z(out) == [FileChange(status="A", file="src/copy.py")]
+
+
+def test_name_status_rename_keeps_old_file():
+    out = "R087\0src/old.py\0src/new.py\0M\0src/app.py\0C100\0src/a.py\0src/b.py\0"
+    assert _parse_name_status_z(out) == [
+        FileChange(status="R", file="src/new.py", old_file="src/old.py"),
+        FileChange(status="M", file="src/app.py"),
+        FileChange(status="A", file="src/b.py"),
+    ]
+
+
+def test_staged_rename_in_real_repo(git_repo, tmp_path):
+    (tmp_path / "old.py").write_text("print('hello')\n" * 20, encoding="utf-8")
+    git_repo("add", "-A")
+    git_repo("commit", "-qm", "init")
+    git_repo("mv", "old.py", "new.py")
+
+    assert get_changed_files(None) == [FileChange(status="R", file="new.py", old_file="old.py")]
+    git_repo("commit", "-qm", "rename")
+    assert get_changed_files("HEAD~1") == [FileChange(status="R", file="new.py", old_file="old.py")]
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""导入开销检查：git hook 等短命令每次都要付模块导入的代价"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import api_patterns
+
+SCRIPTS_DIR = Path(api_patterns.__file__).resolve().parent
+
+
+def test_api_patterns_import_within_budget():
+    assert api_patterns._check_import_time() == 0
+
+
+@pytest.mark.parametrize("module", ["analyze_changes", "api_snapshots"])
+def test_does_not_import_generate_api_doc(module):
+    # 只需要按内容扫描与缓存编码，这些都在 endpoint_scan 中
+    code = f"import sys, {module}; print('generate_api_doc' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=str(SCRIPTS_DIR),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "False"
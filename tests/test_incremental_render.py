@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""增量渲染：只重渲染变化的分组，结果与完整渲染逐字节一致"""
+
+import io
+
+from api_patterns import Endpoint
+from generate_api_doc import EndpointDoc, write_api_md, write_api_md_incremental
+
+
+def _doc(method, path, tag, summary=""):
+    return EndpointDoc(
+        endpoint=Endpoint(method=method, path=path, function=path.strip("/"), framework="Flask",
+                          file="app.py", line=1),
+        summary=summary,
+        tags=[tag],
+    )
+
+
+BASE = [
+    _doc("GET", "/users", "Users", "列出用户"),
+    _doc("POST", "/users", "Users", "创建用户"),
+    _doc("GET", "/orders", "Orders", "列出订单"),
+    _doc("GET", "/zones", "Zones", "列出区域"),
+]
+
+
+def _full(docs):
+    stream = io.BytesIO()
+    write_api_md(docs, stream)
+    return stream.getvalue()
+
+
+def _incremental(docs, output, cache_dir):
+    result = write_api_md_incremental(docs, str(output), str(cache_dir))
+    assert output.read_bytes() == _full(docs)
+    return result
+
+
+def test_unchanged_input_does_not_rewrite(tmp_path):
+    output, cache_dir = tmp_path / "API.md", tmp_path / "cache"
+    assert _incremental(BASE, output, cache_dir) == (True, 3, 0)
+    assert _incremental(BASE, output, cache_dir) == (False, 0, 3)
+
+
+def test_adding_a_tag_matches_full_render(tmp_path):
+    output, cache_dir = tmp_path / "API.md", tmp_path / "cache"
+    _incremental(BASE, output, cache_dir)
+    # 新分组排在最前，其余分组的序号全部后移，只需改写标题行
+    docs = BASE + [_doc("GET", "/accounts", "Accounts", "列出账户")]
+    assert _incremental(docs, output, cache_dir) == (True, 1, 3)
+
+
+def test_removing_a_tag_matches_full_render(tmp_path):
+    output, cache_dir = tmp_path / "API.md", tmp_path / "cache"
+    _incremental(BASE, output, cache_dir)
+    docs = [doc for doc in BASE if doc.tags != ["Orders"]]
+    assert _incremental(docs, output, cache_dir) == (True, 0, 2)
+
+
+def test_edited_section_and_manual_edit(tmp_path):
+    output, cache_dir = tmp_path / "API.md", tmp_path / "cache"
+    _incremental(BASE, output, cache_dir)
+    docs = [_doc("GET", "/zones", "Zones", "列出全部区域") if doc.endpoint.path == "/zones" else doc
+            for doc in BASE]
+    assert _incremental(docs, output, cache_dir) == (True, 1, 2)
+    # 文件被手工改动：记录失效，整体重新生成
+    output.write_bytes(output.read_bytes() + b"\nmanual\n")
+    assert _incremental(docs, output, cache_dir) == (True, 3, 0)
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""扫描缓存：文件修改后不得返回旧结果，包括 mtime 与大小都没变的 racy 修改"""
+
+import os
+import time
+
+from api_patterns import ScanLimits
+from endpoint_scan import cache_version
+from generate_api_doc import scan_source
+from scan_cache import ScanCache
+
+LIMITS = ScanLimits()
+
+
+def _route(path):
+    # 不同路由保持相同长度，修改前后文件大小一致
+    return f"const app = require('express')();\napp.get('{path}', handler);\n"
+
+
+def _scan(src, cache_dir):
+    cache = ScanCache.open(cache_dir, cache_version(LIMITS))
+    paths = [doc.endpoint.path for doc in scan_source(str(src), LIMITS, cache=cache)]
+    cache.save()
+    return paths, cache
+
+
+def test_edit_invalidates_entry(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    app = src / "app.js"
+    app.write_text(_route("/aaa"), encoding="utf-8")
+    old = time.time_ns() - 60 * 10**9
+    os.utime(app, ns=(old, old))
+
+    assert _scan(src, tmp_path / "cache")[0] == ["/aaa"]
+    paths, cache = _scan(src, tmp_path / "cache")
+    assert paths == ["/aaa"]
+    assert cache.hits == 1
+
+    app.write_text(_route("/bbb"), encoding="utf-8")
+    os.utime(app, ns=(old + 10**9, old + 10**9))
+    assert _scan(src, tmp_path / "cache")[0] == ["/bbb"]
+
+
+def test_racy_edit_with_same_stat_is_detected(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    app = src / "app.js"
+    app.write_text(_route("/aaa"), encoding="utf-8")
+    mtime = app.stat().st_mtime_ns
+
+    assert _scan(src, tmp_path / "cache")[0] == ["/aaa"]
+    # 在同一 mtime 粒度内改写：大小不变、mtime 复原，stat 与记录时完全一致
+    app.write_text(_route("/bbb"), encoding="utf-8")
+    os.utime(app, ns=(mtime, mtime))
+    assert app.stat().st_size == len(_route("/aaa"))
+    assert _scan(src, tmp_path / "cache")[0] == ["/bbb"]
+
+
+def test_record_file_skips_stat_of_recent_files(tmp_path):
+    cache = ScanCache(tmp_path / "scan.json", "v")
+    cache.put("key", [])
+    now = time.time_ns()
+    cache.record_file("recent", now, 10, "key")
+    cache.record_file("settled", now - 60 * 10**9, 10, "key")
+    assert cache.lookup_file("recent", now, 10) is None
+    assert cache.lookup_file("settled", now - 60 * 10**9, 10) == "key"
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""输入防护：压缩/生成文件、超大文件、超长行被跳过并记录原因"""
+
+from api_patterns import ScanLimits, SkippedFile
+from endpoint_scan import cache_version, scan_cache_key, scan_content
+from generate_api_doc import scan_source
+from scan_cache import ScanCache
+
+ROUTE = "const app = require('express')();\napp.get('/users', list);\n"
+
+
+def _scan(text, file, limits=ScanLimits()):
+    skipped = []
+    docs = scan_content(text, file, limits, skipped)
+    return [doc.endpoint.path for doc in docs], [s.reason for s in skipped]
+
+
+def test_plain_file_is_scanned():
+    assert _scan(ROUTE, "src/app.js") == (["/users"], [])
+
+
+def test_minified_name_is_skipped():
+    assert _scan(ROUTE, "src/app.min.js") == ([], ["压缩文件（文件名）"])
+    assert _scan(ROUTE, "src/vendor.bundle.js") == ([], ["压缩文件（文件名）"])
+    assert _scan(ROUTE, "src/app.min.js", ScanLimits(skip_generated=False)) == (["/users"], [])
+
+
+def test_minified_name_has_no_cache_key():
+    assert scan_cache_key("0" * 40, "src/app.min.js") is None
+    assert scan_cache_key("0" * 40, "src/app.js") is not None
+
+
+def test_minified_content_is_skipped():
+    text = ROUTE + "var a=1;" * 600  # 平均行长远超阈值
+    paths, reasons = _scan(text, "src/app.js")
+    assert paths == []
+    assert len(reasons) == 1 and reasons[0].startswith("疑似压缩文件")
+
+
+def test_generated_header_is_skipped():
+    text = "// Code generated by protoc-gen-go. DO NOT EDIT.\n" + ROUTE
+    assert _scan(text, "src/app.js") == ([], ["生成文件（文件头含生成标记）"])
+
+
+def test_oversize_file_is_skipped():
+    paths, reasons = _scan(ROUTE, "src/app.js", ScanLimits(max_file_size=20))
+    assert paths == []
+    assert len(reasons) == 1 and reasons[0].startswith("文件过大")
+    assert _scan(ROUTE, "src/app.js", ScanLimits(max_file_size=0)) == (["/users"], [])
+
+
+def test_long_line_is_skipped():
+    text = ROUTE + "x" * 100 + "\n"
+    limits = ScanLimits(max_line_length=50)
+    assert _scan(text, "src/app.js", limits) == ([], ["第 3 行超长（> 50 字符）"])
+
+
+def test_skipped_files_are_reported_on_warm_cache(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "app.js").write_text(ROUTE, encoding="utf-8")
+    (src / "app.min.js").write_text(ROUTE, encoding="utf-8")
+    (src / "big.js").write_text(ROUTE + "// " + "x" * 200 + "\n", encoding="utf-8")
+    limits = ScanLimits(max_line_length=100)
+    cache_dir = tmp_path / "cache"
+
+    for _ in range(2):
+        cache = ScanCache.open(cache_dir, cache_version(limits))
+        skipped = []
+        docs = scan_source(str(src), limits, skipped, cache=cache)
+        cache.save()
+        # 被跳过的文件不写入缓存，第二次（热缓存）仍然跳过并报告原因
+        assert [doc.endpoint.file for doc in docs] == ["app.js"]
+        assert sorted(skipped, key=lambda s: s.file) == [
+            SkippedFile("app.min.js", "压缩文件（文件名）"),
+            SkippedFile("big.js", "第 3 行超长（> 100 字符）"),
+        ]
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""`api_snapshots.py diff A B` 与 `analyze_changes.py --since A`（工作区 = B）结果一致"""
+
+from api_patterns import ScanLimits
+from analyze_changes import analyze_api_changes, endpoint_to_dict, get_changed_files
+from api_snapshots import SnapshotStore, build_snapshot, diff_snapshots, resolve_commit, snapshot_version
+
+LIMITS = ScanLimits()
+
+
+def _flask(*routes):
+    lines = ["from flask import Flask", "app = Flask(__name__)", ""]
+    for path, func in routes:
+        lines += [f'@app.route("{path}")', f"def {func}():", "    pass", ""]
+    return "\n".join(lines)
+
+
+def _write(root, files):
+    for name, text in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+
+def _as_dicts(report):
+    return {
+        "added": [endpoint_to_dict(e) for e in report.added],
+        "removed": [endpoint_to_dict(e) for e in report.removed],
+        "modified": [endpoint_to_dict(e) for e in report.modified],
+        "skipped": [(s.file, s.reason) for s in report.skipped],
+    }
+
+
+def test_snapshot_diff_matches_analyze(git_repo, tmp_path):
+    generated = "# Code generated by tool. DO NOT EDIT.\n"
+    _write(tmp_path, {
+        # 同一路由出现在两个文件中，其中一个文件被删除
+        "app/a.py": _flask(("/health", "health_a"), ("/users", "users")),
+        "app/b.py": _flask(("/health", "health_b")),
+        # 重命名并修改
+        "app/old.py": _flask(("/orders", "orders"), ("/legacy", "legacy")),
+        "app/gen.py": generated + _flask(("/gen", "gen")),
+        "tests/test_api.py": _flask(("/ignored", "ignored")),
+    })
+    git_repo("add", "-A")
+    git_repo("commit", "-qm", "base")
+
+    git_repo("rm", "-q", "app/b.py")
+    git_repo("mv", "app/old.py", "app/new.py")
+    _write(tmp_path, {
+        "app/a.py": _flask(("/health", "health_a"), ("/users", "list_users")),
+        "app/new.py": _flask(("/orders", "orders"), ("/legacy", "legacy2")),
+        "app/gen.py": generated + _flask(("/gen", "gen2")),
+        "app/c.py": _flask(*[("/health", "health_c")] + [(f"/items/{i}", f"item_{i}") for i in range(6)]),
+        "tests/test_api.py": _flask(("/ignored", "ignored2")),
+    })
+    git_repo("add", "-A")
+    git_repo("commit", "-qm", "change")
+
+    store = SnapshotStore(str(tmp_path / "cache"), snapshot_version(LIMITS))
+    before = build_snapshot(store, resolve_commit("HEAD~1"), LIMITS)[0]
+    store.save(before)
+    after = build_snapshot(store, resolve_commit("HEAD"), LIMITS)[0]
+    assert after.base == before.commit  # 增量构建
+
+    expected = analyze_api_changes(get_changed_files("HEAD~1"), "HEAD~1", LIMITS)
+    actual = diff_snapshots(before, after)
+    assert _as_dicts(actual) == _as_dicts(expected)
+
+    summary = _as_dicts(actual)
+    assert [(e["path"], e["file"]) for e in summary["removed"]] == [("/health", "app/b.py")]
+    assert [e["path"] for e in summary["added"]] == ["/health"] + [f"/items/{i}" for i in range(6)]
+    assert [(e["function"], e["file"]) for e in summary["modified"]] == [
+        ("list_users", "app/a.py"), ("legacy2", "app/new.py"),
+    ]
+    assert [file for file, _ in summary["skipped"]] == ["app/gen.py"]
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""按分组拆分输出：只重写变化的分片，清理过期分片，串行与并行结果一致"""
+
+from api_patterns import Endpoint
+from generate_api_doc import SHARD_MARKER, EndpointDoc, shard_directory, write_split_docs
+
+
+def _doc(path, tag, summary=""):
+    return EndpointDoc(
+        endpoint=Endpoint(method="GET", path=path, function=path.strip("/"), framework="Flask",
+                          file="app.py", line=1),
+        summary=summary,
+        tags=[tag],
+    )
+
+
+DOCS = [_doc(f"/{tag.lower()}", tag, f"{tag} 列表") for tag in ("Users", "Orders", "Zones", "Items")]
+
+
+def _snapshot(output):
+    directory = shard_directory(str(output))
+    return {path.name: path.read_bytes() for path in sorted(directory.glob("*.md"))}
+
+
+def test_only_changed_shards_are_rewritten(tmp_path):
+    output = tmp_path / "API.md"
+    assert write_split_docs(DOCS, str(output)) == (4, 4, True, 0)
+    assert write_split_docs(DOCS, str(output)) == (4, 0, False, 0)
+
+    docs = [_doc("/zones", "Zones", "全部区域") if doc.tags == ["Zones"] else doc for doc in DOCS]
+    assert write_split_docs(docs, str(output)) == (4, 1, False, 0)
+    assert "全部区域" in (shard_directory(str(output)) / "Zones.md").read_text(encoding="utf-8")
+
+
+def test_stale_shards_are_removed_but_manual_files_kept(tmp_path):
+    output = tmp_path / "API.md"
+    write_split_docs(DOCS, str(output))
+    directory = shard_directory(str(output))
+    (directory / "NOTES.md").write_text("手写文档\n", encoding="utf-8")
+
+    assert write_split_docs(DOCS[:3], str(output)) == (3, 0, True, 1)
+    assert sorted(_snapshot(output)) == ["NOTES.md", "Orders.md", "Users.md", "Zones.md"]
+    assert (directory / "Users.md").read_text(encoding="utf-8").startswith(SHARD_MARKER)
+
+
+def test_parallel_matches_serial(tmp_path):
+    serial, parallel = tmp_path / "a" / "API.md", tmp_path / "b" / "API.md"
+    serial.parent.mkdir()
+    parallel.parent.mkdir()
+    write_split_docs(DOCS, str(serial), jobs=1)
+    write_split_docs(DOCS, str(parallel), jobs=2)
+    assert _snapshot(serial) == _snapshot(parallel)
+    assert serial.read_bytes() == parallel.read_bytes()